@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""Run the benchmark suite.
+
+Results are written as JSON so runs can be compared from one commit
+to the next:
+
+    python3 bench.py -o before.json
+    ... hack ...
+    python3 bench.py -c before.json
+
+When comparing, the last column is the speedup of the best timing
+relative to the baseline (positive is faster).
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import benchmarks
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def show(result, baseline=None):
+    line = "{:70s} {:10.3f} ms {:12.0f}/s".format(
+                                benchmarks.key(result),
+                                result['best']*1000,
+                                result['rate'] or 0)
+    if baseline:
+        previous = baseline.get(benchmarks.key(result))
+        if previous:
+            line += " {:+7.1%}".format(previous['best']/result['best'] - 1)
+
+    print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default=None,
+                        help="only run benchmarks whose name contains PATTERN")
+    parser.add_argument('-r', dest='repeat', type=int, default=3,
+                        help="number of timed runs per case (best is kept)")
+    parser.add_argument('-q', dest='quick', action='store_true',
+                        help="quick mode: only run the smallest datasets")
+    parser.add_argument('-o', dest='output', default=None,
+                        help="write the results as JSON to OUTPUT")
+    parser.add_argument('-c', dest='compare', default=None,
+                        help="compare with the results stored in COMPARE")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {benchmarks.key(r): r for r in json.load(f)['results']}
+
+    results = benchmarks.run(args.pattern, args.repeat, args.quick,
+                             log=lambda result: show(result, baseline))
+
+    if args.output:
+        with open(args.output, 'wt') as f:
+            json.dump(dict(
+                revision=revision(),
+                timestamp=time.time(),
+                python=platform.python_version(),
+                platform=platform.platform(),
+                quick=args.quick,
+                results=results,
+            ), f, indent=2)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""A minimal benchmark harness.
+
+Benchmarks are registered using the `benchmark` decorator.
+A benchmark function receives one value for each of its
+parameters and returns a tuple `(fn, items)`:
+
+- `fn` is a callable without argument. This is the code
+  actually timed;
+- `items` is the number of items (rows, lines, values, ...)
+  processed by each call to `fn`. It is used to report
+  the throughput.
+
+Datasets are synthetic and generated from a fixed seed, so
+results can be compared from one commit to the next.
+"""
+
+import gc
+import itertools
+import random
+import time
+
+#: Registered benchmarks as (name, function, parameters) tuples
+_BENCHMARKS = []
+
+#: The seed used to generate the synthetic datasets
+SEED = 20141012
+
+def benchmark(name, **params):
+    """Register a benchmark.
+
+    Each keyword argument is a parameter name and the list of values
+    to benchmark. The cartesian product of all parameters is run.
+    The first value of each list is the one used in *quick* mode.
+    """
+    def decorator(fn):
+        _BENCHMARKS.append((name, fn, params))
+        return fn
+
+    return decorator
+
+def rng():
+    """Return a new random generator initialized with the suite seed
+    """
+    return random.Random(SEED)
+
+def cases(quick=False):
+    """Generator returning the (name, fn, kwargs) of each benchmark case
+    """
+    for name, fn, params in _BENCHMARKS:
+        keys = list(params)
+        values = [params[k][:1] if quick else params[k] for k in keys]
+        for combination in itertools.product(*values):
+            yield name, fn, dict(zip(keys, combination))
+
+def measure(fn, repeat):
+    """Time `repeat` calls to `fn`. Returns the list of timings.
+    """
+    timings = []
+    gcold = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+            gc.collect()
+    finally:
+        if gcold:
+            gc.enable()
+
+    return timings
+
+def run(pattern=None, repeat=3, quick=False, log=None):
+    """Run the benchmarks whose name contains `pattern`.
+
+    Returns a list of results suitable for JSON serialization.
+    """
+    results = []
+    for name, fn, params in cases(quick):
+        if pattern and pattern not in name:
+            continue
+
+        call, items = fn(**params)
+        timings = measure(call, repeat)
+        best = min(timings)
+        result = dict(
+            name=name,
+            params=params,
+            repeat=repeat,
+            items=items,
+            best=best,
+            mean=sum(timings)/len(timings),
+            rate=items/best if best else None,
+        )
+        results.append(result)
+
+        if log:
+            log(result)
+
+    return results
+
+def key(result):
+    """Return a key identifying a benchmark case across runs
+    """
+    params = ",".join("{}={}".format(k, v)
+                                for k, v in sorted(result['params'].items()))
+    return "{}[{}]".format(result['name'], params)
+
+from benchmarks.formatter import *
+from benchmarks.parser import *
+from benchmarks.tabular import *
+from benchmarks.engine import *
+from benchmarks.startup import *
+from benchmarks.history import *
+from benchmarks.bulkload import *
+from benchmarks.compress import *
+from benchmarks.export import *
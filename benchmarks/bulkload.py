@@ -0,0 +1,86 @@
+import itertools
+import os
+import tempfile
+import weakref
+
+from benchmarks import benchmark, rng
+from sqlm.engine import Engine
+from sqlm.dialects.generic import GenericDialect
+from sqlm import transfer
+
+def _rows(rows, width):
+    r = rng()
+    return [tuple(r.randrange(10**6) if i % 2 else
+                  "v{:d}".format(r.randrange(10**6))
+                        for i in range(width))
+                for _ in range(rows)]
+
+@benchmark('bulkload.sqlite', strategy=['dialect', 'executemany', 'multirow'],
+                              rows=[20000, 200000], width=[4, 16])
+def bench_sqlite_bulkload(strategy, rows, width):
+    """Rows/s loaded into an on-disk SQLite database.
+
+    `dialect` is SQLiteDialect.bulkInsert. The other strategies are
+    the generic paths.
+    """
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = Engine(dict(dialect='sqlite', db=path))
+
+    dialect = engine.dialect
+    if strategy != 'dialect':
+        dialect.paramstyle = 'qmark'
+        dialect.fast_executemany = strategy == 'executemany'
+        dialect.multirow_values = strategy == 'multirow'
+        bulkInsert = lambda *args: GenericDialect.bulkInsert(dialect, *args)
+    else:
+        bulkInsert = dialect.bulkInsert
+
+    data = _rows(rows, width)
+    columns = ["c{:d}".format(i) for i in range(width)]
+    tables = ("t{:d}".format(n) for n in itertools.count())
+
+    def fn():
+        tbl = next(tables)
+        engine.conn.execute("CREATE TABLE {} ({})".format(tbl,
+                                                          ", ".join(columns)))
+        bulkInsert(engine.conn, tbl, columns, data)
+        engine.conn.commit()
+
+    weakref.finalize(fn, os.remove, path)
+    weakref.finalize(fn, engine.conn.close)
+
+    return fn, rows
+
+@benchmark('bulkload.copy', depth=[4, 0], rows=[20000, 200000])
+def bench_copy(depth, rows):
+    """Rows/s copied from one on-disk SQLite database to another.
+
+    With `depth` 0, rows are fetched and inserted by the same thread.
+    """
+    paths = []
+    engines = []
+    for _ in range(2):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        paths.append(path)
+        engines.append(Engine(dict(dialect='sqlite', db=path)))
+    source, target = engines
+
+    columns = ["c{:d}".format(i) for i in range(8)]
+    source.conn.execute("CREATE TABLE t ({})".format(", ".join(columns)))
+    source.dialect.bulkInsert(source.conn, "t", columns, _rows(rows, 8))
+    tables = ("t{:d}".format(n) for n in itertools.count())
+
+    def fn():
+        tbl = next(tables)
+        names, data = transfer.copy(source, target, tbl, "SELECT * FROM t",
+                                    "CREATE", arraysize=500, depth=depth)
+        target.dialect.bulkInsert(target.conn, tbl, names, data)
+
+    for engine in engines:
+        weakref.finalize(fn, engine.close)
+    for path in paths:
+        weakref.finalize(fn, os.remove, path)
+
+    return fn, rows
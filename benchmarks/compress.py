@@ -0,0 +1,57 @@
+import importlib
+import os
+import shutil
+import tempfile
+import weakref
+
+from benchmarks import benchmark
+from benchmarks.tabular import _write_data
+from sqlm.compress import open_input, DEPTH
+from sqlm.tabular import Reader
+
+_SUFFIXES = {
+    'gzip': '.gz',
+    'bz2':  '.bz2',
+    'lzma': '.xz',
+}
+
+def _load(f):
+    reader = Reader()
+    columns, rows = reader.parse(f)
+    for row in reader.convert(columns, rows):
+        pass
+
+@benchmark('compress.load', strategy=['pipelined', 'stream', 'inflate'],
+                            module=list(_SUFFIXES),
+                            lines=[100000, 1000000])
+def bench_compressed_load(strategy, module, lines):
+    """Parse and convert a compressed file, either decompressed
+    on the fly (with or without a background thread) or first
+    decompressed to disk.
+    """
+    tmpdir = tempfile.mkdtemp()
+    text = os.path.join(tmpdir, 'data.txt')
+    path = text + _SUFFIXES[module]
+    _write_data(text, '\t', lines)
+
+    compressor = importlib.import_module(module)
+    with open(text, 'rb') as src, compressor.open(path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(text)
+
+    def fn():
+        if strategy == 'inflate':
+            with compressor.open(path, 'rb') as src, open(text, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            with open(text, 'rt') as f:
+                _load(f)
+            os.remove(text)
+        else:
+            depth = DEPTH if strategy == 'pipelined' else 0
+            with open_input(path, depth) as f:
+                _load(f)
+
+    # The files are removed when the benchmark function is collected
+    weakref.finalize(fn, shutil.rmtree, tmpdir)
+
+    return fn, lines
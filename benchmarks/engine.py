@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import weakref
+
+from benchmarks import benchmark, rng
+
+def _interpreter(rows, width):
+    from sqlm.interpreter import Environment, Interpreter
+
+    env = Environment()
+    interpreter = Interpreter(None)
+    interpreter.doConnect(env, 'sqlite://:/:memory:')
+
+    columns = ", ".join("c{:d}".format(i) for i in range(width))
+    conn = interpreter.engine.conn
+    conn.execute("CREATE TABLE t ({})".format(columns))
+
+    r = rng()
+    conn.executemany("INSERT INTO t VALUES ({})".format(
+                                        ", ".join(["?"]*width)),
+                     ([r.randrange(10**6) if i % 2 else
+                       "v{:d}".format(r.randrange(10**6))
+                            for i in range(width)]
+                        for _ in range(rows)))
+    conn.commit()
+
+    return env, interpreter
+
+@benchmark('engine.sqlite.send', rows=[1000, 100000], width=[4, 16])
+def bench_sqlite_send(rows, width):
+    env, interpreter = _interpreter(rows, width)
+
+    def fn():
+        with contextlib.redirect_stdout(io.StringIO()):
+            interpreter.send(env, "SELECT * FROM t")
+
+    return fn, rows
+
+class _SlowCursor:
+    """Cursor wrapper simulating a high-latency link
+    """
+    def __init__(self, cursor, latency):
+        self._cursor = cursor
+        self._latency = latency
+        self.description = cursor.description
+        self.rowcount = cursor.rowcount
+
+    def fetchmany(self, size):
+        time.sleep(self._latency)
+        return self._cursor.fetchmany(size)
+
+@benchmark('engine.latency.display', prefetch=[0, 2, 16], rows=[20000],
+                                     latency=[0.005])
+def bench_latency_display(prefetch, rows, latency):
+    from sqlm.resultset import ResultSet
+    from sqlm.formatter import TabularFormatter
+
+    env, interpreter = _interpreter(rows, 16)
+    env.prefetch = prefetch
+    env.pagesize = 1000
+    formatter = TabularFormatter()
+
+    def fn():
+        cursor = interpreter.engine.conn.execute("SELECT * FROM t")
+        result = ResultSet(_SlowCursor(cursor, latency))
+        with contextlib.redirect_stdout(io.StringIO()):
+            formatter.display(env, result)
+
+    return fn, rows
+
+@benchmark('engine.sqlite.commitevery', commitevery=[1, 100], statements=[2000])
+def bench_commit_every(commitevery, statements):
+    """Script replay of single-row INSERT statements on an on-disk
+    database, with a commit every `commitevery` statements.
+    """
+    from sqlm.interpreter import Environment, Interpreter
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    env = Environment()
+    env.commitevery = commitevery
+    interpreter = Interpreter(None)
+    interpreter.doConnect(env, 'sqlite://:/' + path)
+    interpreter.engine.conn.execute("CREATE TABLE t (n INTEGER, s TEXT)")
+
+    def fn():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for n in range(statements):
+                interpreter.send(env, "INSERT INTO t VALUES ({:d}, 'v{:d}')"
+                                                            .format(n, n))
+            interpreter.doCommit(env)
+
+    weakref.finalize(fn, os.remove, path)
+
+    return fn, statements
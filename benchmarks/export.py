@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+import weakref
+
+from benchmarks import benchmark, rng
+from sqlm.engine import Engine
+from sqlm import export
+
+@benchmark('export.parallel', parallel=[1, 2, 4], key=['n', 'ROWID'],
+                              rows=[100000, 1000000])
+def bench_export(parallel, key, rows):
+    """Rows/s exported from an on-disk SQLite database.
+
+    SQLite runs in-process: the workers compete for the GIL, so this
+    mostly measures the partitioning overhead. Client/server databases
+    scale with the number of slices until the server is the limit.
+    """
+    tmpdir = tempfile.mkdtemp()
+    engine = Engine(dict(dialect='sqlite', db=os.path.join(tmpdir, 'b.db')))
+    r = rng()
+    engine.conn.execute("CREATE TABLE t (n INTEGER, s TEXT, x REAL)")
+    engine.dialect.bulkInsert(engine.conn, "t", ["n", "s", "x"],
+                              ((i, "v{:d}".format(r.randrange(10**6)),
+                                r.random()) for i in range(rows)))
+    path = os.path.join(tmpdir, 'out.tsv')
+
+    def fn():
+        export.export(engine, path, "SELECT n, s, x FROM t", parallel, key,
+                      arraysize=500)
+
+    weakref.finalize(fn, engine.close)
+    weakref.finalize(fn, shutil.rmtree, tmpdir)
+
+    return fn, rows
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks import benchmark, rng
+from sqlm.cache import CachedCursor
+from sqlm.formatter import Column, Page, TabularFormatter, to_char
+from sqlm.interpreter import Environment
+from sqlm.resultset import ResultSet
+
+NUMBER = ('N', type('NUMBER', (), {}), 22, 22, 10, 2, 1)
+STRING = ('S', type('STRING', (), {}), 40, 40, 0, 0, 1)
+DATETIME = ('D', type('DATETIME', (), {}), 23, 7, 0, 0, 1)
+
+def _dates(size):
+    r = rng()
+    origin = datetime(2000, 1, 1)
+    return [origin + timedelta(seconds=r.randrange(10**9))
+                for _ in range(size)]
+
+def _values(kind, size):
+    r = rng()
+    if kind == 'number':
+        return [str(Decimal(r.randrange(-10**8, 10**8)).scaleb(-2))
+                    for _ in range(size)]
+    else:
+        return ["".join(r.choice('abcdefghijklmnopqrstuvwxyz ')
+                            for _ in range(r.randrange(1, 40)))
+                    for _ in range(size)]
+
+@benchmark('formatter.to_char', kind=['number', 'string'],
+                                size=[10000, 100000])
+def bench_to_char(kind, size):
+    values = _values(kind, size)
+    fmt = '99999999.99' if kind == 'number' else 'X'*40
+
+    def fn():
+        for value in values:
+            to_char(value, fmt)
+
+    return fn, size
+
+@benchmark('formatter.Page.formats', kind=['number', 'string', 'mixed'],
+                                     rows=[1000, 100000],
+                                     width=[4, 16])
+def bench_page_formats(kind, rows, width):
+    if kind == 'mixed':
+        desc = [NUMBER if i % 2 else STRING for i in range(width)]
+    else:
+        desc = [NUMBER if kind == 'number' else STRING]*width
+
+    columns = [Column(*d) for d in desc]
+    data = {d: _values('number' if d is NUMBER else 'string', rows)
+                for d in set(desc)}
+    page = Page(columns)
+    for row in zip(*[data[d] for d in desc]):
+        page.append(row)
+
+    def fn():
+        page.formats()
+
+    return fn, rows
+
+@benchmark('formatter.Formatter.rows', rows=[1000, 100000], width=[4, 16])
+def bench_formatter_rows(rows, width):
+    desc = [NUMBER if i % 2 else STRING for i in range(width)]
+    columns = [Column(*d) for d in desc]
+    data = {d: _values('number' if d is NUMBER else 'string', rows)
+                for d in set(desc)}
+    page = Page(columns)
+    for row in zip(*[data[d] for d in desc]):
+        page.append(row)
+
+    formatter = page.formated()
+
+    def fn():
+        for row in formatter.rows():
+            pass
+
+    return fn, rows
+
+@benchmark('formatter.dates', mask=['YYYY-MM-DD HH24:MI:SS',
+                                    'DD-MON-YY HH:MI:SS.FF3 AM'],
+                              rows=[1000, 100000])
+def bench_formatter_dates(mask, rows):
+    columns = [Column(*DATETIME), Column(*NUMBER)]
+    columns[0].mask = mask
+    page = Page(columns)
+    for row in zip(_dates(rows), _values('number', rows)):
+        page.append(row)
+
+    def fn():
+        for row in page.formated().rows():
+            pass
+
+    return fn, rows
+
+@benchmark('formatter.workers', workers=[0, 2, 4], rows=[20000, 200000])
+def bench_format_workers(workers, rows):
+    desc = [NUMBER if i % 4 == 0 else STRING for i in range(16)]
+    data = {d: _values('number' if d is NUMBER else 'string', rows)
+                for d in set(desc)}
+    data = list(zip(*[data[d] for d in desc]))
+
+    env = Environment()
+    env.formatworkers = workers
+    env.pagesize = 5000
+    formatter = TabularFormatter()
+
+    def fn():
+        result = ResultSet(CachedCursor(desc, data))
+        for page in formatter.pages(env, result):
+            for lines in page:
+                pass
+
+    return fn, rows
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import weakref
+
+from benchmarks import benchmark, rng
+from sqlm.history import History
+
+def _statements(size):
+    r = rng()
+    tables = ["tbl_{:d}".format(i) for i in range(500)]
+    columns = ["col_{:d}".format(i) for i in range(50)]
+    return ["SELECT {} FROM {} WHERE {} = {:d}".format(
+                    r.choice(columns), r.choice(tables), r.choice(columns),
+                    r.randrange(10**6))
+                for _ in range(size)]
+
+@benchmark('history.load', entries=[10000, 300000], limit=[10000])
+def bench_history_load(entries, limit):
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    history = History(path)
+    for stmt in _statements(entries):
+        history.append(stmt)
+    history.close()
+
+    def fn():
+        History(path, limit)
+
+    weakref.finalize(fn, os.remove, path)
+
+    return fn, limit
+
+@benchmark('history.search', entries=[10000, 300000],
+                             pattern=['tbl_42 ', '^select col_7 ', 'col_'])
+def bench_history_search(entries, pattern):
+    history = History()
+    for stmt in _statements(entries):
+        history.append(stmt)
+
+    def fn():
+        for _ in range(10):
+            history.search(pattern)
+
+    return fn, 10
@@ -0,0 +1,41 @@
+from benchmarks import benchmark, rng
+from sqlm.parser import tokenize, compile
+
+_SYNOPSIS = {
+    'simple':   ("SET param value",
+                 "SET TIMING ON"),
+    'optional': ("ED [filename] [ ! events...]",
+                 "ED edbuf.sql ! 1 2 3-5"),
+    'nested':   ("COPY [FROM src] [TO dst] [[CREATE] tbl] [USING query...]",
+                 "COPY FROM a TO b CREATE t USING select 'a b' from dual"),
+}
+
+def _statements(size):
+    r = rng()
+    words = ('SELECT', 'a', 'b', "'quoted value'", '"Ident"', 'FROM',
+             'WHERE', '=', '!', '@', '...', 'tbl')
+    return [" ".join(r.choice(words) for _ in range(r.randrange(1, 20)))
+                for _ in range(size)]
+
+@benchmark('parser.tokenize', size=[10000])
+def bench_tokenize(size):
+    statements = _statements(size)
+
+    def fn():
+        for stmt in statements:
+            tokenize(stmt)
+
+    return fn, size
+
+@benchmark('parser.Synopsis.match', complexity=list(_SYNOPSIS),
+                                    size=[10000])
+def bench_synopsis_match(complexity, size):
+    pattern, stmt = _SYNOPSIS[complexity]
+    synopsis = compile(pattern)
+    tokens = tokenize(stmt)
+
+    def fn():
+        for _ in range(size):
+            synopsis.match(tokens)
+
+    return fn, size
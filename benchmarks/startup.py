@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from benchmarks import benchmark
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPTS = {
+    'python':       "pass",
+    'interpreter':  "import sqlm.interpreter",
+    'sqlmoins':     "import sqlmoins",
+    'sqlite':       "from sqlm.interpreter import Environment, Interpreter\n"
+                    "Interpreter(None).doConnect(Environment(), "
+                                                "'sqlite://:/:memory:')",
+}
+
+@benchmark('startup', target=list(_SCRIPTS), runs=[10])
+def bench_startup(target, runs):
+    cmd = [sys.executable, '-c', _SCRIPTS[target]]
+
+    def fn():
+        for _ in range(runs):
+            subprocess.check_call(cmd, cwd=_ROOT)
+
+    return fn, runs
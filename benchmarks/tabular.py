@@ -0,0 +1,63 @@
+import os
+import tempfile
+import weakref
+
+from benchmarks import benchmark, rng
+from sqlm.tabular import Reader
+
+_SEPARATORS = {
+    'pipe':         ' | ',
+    'tab':          '\t',
+    'doublespace':  '  ',
+    'space':        ' ',
+}
+
+def _write_data(path, sep, lines):
+    r = rng()
+    with open(path, 'wt') as f:
+        f.write(sep.join(('ID', 'NAME', 'AMOUNT', 'CODE')) + '\n')
+        for i in range(lines):
+            f.write(sep.join((
+                str(i),
+                r.choice(('alpha', 'beta', 'gamma', 'delta', 'NULL')),
+                "{:.2f}".format(r.uniform(-1000, 1000)),
+                "C{:04d}".format(r.randrange(10000)),
+            )))
+            f.write('\n')
+
+@benchmark('tabular.Reader.parse', sep=list(_SEPARATORS),
+                                   lines=[10000, 1000000])
+def bench_reader_parse(sep, lines):
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    _write_data(path, _SEPARATORS[sep], lines)
+
+    def fn():
+        with open(path, 'rt') as f:
+            Reader().parse(f)
+
+    # The file is removed when the benchmark function is collected
+    weakref.finalize(fn, os.remove, path)
+
+    return fn, lines
+
+@benchmark('tabular.Reader.dates', mask=['YYYY-MM-DD HH24:MI:SS', 'DD/MM/YYYY'],
+                                   lines=[10000, 200000])
+def bench_reader_dates(mask, lines):
+    """Type inference and conversion of a date column
+    """
+    r = rng()
+    fmt = '{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}' \
+            if mask.startswith('YYYY') else '{2:02d}/{1:02d}/{0:04d}'
+    data = [[str(i), fmt.format(r.randrange(1970, 2030), r.randrange(1, 13),
+                                r.randrange(1, 29), r.randrange(24),
+                                r.randrange(60), r.randrange(60))]
+                for i in range(lines)]
+
+    def fn():
+        reader = Reader()
+        columns = reader.guessType(['ID', 'D'], data)
+        for row in reader.convert(columns, data):
+            pass
+
+    return fn, lines
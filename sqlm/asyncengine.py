@@ -0,0 +1,182 @@
+"""asyncio facade over the (blocking) Engine API.
+
+Blocking dialect calls are run in a bounded thread pool shared
+by all the engines. So many sessions might be used concurrently
+from one event loop without requiring one thread per session.
+
+Example:
+
+    engine = await AsyncEngine.connect(dict(dialect='sqlite',
+                                            db=':memory:'))
+    result = await engine.execute("SELECT * FROM t")
+    async for row in result:
+        print(row)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlm.engine import Engine
+
+#: Maximum number of dialect calls running at the same time
+#: in the shared executor
+max_workers = 8
+
+_executor = None
+
+def get_executor():
+    """Return the executor shared by all the engines.
+
+    The executor is created on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers,
+                                       thread_name_prefix='sqlm-async')
+
+    return _executor
+
+async def _wait(future):
+    """Wait for a concurrent future, ignoring its outcome
+    """
+    try:
+        await asyncio.wrap_future(future)
+    except Exception:
+        pass
+
+class AsyncEngine:
+    """Asynchronous wrapper arround an Engine.
+
+    Calls on the same engine are serialized (a connection is not
+    supposed to be used concurrently). Calls on different engines run
+    concurrently up to the executor limit.
+
+    Cancelling the awaiting task cancels the statement in progress
+    on the server (see Engine.cancel).
+    """
+
+    def __init__(self, engine, executor=None):
+        self.engine = engine
+        self.executor = executor or get_executor()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, params, executor=None):
+        """Establish a new connection to the database.
+
+        `params` is either a connection URL or a dictionary
+        as returned by `sqlm.engine.parse_url`
+        """
+        executor = executor or get_executor()
+        future = executor.submit(Engine, params)
+
+        return cls(await asyncio.wrap_future(future), executor)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking call using the engine's connection.
+        """
+        async with self._lock:
+            future = self.executor.submit(fn, *args, **kwargs)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                if not future.cancel():
+                    # Already running: interrupt it server-side
+                    # and release the connection only once done
+                    self.engine.cancel()
+                    await _wait(future)
+                raise
+
+    async def prepare(self, stmt):
+        statement = await self.run(self.engine.prepare, stmt)
+
+        return AsyncStatement(self, statement)
+
+    async def execute(self, stmt, **bindparams):
+        """Prepare and execute a statement.
+
+        Returns an AsyncResultSet.
+        """
+        statement = await self.prepare(stmt)
+
+        return await statement.execute(**bindparams)
+
+class AsyncStatement:
+    def __init__(self, engine, statement):
+        self.engine = engine
+        self.statement = statement
+        self.bindnames = statement.bindnames
+
+    async def execute(self, **bindparams):
+        result = await self.engine.run(self.statement.execute, **bindparams)
+
+        return AsyncResultSet(self.engine, result)
+
+class AsyncResultSet:
+    """Asynchronous iterator over the rows of a result.
+
+    Rows are fetched by batches of `arraysize` rows. Each batch
+    is one call in the executor.
+
+    The cursor is released when an iteration ends, even before the
+    last row (break, cancelled task). `aclose` releases it explicitly.
+    """
+
+    def __init__(self, engine, result):
+        self.engine = engine
+        self.result = result
+        self.rowcount = result.rowcount
+        self.returns_rows = result.returns_rows
+        self.description = result.cursor.description
+        self.stats = result.stats
+        self._batches = None # generator of the batches being fetched
+
+    @property
+    def arraysize(self):
+        return self.result.arraysize
+
+    @arraysize.setter
+    def arraysize(self, value):
+        self.result.arraysize = value
+
+    async def batches(self):
+        """Asynchronous generator returning the rows by batches
+        """
+        if self.result.done:
+            return # no rows, or released
+
+        self._batches = self.result.batches()
+        try:
+            while True:
+                batch = await self.engine.run(next, self._batches, None)
+                if batch is None:
+                    break
+
+                yield batch
+        finally:
+            await self.aclose()
+
+    def _release(self, batches):
+        if batches is not None:
+            batches.close()
+        if not self.result.done:
+            self.result.close()
+
+    async def aclose(self):
+        """Release the cursor, discarding the rows not fetched yet
+        """
+        if self._batches is not None or not self.result.done:
+            batches, self._batches = self._batches, None
+            await self.engine.run(self._release, batches)
+
+    async def fetchall(self):
+        return [row async for row in self]
+
+    async def __aiter__(self):
+        batches = self.batches()
+        try:
+            async for batch in batches:
+                for row in batch:
+                    yield row
+        finally:
+            await batches.aclose()
@@ -0,0 +1,230 @@
+"""Client-side cache for the results of read-only queries.
+
+Results are keyed by database (see `Engine.database`), normalized SQL
+text and bind values. The cache is bounded both in size (LRU eviction)
+and in time (TTL). Any other statement sent to a database invalidates
+the entries of that database, whatever the connection used.
+"""
+
+import re
+import sys
+import time
+from collections import OrderedDict
+
+#: Quoted strings or identifiers (kept verbatim when normalizing)
+_C_QUOTED = re.compile(r"""('(?:[^']|'')*'|"[^"]*")""")
+
+_C_SPACES = re.compile(r'\s+')
+
+#: Statements whose result might be cached
+_C_CACHEABLE = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+_C_FOR_UPDATE = re.compile(r'\bFOR\s+UPDATE\b', re.IGNORECASE)
+
+#: Parentheses and verbs, to find the main verb after a WITH clause
+_C_VERB = re.compile(r'[()]|\b(SELECT|INSERT|UPDATE|DELETE|MERGE)\b',
+                     re.IGNORECASE)
+
+def normalize(stmt):
+    """Normalize the SQL text of a statement.
+
+    Runs of spaces are replaced by a single space outside of
+    quoted strings and identifiers.
+    """
+    parts = _C_QUOTED.split(stmt.strip())
+    parts[::2] = [_C_SPACES.sub(" ", part) for part in parts[::2]]
+
+    return "".join(parts)
+
+def verb(stmt):
+    """Return the main verb of a statement starting with a WITH clause
+    (upper case), i.e.: the first one outside of the parentheses of
+    the common table expressions. None if there is none.
+    """
+    depth = 0
+    for m in _C_VERB.finditer(_C_QUOTED.sub("''", stmt)):
+        token = m.group(0)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0:
+            return token.upper()
+
+    return None
+
+def isquery(stmt):
+    """Return True if the statement is a query (SELECT, or WITH ...
+    SELECT)
+    """
+    m = _C_CACHEABLE.match(stmt)
+    if not m:
+        return False
+
+    return m.group(1).upper() == 'SELECT' or verb(stmt) == 'SELECT'
+
+def cacheable(stmt):
+    """Return True if the statement is a read-only query
+    """
+    return isquery(stmt) and not _C_FOR_UPDATE.search(stmt)
+
+def sizeof(rows):
+    """Estimate the memory used by a sequence of rows
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row:
+            size += sys.getsizeof(value)
+
+    return size
+
+class CachedCursor:
+    """Minimal PEP-249 cursor returning rows from the cache
+    """
+    rowcount = -1
+    arraysize = 1
+
+    def __init__(self, description, rows):
+        self.description = description
+        self._rows = rows
+        self._pos = 0
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        batch = self._rows[self._pos:self._pos+size]
+        self._pos += len(batch)
+
+        return list(batch)
+
+    def fetchall(self):
+        return self.fetchmany(len(self._rows) - self._pos)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+class RecordingCursor:
+    """Cursor proxy storing the fetched rows into the cache once
+    the result has been entirely fetched.
+    """
+    def __init__(self, cache, key, cursor):
+        self._cache = cache
+        self._key = key
+        self._cursor = cursor
+        self._rows = []
+        self._size = 0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def fetchmany(self, size=None):
+        batch = self._cursor.fetchmany(size or self._cursor.arraysize)
+        if self._rows is not None:
+            if batch:
+                self._size += sizeof(batch)
+                if self._size > self._cache.maxbytes:
+                    # Too big to be cached
+                    self._rows = None
+                else:
+                    self._rows.extend(tuple(row) for row in batch)
+            else:
+                self._cache.put(self._key, self._cursor.description,
+                                tuple(self._rows))
+                self._rows = None
+
+        return batch
+
+class ResultCache:
+    """LRU cache of query results.
+
+    Entries are dropped when the total estimated size exceeds
+    `maxbytes`, when they are older than `ttl` seconds or when a
+    statement that might modify the data is sent to their database.
+    """
+
+    def __init__(self, maxbytes=16*1024*1024, ttl=300):
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (timestamp, size,
+                                      #         description, rows)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def configure(self, maxbytes, ttl):
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self._evict()
+
+    def key(self, database, stmt, bindparams=()):
+        return (database, normalize(stmt), tuple(bindparams))
+
+    def get(self, key):
+        """Return a cursor serving the cached rows or None if there is
+        no valid entry for `key`.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl:
+            self._remove(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        _, _, description, rows = entry
+
+        return CachedCursor(description, rows)
+
+    def record(self, key, cursor):
+        """Return a cursor proxy that stores the result of `cursor`
+        when it has been entirely fetched.
+        """
+        return RecordingCursor(self, key, cursor)
+
+    def put(self, key, description, rows):
+        size = sizeof(rows)
+        if size > self.maxbytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic(), size, description, rows)
+        self.size += size
+        self._evict()
+
+    def invalidate(self, database=None):
+        """Remove the entries of a database (or all entries if
+        `database` is None)
+        """
+        for key in list(self._entries):
+            if database is None or key[0] == database:
+                self._remove(key)
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return "{:d} entries, {:d} bytes, {:d} hits, {:d} misses " \
+               "({:.1%} hit rate)".format(len(self), self.size,
+                                          self.hits, self.misses,
+                                          self.hitRate())
+
+    def _remove(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self.size -= size
+
+    def _evict(self):
+        while self.size > self.maxbytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
@@ -0,0 +1,104 @@
+"""Transparent decompression of input files.
+
+gzip, bzip2 and xz files are recognized by their extension or,
+failing that, by their magic bytes. The decompressed data are
+produced by a background thread into a bounded queue of blocks,
+so decompression overlaps with the consumer (parsing, inserting).
+The compression modules release the GIL while decompressing.
+"""
+
+import functools
+import importlib
+import io
+import os
+
+from sqlm.pipeline import prefetch
+
+#: Compression module by file extension
+_EXTENSIONS = {
+    '.gz':  'gzip',
+    '.bz2': 'bz2',
+    '.xz':  'lzma',
+}
+
+#: Compression module by magic bytes
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'lzma'),
+)
+
+#: Size of the decompressed blocks
+BLOCK_SIZE = 1 << 18
+
+#: Default number of decompressed blocks buffered in advance
+DEPTH = 4
+
+def compression(path):
+    """Return the name of the module able to decompress `path`
+    (`gzip`, `bz2` or `lzma`) or None for uncompressed files.
+    """
+    module = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if module:
+        return module
+
+    with open(path, 'rb') as f:
+        head = f.read(6)
+
+    for magic, module in _MAGIC:
+        if head.startswith(magic):
+            return module
+
+    return None
+
+class PipedStream(io.RawIOBase):
+    """Read-only binary stream whose blocks are read in advance
+    from `file` by a background thread.
+
+    At most `depth` blocks are buffered.
+    """
+
+    def __init__(self, file, depth=DEPTH, blocksize=BLOCK_SIZE):
+        self._file = file
+        self._blocks = prefetch(iter(functools.partial(file.read, blocksize),
+                                     b''), depth)
+        self._block = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self._block:
+            self._block = memoryview(next(self._blocks, b''))
+
+        n = min(len(b), len(self._block))
+        b[:n] = self._block[:n]
+        self._block = self._block[n:]
+
+        return n
+
+    def close(self):
+        if not self.closed:
+            # Stop the producer before closing its file
+            self._blocks.close()
+            self._file.close()
+
+        super().close()
+
+def open_input(path, depth=DEPTH, bufsize=1 << 20):
+    """Open a possibly compressed file for reading as text.
+
+    Uncompressed files are opened as usual. Compressed files are
+    decompressed on the fly, by a background thread unless
+    `depth` is 0.
+    """
+    module = compression(path)
+    if module is None:
+        return open(path, 'rt', buffering=bufsize)
+
+    # Deferred import: only load the required compression module
+    raw = importlib.import_module(module).open(path, 'rb')
+    if depth > 0:
+        raw = PipedStream(raw, depth)
+
+    return io.TextIOWrapper(io.BufferedReader(raw, bufsize))
@@ -1,48 +1,41 @@
 import os
 import sys
 import atexit
-import readline
 import traceback
 
-#
-# from https://docs.python.org/3/library/readline.html#example
-#
+from sqlm.compress import open_input
+
+#: Path of the readline history file
 histfile = os.path.join(os.path.expanduser("~"), ".sqlmoins_history")
-try:
-    readline.read_history_file(histfile)
-except FileNotFoundError:
-    pass
-
-atexit.register(readline.write_history_file, histfile)
-
-import locale
-from collections import defaultdict
-#
-# Infer NLS_LANG 
-if 'NLS_LANG' not in os.environ:
-    # According to POSIX, a program which has not called 
-    # setlocale(LC_ALL, '') runs using the portable 'C' 
-    # locale. Calling setlocale(LC_ALL, '') lets it use 
-    # the default locale as defined by the LANG variable.
-    #
-    #See https://docs.python.org/3/library/locale.html#locale.getdefaultlocale
-    locale.setlocale(locale.LC_ALL, '')
-    country, encoding = locale.getdefaultlocale()
-
-    encodings = defaultdict(lambda:'UTF8', {
-        'UTF-8': 'UTF8'
-    })
-
-    countries = defaultdict(lambda:'FRENCH_FRANCE', {
-        'fr_FR':    'FRENCH_FRANCE'
-    })
-
-    os.environ['NLS_LANG'] = "{}.{}".format(
-                                        countries[country.upper()],
-                                        encodings[encoding.upper()])
-    print(os.environ['NLS_LANG'])
+
+_readline = None
+
+def init_readline():
+    """Load the readline module and the line history.
+
+    This is deferred until an interactive console is actually
+    required since non-interactive sessions do not need it.
+    """
+    global _readline
+    if _readline is None:
+        #
+        # from https://docs.python.org/3/library/readline.html#example
+        #
+        import readline
+        try:
+            readline.read_history_file(histfile)
+        except FileNotFoundError:
+            pass
+
+        atexit.register(readline.write_history_file, histfile)
+        _readline = readline
+
+    return _readline
 
 class InputStream:
+    #: True if the lines are typed by a user
+    interactive = False
+
     def readNextLine(self, prompt):
         raise EOFError()
 
@@ -55,6 +48,10 @@ class InputStream:
         """
         return 1
 
+    def close(self):
+        """Release the stream once read (or left by QUIT)
+        """
+
     def reader(self, prompt= '', eof=None):
         """
         Return an iterator that read the current
@@ -72,10 +69,18 @@ class InputStream:
         
 
 class FileInputStream(InputStream):
-    def __init__(self, path):
+    """Input stream reading a script file.
+
+    gzip, bzip2 and xz compressed scripts are decompressed
+    on the fly.
+    """
+    #: Buffer size used when reading files
+    bufsize = 1 << 20
+
+    def __init__(self, path, file=None):
         self._path = path
         self._linenum = 0
-        self._file = open(path, 'rt')
+        self._file = file if file else open_input(path, bufsize=self.bufsize)
 
     def readNextLine(self, prompt):
         line = self._file.readline()
@@ -92,7 +97,15 @@ class FileInputStream(InputStream):
         self._file.close()
         return 1
 
+    def close(self):
+        self._file.close()
+
 class ConsoleInputStream(InputStream):
+    interactive = True
+
+    def __init__(self):
+        init_readline()
+
     def readNextLine(self, prompt):
         try:
             return input(prompt)
@@ -118,7 +131,9 @@ class Console:
 
     def run(self, interpreter):
 
+        env = self.environment
         while self.environment:
+            env = self.environment
             try:
                 self.interact(interpreter)
             except EOFError:
@@ -130,6 +145,10 @@ class Console:
                 while self.environment.input_stream.abort():
                     self.environment = self.environment.pop()
 
+        try:
+            interpreter.close(env)
+        except Exception as err:
+            env.reportError(err)
 
     def pushInputStream(self, input_stream):
         self.environment = self.environment.push()
@@ -149,3 +168,88 @@ class Console:
         except KeyboardInterrupt:
             interpreter.abort()
 
+
+class BatchConsole(Console):
+    """Non-interactive console.
+
+    Commands are read from a file (or stdin) without prompt nor
+    readline. The first error aborts the whole session, as does
+    Ctrl-C (exit status 130).
+    """
+
+    #: Exit status of a session interrupted by Ctrl-C (128 + SIGINT)
+    interrupted_status = 130
+
+    def __init__(self, initial_env, input_stream):
+        self.environment = initial_env
+        self.environment.input_stream = input_stream
+        self.status = 0
+
+    @classmethod
+    def fromStdin(cls, initial_env):
+        stdin = open(sys.stdin.fileno(), 'rt',
+                     buffering=FileInputStream.bufsize, closefd=False)
+        return cls(initial_env, FileInputStream('<stdin>', stdin))
+
+    def run(self, interpreter):
+        """Run the session until the end of the input.
+
+        Returns the exit status: 0 on success, 1 if an error occured,
+        130 if interrupted. The session is ended in any case (see
+        `Interpreter.close`).
+        """
+        env = self.environment
+        try:
+            while self.environment:
+                env = self.environment
+                try:
+                    self.interact(interpreter)
+                except EOFError:
+                    self.environment.input_stream.close()
+                    self.environment = self.environment.pop()
+                except Exception as err:
+                    self.fail(err)
+        except KeyboardInterrupt:
+            self.interrupted()
+        finally:
+            try:
+                interpreter.close(env)
+            except Exception as err:
+                env.reportError(err)
+                self.status = self.status or 1
+
+        return self.status
+
+    def fail(self, err):
+        """Report an error and abort the session.
+
+        Returns the exit status.
+        """
+        self.environment.reportError(err)
+        self.status = 1
+        self.abort()
+
+        return self.status
+
+    def interrupted(self):
+        """Abort the session on Ctrl-C.
+
+        Returns the exit status.
+        """
+        self.status = self.interrupted_status
+        self.abort()
+
+        return self.status
+
+    def abort(self):
+        """Give up all the input streams
+        """
+        while self.environment:
+            self.environment.input_stream.abort()
+            self.environment = self.environment.pop()
+
+    def interact(self, interpreter):
+        env = self.environment
+        readNextLine = env.input_stream.readNextLine
+        while interpreter.push(env, readNextLine('')):
+            pass
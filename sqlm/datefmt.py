@@ -0,0 +1,226 @@
+"""Oracle-like date/timestamp masks.
+
+A mask (i.e.: `YYYY-MM-DD HH24:MI:SS`) is compiled once into a
+parser or into a formatter. Supported elements are:
+
+    YYYY    4-digit year
+    YY      2-digit year (00-49: 20xx, 50-99: 19xx)
+    MM      month (01-12)
+    MON     abbreviated month name (JAN-DEC)
+    DD      day of month (01-31)
+    HH24    hour (00-23)
+    HH      hour (01-12), with AM or PM
+    MI      minutes
+    SS      seconds
+    FF      fractional seconds (1 to 9 digits, microsecond precision)
+    FF1-FF9 fractional seconds with a fixed number of digits
+    AM, PM  meridian indicator
+
+Any other character is taken literally, as is any text
+between double quotes.
+"""
+
+import re
+from functools import lru_cache
+
+_C_ELEMENT = re.compile(r'YYYY|YY|MON|MM|DD|HH24|HH12|HH|MI|SS|FF[1-9]?|AM|PM'
+                        r'|"[^"]*"|.', re.IGNORECASE | re.DOTALL)
+
+MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+          'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+
+#: Regular expression matching each element
+_PATTERNS = {
+    'YYYY': r'(\d{4})',
+    'YY':   r'(\d{2})',
+    'MON':  r'([A-Za-z]{3})',
+    'MM':   r'(\d{1,2})',
+    'DD':   r'(\d{1,2})',
+    'HH24': r'(\d{1,2})',
+    'HH12': r'(\d{1,2})',
+    'HH':   r'(\d{1,2})',
+    'MI':   r'(\d{2})',
+    'SS':   r'(\d{2})',
+    'FF':   r'(\d{1,9})',
+    'AM':   r'([AaPp][Mm])',
+    'PM':   r'([AaPp][Mm])',
+}
+_PATTERNS.update(('FF%d' % n, r'(\d{%d})' % n) for n in range(1, 10))
+
+#: Masks used to display DATE and TIMESTAMP columns by default
+DATE_MASK = 'YYYY-MM-DD HH24:MI:SS'
+TIMESTAMP_MASK = 'YYYY-MM-DD HH24:MI:SS.FF6'
+
+#: Masks whose values are parsed by `fromisoformat`
+_ISO_MASKS = frozenset(('YYYY-MM-DD', 'YYYY-MM-DD HH24:MI:SS',
+                        'YYYY-MM-DD"T"HH24:MI:SS'))
+
+def elements(mask):
+    """Split a mask into its elements.
+
+    Returns a list of (name, text) pairs. `name` is the element name
+    in upper case, or None for literal text.
+    """
+    result = []
+    for m in _C_ELEMENT.finditer(mask):
+        text = m.group(0)
+        if text.startswith('"') and len(text) > 1:
+            result.append((None, text[1:-1]))
+        elif text.upper() in _PATTERNS:
+            result.append((text.upper(), text))
+        else:
+            result.append((None, text))
+
+    return result
+
+def hastime(mask):
+    """Return True if the mask has a time part
+    """
+    return any(name in ('HH24', 'HH12', 'HH', 'MI', 'SS')
+                    or (name or '').startswith('FF')
+                    for name, _ in elements(mask))
+
+def _year(text):
+    year = int(text)
+    if len(text) == 2:
+        year += 2000 if year < 50 else 1900
+
+    return year
+
+def _month(text):
+    return MONTHS.index(text.upper()) + 1
+
+#: Conversion of each element to a (datetime argument, value) pair
+_CONVERTERS = {
+    'YYYY': ('year', _year),
+    'YY':   ('year', _year),
+    'MON':  ('month', _month),
+    'MM':   ('month', int),
+    'DD':   ('day', int),
+    'HH24': ('hour', int),
+    'HH12': ('hour', int),
+    'HH':   ('hour', int),
+    'MI':   ('minute', int),
+    'SS':   ('second', int),
+    'FF':   ('microsecond', lambda text: int(text[:6].ljust(6, '0'))),
+    'AM':   ('meridian', str.upper),
+    'PM':   ('meridian', str.upper),
+}
+_CONVERTERS.update((name, _CONVERTERS['FF'])
+                        for name in _PATTERNS if name.startswith('FF'))
+
+@lru_cache(maxsize=64)
+def parser(mask):
+    """Compile a mask into a function converting a string to
+    a `datetime` (or to a `date` if the mask has no time part).
+
+    The function raises ValueError if its argument does
+    not match the mask.
+    """
+    # Deferred import: datetime is not required to start the program
+    from datetime import date, datetime
+
+    fields = []
+    pattern = []
+    for name, text in elements(mask):
+        if name:
+            pattern.append(_PATTERNS[name])
+            fields.append(_CONVERTERS[name])
+        else:
+            pattern.append(re.escape(text))
+
+    match = re.compile("".join(pattern)).fullmatch
+    build = datetime if hastime(mask) else date
+    iso = build.fromisoformat if mask in _ISO_MASKS else None
+
+    def parse(text):
+        m = match(text)
+        if m is None:
+            raise ValueError("{!r} does not match {}".format(text, mask))
+
+        if iso:
+            try:
+                return iso(text)
+            except ValueError:
+                pass # i.e.: single digit month or day
+
+        args = dict(month=1, day=1)
+        for (name, convert), value in zip(fields, m.groups()):
+            args[name] = convert(value)
+
+        meridian = args.pop('meridian', None)
+        if meridian:
+            args['hour'] = args.get('hour', 12) % 12 + \
+                                (12 if meridian == 'PM' else 0)
+
+        return build(**args)
+
+    return parse
+
+#: Replacement field of each element in the `str.format` template
+#: of a formatter. Field 0 is the datetime, the others are computed
+#: by the formatter when required (see `formatter`).
+_FIELDS = {
+    'YYYY': '{0.year:04d}',
+    'YY':   '{1:02d}',
+    'MON':  '{2}',
+    'MM':   '{0.month:02d}',
+    'DD':   '{0.day:02d}',
+    'HH24': '{0.hour:02d}',
+    'HH12': '{3:02d}',
+    'HH':   '{3:02d}',
+    'MI':   '{0.minute:02d}',
+    'SS':   '{0.second:02d}',
+    'FF':   '{5:.6}',
+    'AM':   '{4}',
+    'PM':   '{4}',
+}
+_FIELDS.update(('FF%d' % n, '{5:.%d}' % n) for n in range(1, 10))
+
+@lru_cache(maxsize=64)
+def formatter(mask):
+    """Compile a mask into a function converting a `date` or a
+    `datetime` to a string.
+
+    The mask is translated once into a `str.format` template, so
+    formatting a value does not involve any parsing. Values that are
+    not dates are converted using `str`.
+    """
+    from datetime import date, datetime
+
+    template = []
+    for name, text in elements(mask):
+        if name:
+            template.append(_FIELDS[name])
+        else:
+            template.append(text.replace('{', '{{').replace('}', '}}'))
+
+    template = "".join(template)
+    if not any(name for name, _ in elements(mask)):
+        raise ValueError("No date element in {!r}".format(mask))
+
+    fmt = template.format
+    simple = re.search(r'\{[1-9]', template) is None
+
+    def format(value):
+        if type(value) is date:
+            value = datetime(value.year, value.month, value.day)
+        elif not isinstance(value, date):
+            return str(value)
+
+        if simple:
+            return fmt(value)
+
+        hour = value.hour
+        return fmt(value, value.year % 100, MONTHS[value.month-1],
+                   hour % 12 or 12, 'AM' if hour < 12 else 'PM',
+                   '%06d000' % value.microsecond)
+
+    return format
+
+def width(mask):
+    """Return the width of the dates formatted using `mask`
+    """
+    from datetime import datetime
+
+    return len(formatter(mask)(datetime(2000, 1, 1)))
@@ -0,0 +1,491 @@
+"""Generic dialect for any PEP-249 (DB-API 2.0) driver.
+
+The capabilities of the driver are detected when connecting:
+
+- its paramstyle: statements are written using `:name` bind
+  variables, translated to the style expected by the driver;
+- whether `executemany` is implemented as array DML (one round-trip)
+  or as a loop over `execute`;
+- whether the cursors `arraysize` might be changed;
+- whether multi-row `VALUES` lists are supported.
+
+Specific dialects subclass GenericDialect, declare the capabilities
+they know about and override the fast paths.
+"""
+
+import importlib
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+import sqlm.resultset
+
+#: Bind names (:name) outside of literals, quoted identifiers
+#: and comments. Percent signs are matched too, as they must be
+#: escaped for the `format` and `pyformat` paramstyles.
+_C_BIND = re.compile(r"""
+      '(?:[^']|'')*'
+    | "[^"]*"
+    | `[^`]*`
+    | \[[^\]]*\]
+    | --[^\n]*
+    | /\*.*?\*/
+    | (?<!:):([A-Za-z_]\w*)
+    | %
+""", re.VERBOSE | re.DOTALL)
+
+#: Types whose values are sent as numbers
+_NUMBER_TYPES = ('NUMBER', 'INTEGER', 'INT', 'REAL', 'FLOAT', 'DOUBLE',
+                 'NUMERIC', 'DECIMAL')
+
+#: Drivers whose `executemany` sends all the rows at once (array DML
+#: or batched protocol) instead of looping over `execute`
+_FAST_EXECUTEMANY = ('cx_Oracle', 'oracledb', 'sqlite3', 'psycopg',
+                     'pymysql', 'MySQLdb', 'mysql.connector')
+
+#: Query used to check if multi-row VALUES lists are supported
+_MULTIROW_PROBE = "SELECT * FROM (VALUES (1), (2)) v"
+
+def bindnames(stmt):
+    """Return the bind names of a statement (upper case, in order
+    of first appearance) and a dictionary mapping each of them to
+    the actual spelling(s) used in the statement.
+    """
+    names = {}
+    for m in _C_BIND.finditer(stmt):
+        name = m.group(1)
+        if name:
+            spellings = names.setdefault(name.upper(), [])
+            if name not in spellings:
+                spellings.append(name)
+
+    return list(names), names
+
+def translate(stmt, paramstyle):
+    """Rewrite the `:name` bind variables of a statement using
+    the given paramstyle.
+
+    Returns the new statement and the names of the parameters
+    in order for the positional styles (None for the named styles).
+    """
+    if paramstyle == 'named':
+        return stmt, None
+
+    escape = paramstyle in ('format', 'pyformat')
+    positions = [] if paramstyle != 'pyformat' else None
+    numbers = {}
+
+    def replace(m):
+        name = m.group(1)
+        if not name:
+            text = m.group(0)
+            return text.replace('%', '%%') if escape else text
+
+        if paramstyle == 'pyformat':
+            return '%({})s'.format(name)
+
+        if paramstyle == 'numeric':
+            if name not in numbers:
+                positions.append(name)
+                numbers[name] = len(positions)
+            return ':{}'.format(numbers[name])
+
+        positions.append(name)
+        return '?' if paramstyle == 'qmark' else '%s'
+
+    return _C_BIND.sub(replace, stmt), positions
+
+def placeholders(paramstyle, count):
+    """Return `count` positional placeholders for the given paramstyle
+    """
+    if paramstyle == 'qmark':
+        return ['?'] * count
+    if paramstyle == 'numeric':
+        return [':{}'.format(i+1) for i in range(count)]
+    if paramstyle == 'named':
+        return [':p{}'.format(i+1) for i in range(count)]
+    if paramstyle == 'pyformat':
+        return ['%(p{})s'.format(i+1) for i in range(count)]
+
+    return ['%s'] * count
+
+def _number(value):
+    """Convert a number given as a string to int or float
+    """
+    if type(value) in (str, Decimal):
+        value = Decimal(value)
+        return int(value) if value == value.to_integral_value() \
+                          else float(value)
+
+    return value
+
+def quote(name):
+    """Quote an identifier
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+class Statement:
+    """A statement using `:name` bind variables.
+
+    Values are bound by name and sent to the driver using its
+    paramstyle.
+    """
+
+    def __init__(self, dialect, connection, stmt):
+        cursor = connection.cursor()
+
+        self.bindnames, self._spellings = bindnames(stmt)
+        self.bindparams = {}
+        self.last = None # the last result
+
+        self.dialect = dialect
+        self.connection = connection
+        self.cursor = cursor
+        self.stmt = stmt
+
+        self._sql, self._positions = stmt, None
+        if self.bindnames:
+            self._sql, self._positions = translate(stmt, dialect.paramstyle)
+
+    def __getitem__(self, bindname):
+        # Generic drivers have no OUT parameter: this is the value sent
+        return self.bindparams[bindname.upper()]
+
+    def bind(self, bindname, sqltype, value=None, direction='INOUT'):
+        """Bind a value of the given type with the current statement.
+        """
+        if direction == 'OUT':
+            value = None
+        elif value is not None and sqltype.upper() in _NUMBER_TYPES:
+            value = _number(value)
+
+        self.bindparams[bindname.upper()] = value
+
+    def params(self):
+        """Return the bind values in the form expected by the driver:
+        a dictionary using the spelling of the statement for the named
+        styles or a list for the positional ones.
+        """
+        if self._positions is not None:
+            return [self.bindparams.get(name.upper())
+                        for name in self._positions]
+
+        return {spelling: self.bindparams.get(name)
+                    for name, spellings in self._spellings.items()
+                        for spelling in spellings}
+
+    def result(self):
+        self.last = sqlm.resultset.ResultSet(
+                    self.cursor,
+                    cancel=lambda: self.dialect.cancel(self.connection),
+                    close=self.release)
+
+        return self.last
+
+    def busy(self):
+        """Return True if the rows of the last result are still
+        being fetched
+        """
+        return self.last is not None and not self.last.done
+
+    def release(self):
+        """Close the cursor. A new one is opened if the statement
+        is executed again.
+        """
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+
+    def execute(self, **bindparams):
+        for var, value in bindparams.items():
+            self.bindparams[var.upper()] = value
+
+        if self.cursor is None:
+            self.cursor = self.connection.cursor()
+
+        if self.bindnames:
+            self.cursor.execute(self._sql, self.params())
+        else:
+            self.cursor.execute(self._sql)
+
+        return self.result()
+
+    def executemany(self, rows):
+        """Execute the statement for each row of bind values.
+
+        Rows are sequences of values given in the order of the
+        bind names.
+        """
+        if self._positions is not None:
+            index = {name: i for i, name in enumerate(self.bindnames)}
+            order = [index[name.upper()] for name in self._positions]
+            rows = ([row[i] for i in order] for row in rows)
+        elif self.bindnames:
+            rows = ({spelling: row[i]
+                        for i, name in enumerate(self.bindnames)
+                            for spelling in self._spellings[name]}
+                                for row in rows)
+
+        if self.cursor is None:
+            self.cursor = self.connection.cursor()
+
+        self.cursor.executemany(self._sql, rows)
+
+        return self.result()
+
+class GenericDialect:
+    """Abstraction layer arround a PEP-249 driver.
+
+    Capabilities left to None are detected by `detect` once connected.
+    """
+
+    #: Name of the driver module
+    driver = None
+
+    #: Capabilities of the driver
+    paramstyle = None
+    fast_executemany = None
+    arraysize = None        # default cursor arraysize (0 if fixed)
+    multirow_values = None
+
+    #: Maximum number of rows in one multi-row `INSERT`
+    multirow_size = 100
+
+    #: Maximum number of rows sent by one call to `executemany`
+    executemany_size = 1000
+
+    #: Numeric expression locating a row in its table, used to split
+    #: a table into slices (None if there is none)
+    rowid_key = None
+
+    Statement = Statement
+
+    def __init__(self):
+        self.module = importlib.import_module(self.driver)
+
+    @classmethod
+    def for_driver(cls, driver):
+        """Return a dialect class for the given driver module name
+        """
+        return type('GenericDialect({})'.format(driver), (cls,),
+                    dict(driver=driver))
+
+    def detect(self, connection):
+        """Detect the capabilities of the driver that are not
+        already known.
+        """
+        if self.paramstyle is None:
+            self.paramstyle = getattr(self.module, 'paramstyle', 'qmark')
+
+        if self.fast_executemany is None:
+            self.fast_executemany = self.driver in _FAST_EXECUTEMANY
+
+        if self.arraysize is None:
+            cursor = connection.cursor()
+            try:
+                self.arraysize = cursor.arraysize
+                cursor.arraysize = self.arraysize
+            except Exception:
+                self.arraysize = 0
+            finally:
+                cursor.close()
+
+        if self.multirow_values is None:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(_MULTIROW_PROBE)
+                cursor.fetchall()
+                self.multirow_values = True
+            except Exception:
+                # Some servers abort the transaction on error
+                connection.rollback()
+                self.multirow_values = False
+            finally:
+                cursor.close()
+
+    def capabilities(self):
+        return dict(paramstyle=self.paramstyle,
+                    fast_executemany=self.fast_executemany,
+                    arraysize=self.arraysize,
+                    multirow_values=self.multirow_values)
+
+    # ------------------------------------------------------------------
+    # Cursor-related abstraction layer
+    # ------------------------------------------------------------------
+    def prepare(self, connection, stmt):
+        """Prepare a statement.
+
+        Returns a Statement instance suitable
+        to execute the statement.
+        """
+        return self.Statement(self, connection, stmt)
+
+    def connect(self, username=None, password=None, db=None, **kwargs):
+        if username is None and password is None:
+            return self.module.connect(db)
+
+        return self.module.connect(db, user=username, password=password)
+
+    def shareable(self, db=None, **kwargs):
+        """Return True if other connections opened with the same
+        parameters see the same database
+        """
+        return True
+
+    def cancel(self, connection):
+        """Cancel the operation in progress on the connection
+        (if supported by the driver)
+        """
+        cancel = getattr(connection, 'cancel', None) \
+                    or getattr(connection, 'interrupt', None)
+        if cancel:
+            cancel()
+
+    def explain(self, connection, statement):
+        """Return the execution plan of a prepared statement as a list
+        of lines, or None if the server has no way to report it.
+
+        The statement itself is not executed.
+        """
+        return None
+
+    def sessionStats(self, connection):
+        """Return the cumulative statistics of the session on the
+        server (name -> value). Per-statement statistics are the
+        difference between two snapshots.
+        """
+        return {}
+
+    def bulkInsert(self, connection, tbl, columns, rows, commit=True):
+        """Insert rows into a table using the fastest path
+        supported by the driver.
+
+        `columns` are the names of the columns. If `commit` is True,
+        the transaction is committed once the rows are inserted.
+        Returns the number of rows inserted.
+        """
+        rows = iter(rows)
+        cursor = connection.cursor()
+        count = 0
+        try:
+            if self.multirow_values and not self.fast_executemany:
+                for chunk in self._chunks(rows, self.multirow_size):
+                    cursor.execute(*self._multirowInsert(tbl, columns,
+                                                         chunk))
+                    count += len(chunk)
+            else:
+                stmt = self._insert(tbl, columns, 1)
+                if self.paramstyle in ('named', 'pyformat'):
+                    keys = ['p{}'.format(i+1) for i in range(len(columns))]
+                    rows = (dict(zip(keys, row)) for row in rows)
+                for chunk in self._chunks(rows, self.executemany_size):
+                    cursor.executemany(stmt, chunk)
+                    count += len(chunk)
+
+            if commit:
+                connection.commit()
+        finally:
+            cursor.close()
+
+        return count
+
+    def _chunks(self, rows, size):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def _insert(self, tbl, columns, nrows, paramstyle=None):
+        """Return an `INSERT` statement with placeholders for `nrows`
+        rows
+        """
+        width = len(columns)
+        marks = placeholders(paramstyle or self.paramstyle, width*nrows)
+        values = ", ".join("({})".format(", ".join(marks[i:i+width]))
+                                for i in range(0, len(marks), width))
+
+        return "INSERT INTO {} ({}) VALUES {}".format(
+                    quote(tbl),
+                    ", ".join(quote(name) for name in columns),
+                    values)
+
+    def _multirowInsert(self, tbl, columns, rows):
+        stmt = self._insert(tbl, columns, len(rows))
+        values = [value for row in rows for value in row]
+        if self.paramstyle in ('named', 'pyformat'):
+            values = {'p{}'.format(i+1): value
+                          for i, value in enumerate(values)}
+
+        return stmt, values
+
+    # ------------------------------------------------------------------
+    # Statements builder functions
+    # ------------------------------------------------------------------
+
+    def typeName(self, typ):
+        """Return the name of the SQL type used for a column type
+        guessed by the Reader
+        """
+        return typ
+
+    def makeCreateTable(self, tbl, columns, rows):
+        """Generate a `CREATE TABLE` statement"""
+
+        lines = []
+        lines.append('CREATE TABLE "{}" ('.format(tbl))
+
+        m = []
+        for name, typ, prec, scale in columns:
+            typ = self.typeName(typ)
+
+            if scale:
+                prec = '({},{})'.format(prec,scale)
+            elif prec:
+                prec = '({})'.format(prec)
+            else:
+                prec=''
+
+            m.append('    "{}" {}{}'.format(name, typ, prec))
+
+        lines.append(",\n".join(m))
+        lines.append(")")
+
+        return "\n".join(lines)
+
+    def literal(self, value):
+        """Return the SQL literal for a value (as returned by
+        `Reader.convert`)
+        """
+        if value is None:
+            return 'NULL'
+        if isinstance(value, (int, float, Decimal)):
+            return str(value)
+        if isinstance(value, datetime):
+            value = value.isoformat(' ')
+        elif isinstance(value, date):
+            value = value.isoformat()
+
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def makeInserts(self, tbl, columns, rows):
+        """Generate a multi-rows `INSERT` statement.
+
+        `rows` hold native values (see `Reader.convert`)
+        """
+
+        lines = []
+        lines.append('INSERT INTO "{}" ({}) VALUES'.format(
+                tbl,
+                ", ".join(['"'+name+'"' for name, *_ in columns])
+            ))
+
+        lines.append(",\n".join(
+                '    ({})'.format(", ".join(self.literal(val) for val in row))
+                        for row in rows))
+
+        return "\n".join(lines)
@@ -1,6 +1,45 @@
+import os
+import itertools
+import locale
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
 import cx_Oracle
 
 import sqlm.resultset
+from sqlm.dialects.generic import GenericDialect, placeholders, quote
+
+def init_nls_lang():
+    """Infer NLS_LANG from the current locale if not already set.
+
+    NLS_LANG is read by the Oracle client when the first connection
+    is established. So this is only required before connecting.
+    """
+    if 'NLS_LANG' in os.environ:
+        return
+
+    # According to POSIX, a program which has not called 
+    # setlocale(LC_ALL, '') runs using the portable 'C' 
+    # locale. Calling setlocale(LC_ALL, '') lets it use 
+    # the default locale as defined by the LANG variable.
+    #
+    #See https://docs.python.org/3/library/locale.html#locale.getdefaultlocale
+    locale.setlocale(locale.LC_ALL, '')
+    country, encoding = locale.getdefaultlocale()
+
+    encodings = defaultdict(lambda:'UTF8', {
+        'UTF-8': 'UTF8'
+    })
+
+    countries = defaultdict(lambda:'FRENCH_FRANCE', {
+        'fr_FR':    'FRENCH_FRANCE'
+    })
+
+    os.environ['NLS_LANG'] = "{}.{}".format(
+                                        countries[country.upper()],
+                                        encodings[encoding.upper()])
+    print(os.environ['NLS_LANG'])
 
 _TYPES = {
     'BINARY' : cx_Oracle.BINARY,
@@ -27,95 +66,250 @@ _TYPES = {
 #    'NVARCHAR2' : cx_Oracle.UNICODE,
 }
 
+#: Types of the columns returned as LOB locators
+_LOB_TYPES = (cx_Oracle.CLOB, cx_Oracle.NCLOB, cx_Oracle.BLOB, cx_Oracle.BFILE)
+
+#: Statement id of the plans computed by EXPLAIN PLAN
+_PLAN_ID = 'SQLM_AUTOTRACE'
+
+#: Session statistics reported by AUTOTRACE
+_SESSION_STATS = ('recursive calls', 'db block gets', 'consistent gets',
+                  'physical reads', 'redo size',
+                  'bytes sent via SQL*Net to client',
+                  'bytes received via SQL*Net from client',
+                  'SQL*Net roundtrips to/from client',
+                  'sorts (memory)', 'sorts (disk)')
+
+_SESSION_STATS_QUERY = """
+    SELECT n.name, s.value
+    FROM v$mystat s JOIN v$statname n ON n.statistic# = s.statistic#
+    WHERE n.name IN ({})
+""".format(", ".join("'{}'".format(name) for name in _SESSION_STATS))
+
 class Statement:
-    def __init__(self, connection, stmt):
-        cursor = connection.cursor()
-        cursor.prepare(stmt)
+    def __init__(self, dialect, connection, stmt):
+        self.connection = connection
+        self.stmt = stmt
+        self.last = None # the last result
 
-        self.bindnames = cursor.bindnames()
-        self.bindparams = {}
+        self.open()
+        self.bindnames = self.cursor.bindnames()
 
+    def open(self):
+        cursor = self.connection.cursor()
+        cursor.prepare(self.stmt)
+
+        self.bindparams = {}
+        self.bindtypes = {} # bindname -> (type declaration, variable)
         self.cursor = cursor
-        self.stmt = stmt
+
+    def release(self):
+        """Close the cursor. A new one is opened (and the statement
+        prepared again) if the statement is used again.
+        """
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+
+    def result(self):
+        description = self.cursor.description or ()
+        lobs = [i for i, desc in enumerate(description)
+                        if desc[1] in _LOB_TYPES]
+
+        self.last = sqlm.resultset.ResultSet(self.cursor,
+                                             cancel=self.connection.cancel,
+                                             close=self.release,
+                                             lobs=lobs)
+
+        return self.last
+
+    def busy(self):
+        """Return True if the rows of the last result are still
+        being fetched
+        """
+        return self.last is not None and not self.last.done
 
     def __getitem__(self, bindname):
         return self.bindparams[bindname.upper()].getvalue()
 
-    def bind(self, bindname, sqltype, value=None):
+    def bind(self, bindname, sqltype, value=None, direction='INOUT'):
         """Bind a variable of the given type with the
         current statement.
 
         Variables objects values can be queried to retrieve
         OUT param values.
+
+        Variables are typed buffers kept with the statement, so they
+        are reused when the statement is executed again with the same
+        declaration.
+
+        The value of OUT variables is not sent to the server.
         """
-        datatype = _TYPES[sqltype.upper()]
-        var = self.cursor.var(datatype)
+        if self.cursor is None:
+            self.open()
+
+        bindname = bindname.upper()
+        sqltype = sqltype.upper()
+
+        typ, var = self.bindtypes.get(bindname, (None, None))
+        if typ != sqltype:
+            var = self.cursor.var(_TYPES[sqltype])
+            self.bindtypes[bindname] = (sqltype, var)
 
-        if value is not None:
+        if direction == 'OUT':
+            value = None
+        elif type(value) is str and sqltype == 'NUMBER':
+            value = Decimal(value)
+
+        if value is not None or typ == sqltype:
+            # Reset reused buffers
             var.setvalue(0,value)
 
-        self.bindparams[bindname.upper()] = var
+        self.bindparams[bindname] = var
 
     def execute(self, **bindparams):
+        if self.cursor is None:
+            self.open()
+
         for var, value in bindparams.items():
             self.bindparams[var.upper()] = value
 
         self.cursor.execute(self.stmt, self.bindparams)
 
-        return sqlm.resultset.ResultSet(self.cursor)
+        return self.result()
 
-class OracleDialect:
+    def executemany(self, rows):
+        """Execute the statement for each row of bind values
+        (array DML)
+        """
+        if self.cursor is None:
+            self.open()
+
+        self.cursor.executemany(None, rows)
+
+        return self.result()
+
+class OracleDialect(GenericDialect):
     """Abstraction layer arround the Oracle driver.
     """
 
     driver = "cx_Oracle"
 
-    # ------------------------------------------------------------------
-    # Cursor-related abstraction layer
-    # ------------------------------------------------------------------
-    def prepare(self, connection, stmt):
-        """Prepare a statement.
+    paramstyle = "named"
+    fast_executemany = True
+    multirow_values = False
 
-        Returns a Statement instance suitable
-        to execute the statement.
-        """
-        return Statement(connection, stmt)
+    #: Rows per array insert. Loads of at most that many rows are
+    #: direct-path inserts, loaded above the high water mark of the
+    #: table, so large arrays are preferred.
+    executemany_size = 10000
+
+    # Rows are located by the number of their block
+    rowid_key = "DBMS_ROWID.ROWID_BLOCK_NUMBER(ROWID)"
+
+    Statement = Statement
 
     def connect(self, username=None, password=None, db=None, **kwargs):
+        init_nls_lang()
         return cx_Oracle.connect(username,password,db)
-    
+
+    def explain(self, connection, statement):
+        """Return the execution plan as formatted by `DBMS_XPLAN`.
+
+        The plan is stored in the PLAN_TABLE of the current user.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute("EXPLAIN PLAN SET STATEMENT_ID = '{}' FOR {}".format(
+                                        _PLAN_ID, statement.stmt))
+            cursor.execute("SELECT plan_table_output "
+                           "FROM TABLE(DBMS_XPLAN.DISPLAY(NULL, :id))",
+                           id=_PLAN_ID)
+            lines = [line or '' for line, in cursor]
+            cursor.execute("DELETE FROM plan_table WHERE statement_id = :id",
+                           id=_PLAN_ID)
+        finally:
+            cursor.close()
+
+        return lines
+
+    def sessionStats(self, connection):
+        """Return the statistics of the session from V$MYSTAT.
+
+        Returns an empty dictionary if the user is not allowed
+        to query the dynamic performance views.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(_SESSION_STATS_QUERY)
+            return dict(cursor.fetchall())
+        except cx_Oracle.DatabaseError:
+            return {}
+        finally:
+            cursor.close()
+
+    def bulkInsert(self, connection, tbl, columns, rows, commit=True):
+        """Insert rows using array inserts.
+
+        If `commit` is True, the rows are committed once at the end
+        (or rolled back on error). If they also fit in one array, they
+        are loaded by a direct-path insert (`APPEND_VALUES` hint).
+        A table modified by a direct-path insert cannot be accessed
+        again by the session before the transaction ends, so larger
+        loads use conventional array inserts.
+        """
+        rows = iter(rows)
+        first = list(itertools.islice(rows, self.executemany_size + 1))
+        direct = commit and len(first) <= self.executemany_size
+
+        stmt = 'INSERT {}INTO {} ({}) VALUES ({})'.format(
+                    '/*+ APPEND_VALUES */ ' if direct else '',
+                    quote(tbl),
+                    ", ".join(quote(name) for name in columns),
+                    ", ".join(placeholders('numeric', len(columns))))
+
+        cursor = connection.cursor()
+        count = 0
+        try:
+            for chunk in self._chunks(itertools.chain(first, rows),
+                                      self.executemany_size):
+                cursor.executemany(stmt, chunk)
+                count += len(chunk)
+
+            if commit:
+                connection.commit()
+        except BaseException:
+            if commit:
+                connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        return count
 
     # ------------------------------------------------------------------
     # Statements builder functions
     # ------------------------------------------------------------------
 
-    def makeCreateTable(self, tbl, columns, rows):
-        """Generate a `CREATE TABLE` statement"""
+    def typeName(self, typ):
+        if typ == 'VARCHAR':
+            return 'VARCHAR2'
 
-        lines = []
-        lines.append('CREATE TABLE "{}" ('.format(tbl))
-
-        m = []
-        for name, typ, prec, scale in columns:
-            if typ == 'VARCHAR':
-                typ = 'VARCHAR2'
+        return typ
 
-            if scale:
-                prec = '({},{})'.format(prec,scale)
-            elif prec:
-                prec = '({})'.format(prec)
-            else:
-                prec=''
+    def literal(self, value):
+        if isinstance(value, datetime):
+            return "TIMESTAMP '{}'".format(value.isoformat(' '))
+        if isinstance(value, date):
+            return "DATE '{}'".format(value.isoformat())
 
-            m.append('    "{}" {}{}'.format(name, typ, prec))
-        
-        lines.append(",\n".join(m))
-        lines.append(")")
-
-        return "\n".join(lines)
+        return super().literal(value)
 
     def makeInserts(self, tbl, columns, rows):
-        """Generate a multi-rows `INSERT` statement"""
+        """Generate a multi-rows `INSERT` statement.
+
+        `rows` hold native values (see `Reader.convert`)
+        """
 
         lines = []
         lines.append("INSERT ALL")
@@ -125,20 +319,11 @@ class OracleDialect:
                 ", ".join(['"'+name+'"' for name, *_ in columns])
             )
 
-        fmt = '          VALUES ({})'.format(
-                ", ".join(["{}" if t in ('NUMBER') else "'{}'" 
-                                for n, t, *_ in columns])
-            )
-
-        print(stmt)
-        print(fmt)
-
         for row in rows:
             lines.append(stmt)
-            lines.append(fmt.format(*row))
-            
+            lines.append('          VALUES ({})'.format(
+                    ", ".join(self.literal(val) for val in row)))
 
         lines.append("SELECT * FROM DUAL")
 
         return "\n".join(lines)
-        
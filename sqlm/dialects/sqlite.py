@@ -1,102 +1,161 @@
-import sqlite3
-
-import sqlm.resultset
-
-class Statement:
-    def __init__(self, connection, stmt):
-        cursor = connection.cursor()
-
-        self.bindnames = []
-        self.bindparams = {}
 
-        self.cursor = cursor
-        self.stmt = stmt
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+import sqlm.dialects.generic
+from sqlm.dialects.generic import GenericDialect
+
+def _decimal(value):
+    if value.is_finite() and value == value.to_integral_value():
+        return int(value)
+
+    return float(value)
+
+#: Conversion of the values sqlite3 can't store by itself. Decimal
+#: values (i.e.: numbers read by the Reader) are stored as numbers,
+#: dates as ISO 8601 strings (the default adapters are deprecated
+#: since Python 3.12). The conversion is done by the dialect rather
+#: than by `sqlite3.register_adapter`, which would apply to every
+#: user of the sqlite3 module in the process.
+_ADAPTERS = {
+    Decimal:    _decimal,
+    date:       date.isoformat,
+    datetime:   lambda value: value.isoformat(' '),
+}
+
+def adapt(values):
+    """Return the list of `values` converted to types sqlite3 can store
+    """
+    values = list(values)
+    if _ADAPTERS.keys().isdisjoint(map(type, values)):
+        return values
 
-    def __getitem__(self, bindname):
-        # let it fail as this is *not* supported on SQLite
-        return self.cursor.bindparams[bindname.upper()].getvalue()
+    return [_ADAPTERS[type(value)](value) if type(value) in _ADAPTERS
+                                          else value
+                for value in values]
 
-    def execute(self, **bindparams):
-        for var, value in bindparams.items():
-            self.bindparams[var.upper()] = value
+class Statement(sqlm.dialects.generic.Statement):
+    def params(self):
+        params = super().params()
 
-        self.cursor.execute(self.stmt, self.bindparams)
+        return dict(zip(params, adapt(params.values())))
 
-        return sqlm.resultset.ResultSet(self.cursor)
+#: Settings used while loading data, when the load is the only
+#: statement of its transaction
+_LOAD_PRAGMAS = (
+    ("synchronous", "OFF"),
+    ("journal_mode", "MEMORY"),
+)
 
-class SQLiteDialect:
+class SQLiteDialect(GenericDialect):
     """Abstraction layer arround the SQLite3 driver.
     """
 
     driver = "sqlite3"
 
-    # ------------------------------------------------------------------
-    # Cursor-related abstraction layer
-    # ------------------------------------------------------------------
-    def prepare(self, connection, stmt):
-        """Prepare a statement.
-
-        Returns a Statement instance suitable
-        to execute the statement.
-        """
-        return Statement(connection, stmt)
-
-    def connect(self, db=None, **kwargs):
-        return sqlite3.connect(db)
-
-    
+    # sqlite3 reports the qmark paramstyle but supports named
+    # parameters too: statements are sent untranslated.
+    paramstyle = "named"
+    fast_executemany = True
+    multirow_values = True
 
-    # ------------------------------------------------------------------
-    # Statements builder functions
-    # ------------------------------------------------------------------
+    # Larger statements are slower to compile than to execute
+    multirow_size = 200
 
-    def makeCreateTable(self, tbl, columns, rows):
-        """Generate a `CREATE TABLE` statement"""
+    rowid_key = "rowid"
 
-        lines = []
-        lines.append('CREATE TABLE "{}" ('.format(tbl))
+    Statement = Statement
 
-        m = []
-        for name, typ, prec, scale in columns:
-            if scale:
-                prec = '({},{})'.format(prec,scale)
-            elif prec:
-                prec = '({})'.format(prec)
-            else:
-                prec=''
+    #: Size of the per-connection cache of compiled statements
+    cached_statements = 256
 
-            m.append('    "{}" {}{}'.format(name, typ, prec))
-        
-        lines.append(",\n".join(m))
-        lines.append(")")
-
-        return "\n".join(lines)
-
-    def makeInserts(self, tbl, columns, rows):
-        """Generate a multi-rows `INSERT` statement"""
-
-        lines = []
-        lines.append("INSERT ALL")
-
-        stmt = '    INTO "{}" ({})'.format(
-                tbl,
-                ", ".join(['"'+name+'"' for name, *_ in columns])
-            )
-
-        fmt = '          VALUES ({})'.format(
-                ", ".join(["{}" if t in ('NUMBER') else "'{}'" 
-                                for n, t, *_ in columns])
-            )
+    def connect(self, db=None, **kwargs):
+        # Rows might be fetched from a background thread
+        return sqlite3.connect(db, check_same_thread=False,
+                               cached_statements=self.cached_statements)
 
-        print(stmt)
-        print(fmt)
+    def shareable(self, db=None, **kwargs):
+        """In-memory and temporary databases are private to their
+        connection
+        """
+        return db not in (None, '', ':memory:')
 
-        for row in rows:
-            lines.append(stmt)
-            lines.append(fmt.format(*row))
-            
+    def cancel(self, connection):
+        """Interrupt the query in progress on the connection
+        """
+        connection.interrupt()
 
-        lines.append("SELECT * FROM DUAL")
+    def explain(self, connection, statement):
+        """Return the output of `EXPLAIN QUERY PLAN` as an indented tree
+        """
+        params = statement.params() if statement.bindnames else ()
+        cursor = connection.execute("EXPLAIN QUERY PLAN " + statement.stmt,
+                                    params)
+        try:
+            depth = {0: 0}
+            lines = []
+            for id, parent, _, detail in cursor:
+                depth[id] = depth.get(parent, 0) + 1
+                lines.append("  "*depth[id] + detail)
+        finally:
+            cursor.close()
+
+        return lines
+
+    def sessionStats(self, connection):
+        return {'changes': connection.total_changes}
+
+    def maxVariables(self, connection):
+        """Return the maximum number of host parameters in a statement
+        """
+        try:
+            return connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:
+            # Python < 3.11
+            return 999 if sqlite3.sqlite_version_info < (3, 32) else 32766
+
+    def bulkInsert(self, connection, tbl, columns, rows, commit=True):
+        """Insert rows using multi-row `INSERT` statements sized to the
+        host parameter limit.
+
+        If `commit` is True and no transaction is in progress, the load
+        runs in its own transaction with the journal kept in memory and
+        without syncing to disk.
+        """
+        size = max(1, min(self.multirow_size,
+                          self.maxVariables(connection) // len(columns)))
+        owner = commit and not connection.in_transaction
+
+        saved = []
+        if owner:
+            for pragma, value in _LOAD_PRAGMAS:
+                current, = connection.execute("PRAGMA " + pragma).fetchone()
+                if current != "wal":
+                    saved.append((pragma, current))
+                    connection.execute("PRAGMA {}={}".format(pragma, value))
 
-        return "\n".join(lines)
-        
+        cursor = connection.cursor()
+        count = 0
+        try:
+            stmt = self._insert(tbl, columns, size, 'qmark')
+            for chunk in self._chunks(rows, size):
+                if len(chunk) != size:
+                    stmt = self._insert(tbl, columns, len(chunk), 'qmark')
+
+                cursor.execute(stmt, adapt(value for row in chunk
+                                                 for value in row))
+                count += len(chunk)
+
+            if commit:
+                connection.commit()
+        except BaseException:
+            if owner:
+                connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            for pragma, value in saved:
+                connection.execute("PRAGMA {}={}".format(pragma, value))
+
+        return count
@@ -1,9 +1,10 @@
-from sqlm.dialects.oracle import OracleDialect
-from sqlm.dialects.sqlite import SQLiteDialect
-
+import importlib
 import re
+from collections import OrderedDict
+
+import sqlm.cache
 
-_C_URL = re.compile(r"""(\w+)://([^:/]+)?(?:(:.*))?/(.*)""")
+_C_URL = re.compile(r"""([\w.]+)://([^:/]+)?(?:(:.*?))?/(.*)""")
 
 def parse_url(url):
     m = _C_URL.fullmatch(url)
@@ -18,24 +19,107 @@ def parse_url(url):
                 db=db,
     )
 
+#: Known dialects. Dialect modules (and their drivers) are imported
+#: on first use only.
 _DIALECTS = {
-    'oracle': OracleDialect,
-    'sqlite': SQLiteDialect,
+    'oracle': 'sqlm.dialects.oracle.OracleDialect',
+    'sqlite': 'sqlm.dialects.sqlite.SQLiteDialect',
 }
 
+def get_dialect(name):
+    """Return the dialect class registered under `name`.
+
+    The dialect module is imported the first time it is required.
+    Any other name is assumed to be the name of a PEP-249 driver
+    module, used through the generic dialect.
+    """
+    dialect = _DIALECTS.get(name)
+    if dialect is None:
+        from sqlm.dialects.generic import GenericDialect
+        dialect = _DIALECTS[name] = GenericDialect.for_driver(name)
+    elif type(dialect) == str:
+        module, _, cls = dialect.rpartition('.')
+        dialect = _DIALECTS[name] = getattr(importlib.import_module(module),
+                                            cls)
+
+    return dialect
+
 class Engine:
     """Simple SQL engine.
 
     Wrapper arround the dialect object
+
+    Prepared statements are cached (LRU) by SQL text, so executing
+    the same statement again reuses its cursor and bind buffers.
+    A cached statement is not reused while the rows of its last
+    result are still being fetched.
     """
 
+    #: Maximum number of statements kept in the cache (0 disables it)
+    stmtcachesize = 20
+
     def __init__(self, params):
         if type(params) == str:
-            params = parse_url(url)
+            params = parse_url(params)
 
-        self.dialect = _DIALECTS[params['dialect']]()
+        # Kept to open other connections to the same database
+        self.params = params
+        self.dialect = get_dialect(params['dialect'])()
         self.conn = self.dialect.connect(**params)
-
+        self.dialect.detect(self.conn)
+        self._statements = OrderedDict()
 
     def prepare(self, stmt):
-        return self.dialect.prepare(self.conn, stmt)
+        statement = self._statements.get(stmt)
+        if statement is not None:
+            if statement.busy():
+                # Executing it again would discard the pending rows
+                return self.dialect.prepare(self.conn, stmt)
+
+            self._statements.move_to_end(stmt)
+            return statement
+
+        statement = self.dialect.prepare(self.conn, stmt)
+        if self.stmtcachesize > 0:
+            self._statements[stmt] = statement
+            while len(self._statements) > self.stmtcachesize:
+                self._statements.popitem(last=False)
+
+        return statement
+
+    @property
+    def database(self):
+        """Identity of the database: engines with the same identity see
+        the same data. Used to key (and invalidate) the result cache.
+        """
+        if self.dialect.shareable(**self.params):
+            return (self.params['dialect'], self.params.get('db'))
+
+        # Private to this connection
+        return id(self)
+
+    def checkQuery(self, stmt):
+        """Raise ValueError if `stmt` is not a query.
+
+        To be called before running a statement whose rows are
+        required: anything else would be executed before failing.
+        """
+        if not sqlm.cache.isquery(stmt):
+            raise ValueError("Not a query: " + stmt)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self._statements.clear()
+        self.conn.close()
+
+    def cancel(self):
+        """Cancel the statement in progress (if any).
+
+        Might be called from any thread.
+        """
+        self.dialect.cancel(self.conn)
@@ -0,0 +1,337 @@
+"""Export of query results to tab-separated files.
+
+A query might be split into several slices, each of them run on its
+own connection by a worker thread:
+
+- PARTITION BY column: the range of the column, from its MIN to its
+  MAX, is split into equal key ranges. The column must hold numbers
+  or dates. Rows with a NULL key belong to the last slice;
+- PARTITION BY ROWID: the table is split by physical location (see
+  `GenericDialect.rowid_key`). The query must be of the form
+  `SELECT ... FROM tbl [alias] [WHERE condition]`.
+
+Each slice is written to its own file, or the slices are written in
+order into one file: each worker runs its query, then waits for the
+previous slices to be written before writing its rows. If the database
+can't be shared between connections (i.e.: SQLite in-memory databases),
+the slices are run one after the other on the session's connection.
+
+Values are written as text (NULL for null values, ISO 8601 for dates,
+hexadecimal for binary LOBs), in a format suitable for READ and LOAD.
+LOBs are streamed chunk by chunk. Tabs and newlines inside the values
+are not escaped.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlm.engine import Engine
+from sqlm.resultset import Lob
+from sqlm.stats import Stats
+
+#: Queries that might be partitioned by ROWID
+_C_TABLE_QUERY = re.compile(r"""
+    \s*SELECT\s+(?P<columns>.*?)
+    \s+FROM\s+(?P<table>[\w.$#"]+(?:\s+(?!WHERE\b)\w+)?)
+    (?:\s+WHERE\s+(?P<where>.*?))?
+    \s*;?\s*""", re.IGNORECASE | re.DOTALL | re.VERBOSE)
+
+#: Clauses that can't follow a condition combined with another one
+_C_TRAILING_CLAUSE = re.compile(r'\b(GROUP|ORDER|HAVING|UNION|INTERSECT'
+                                r'|MINUS|EXCEPT|CONNECT|START|FETCH|LIMIT)\b',
+                                re.IGNORECASE)
+
+def text(value):
+    """Return the text of a value as written in the exported files
+    """
+    if value is None:
+        return 'NULL'
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+
+    return str(value)
+
+def bounds(lo, hi, n):
+    """Split the range [lo, hi] into at most `n` ranges of the same
+    size. Returns the n-1 inner bounds.
+    """
+    if isinstance(lo, (date, datetime)):
+        step = (hi - lo) / n
+        inner = [lo + step*i for i in range(1, n)]
+    elif isinstance(lo, int) and isinstance(hi, int):
+        inner = [lo - (lo - hi)*i // n for i in range(1, n)] # rounded up
+    elif isinstance(lo, (int, float, Decimal)):
+        inner = [lo + (hi - lo)*i / n for i in range(1, n)]
+    else:
+        raise ValueError("Can't partition by {} values: "
+                         "number or date expected".format(type(lo).__name__))
+
+    # Empty ranges are useless
+    return sorted(set(b for b in inner if lo < b <= hi))
+
+def _predicates(key, inner):
+    """Return the conditions and bind values of each slice
+    """
+    if not inner:
+        return [(None, {})]
+
+    slices = [("{k} < :hi".format(k=key), dict(hi=inner[0]))]
+    for lo, hi in zip(inner, inner[1:]):
+        slices.append(("{k} >= :lo AND {k} < :hi".format(k=key),
+                       dict(lo=lo, hi=hi)))
+    slices.append(("({k} >= :lo OR {k} IS NULL)".format(k=key),
+                   dict(lo=inner[-1])))
+
+    return slices
+
+def _scalar(engine, stmt):
+    cursor = engine.conn.cursor()
+    try:
+        cursor.execute(stmt)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+def plan(engine, query, key, n, order=False):
+    """Split a query into at most `n` slices.
+
+    Returns a list of (sql, bind values) pairs. If `order` is True,
+    the rows of each slice are sorted by the key (so the slices
+    merged in order give a sorted result, NULL keys last).
+    """
+    query = query.strip().rstrip(';')
+    if not key or n <= 1:
+        return [(query, {})]
+
+    if key.upper() == 'ROWID':
+        rowid = engine.dialect.rowid_key
+        m = _C_TABLE_QUERY.fullmatch(query)
+        if rowid is None:
+            raise ValueError("PARTITION BY ROWID is not supported "
+                             "by this database")
+        if m is None or (m.group('where') and
+                         _C_TRAILING_CLAUSE.search(m.group('where'))):
+            raise ValueError("PARTITION BY ROWID requires a query of "
+                             "the form: SELECT ... FROM tbl [WHERE ...]")
+
+        columns, table, where = m.group('columns', 'table', 'where')
+        lo, hi = _scalar(engine, "SELECT MIN({k}), MAX({k}) FROM {t}{w}".format(
+                                k=rowid, t=table,
+                                w=" WHERE " + where if where else ""))
+        head = "SELECT {} FROM {} WHERE ".format(columns, table)
+        tail = " AND ({})".format(where) if where else ""
+    else:
+        rowid = "q." + key
+        lo, hi = _scalar(engine, "SELECT MIN({k}), MAX({k}) FROM ({q}) q"
+                                                .format(k=rowid, q=query))
+        head = "SELECT * FROM ({}) q WHERE ".format(query)
+        tail = ""
+
+    if lo is None:
+        # No rows (or only NULL keys)
+        return [(query, {})]
+
+    slices = [[head + predicate + tail if predicate else query, params]
+                for predicate, params in _predicates(rowid,
+                                                     bounds(lo, hi, n))]
+    if order and len(slices) > 1:
+        for s in slices[:-1]:
+            s[0] += " ORDER BY " + rowid
+        # The NULL keys: some servers sort them first, others last
+        slices[-1][0] += " ORDER BY CASE WHEN {k} IS NULL THEN 1 " \
+                         "ELSE 0 END, {k}".format(k=rowid)
+
+    return [tuple(s) for s in slices]
+
+def _writeRow(f, row):
+    """Write a row holding Lob objects, streaming their content
+    """
+    for i, value in enumerate(row):
+        if i:
+            f.write("\t")
+        if isinstance(value, Lob):
+            for data in value.chunks():
+                f.write(data.hex() if value.binary else data)
+        else:
+            f.write(text(value))
+
+    f.write("\n")
+
+def write(f, names, batches, lobs=False):
+    """Write a header (unless `names` is None) and the rows of each
+    batch. If `lobs` is True, the rows might hold Lob objects.
+
+    Returns the number of rows written.
+    """
+    if names is not None:
+        f.write("\t".join(names) + "\n")
+    count = 0
+    for batch in batches:
+        if lobs:
+            for row in batch:
+                _writeRow(f, row)
+        else:
+            f.writelines("\t".join([text(value) for value in row]) + "\n"
+                            for row in batch)
+        count += len(batch)
+
+    return count
+
+def _execute(engine, sql, params, arraysize):
+    """Run one slice. Returns its result
+    """
+    statement = engine.dialect.prepare(engine.conn, sql)
+    result = statement.execute(**params)
+    result.stats = Stats(sql)
+    result.arraysize = arraysize
+    # LOBs are streamed by `write`: nothing is read for display
+    result.lobprefix = 0
+
+    return result
+
+def _write(f, result, header=True):
+    names = [desc[0] for desc in result.cursor.description] \
+                                                    if header else None
+
+    return write(f, names, result.batches(), lobs=bool(result.lobs))
+
+def _export(engine, sql, params, path, arraysize):
+    """Run one slice and write its rows into `path`.
+
+    Returns the number of rows and the statistics of the slice
+    """
+    result = _execute(engine, sql, params, arraysize)
+    try:
+        with open(path, 'wt') as f:
+            count = _write(f, result)
+    finally:
+        result.close()
+
+    return count, result.stats
+
+def _slicePath(path, i):
+    root, ext = os.path.splitext(path)
+
+    return "{}.{:d}{}".format(root, i+1, ext)
+
+def export(engine, path, query, parallel=1, key=None, merge=False,
+                                             arraysize=100, stats=None):
+    """Export the result of a query into `path`.
+
+    With `parallel` > 1, the query is split according to `key` (a
+    column name or ROWID) and the slices are run concurrently, each
+    one on its own connection to the database of `engine`. They
+    are written in separate files (`path` with the slice number
+    before the extension) unless `merge` is True.
+
+    On KeyboardInterrupt, the statements running on the connections
+    of the slices are cancelled.
+
+    Returns the number of rows exported and the paths of the files.
+    """
+    engine.checkQuery(query)
+
+    slices = plan(engine, query, key, parallel, order=merge)
+    if len(slices) == 1:
+        sql, params = slices[0]
+        count, s = _export(engine, sql, params, path, arraysize)
+        if stats is not None:
+            stats.merge(s)
+
+        return count, [path]
+
+    paths = [path] if merge else \
+                [_slicePath(path, i) for i in range(len(slices))]
+    shared = engine.dialect.shareable(**engine.params)
+    engines = [] # connections of the slices in use, to cancel them
+    lock = threading.Lock()
+    turns = [threading.Event() for _ in slices] # previous slices merged
+    aborted = threading.Event()
+    turns[0].set()
+
+    def abort():
+        aborted.set()
+        for turn in turns:
+            turn.set()
+
+    def worker(i, dst=None):
+        sql, params = slices[i]
+        if shared:
+            slice_engine = Engine(engine.params)
+            with lock:
+                engines.append(slice_engine)
+        else:
+            slice_engine = engine
+
+        try:
+            if aborted.is_set():
+                return 0, Stats(sql)
+            if not merge:
+                return _export(slice_engine, sql, params, paths[i],
+                               arraysize)
+
+            result = _execute(slice_engine, sql, params, arraysize)
+            try:
+                turns[i].wait()
+                if aborted.is_set():
+                    return 0, result.stats
+
+                count = _write(dst, result, header=(i == 0))
+            finally:
+                result.close()
+
+            if i+1 < len(turns):
+                turns[i+1].set()
+
+            return count, result.stats
+        except BaseException:
+            abort()
+            raise
+        finally:
+            if slice_engine is not engine:
+                with lock:
+                    engines.remove(slice_engine)
+                    slice_engine.close()
+
+    dst = open(path, 'wt') if merge else None
+    try:
+        if shared:
+            with ThreadPoolExecutor(len(slices),
+                                    thread_name_prefix='sqlm-export') \
+                                                            as executor:
+                futures = [executor.submit(worker, i, dst)
+                                for i in range(len(slices))]
+                try:
+                    outcomes = [future.result() for future in futures]
+                except KeyboardInterrupt:
+                    abort()
+                    with lock:
+                        for slice_engine in engines:
+                            slice_engine.cancel()
+                    raise
+        else:
+            outcomes = [worker(i, dst) for i in range(len(slices))]
+    except BaseException:
+        if dst:
+            dst.close()
+        for part in paths:
+            if os.path.exists(part):
+                os.remove(part)
+        raise
+
+    if dst:
+        dst.close()
+
+    count = 0
+    for n, s in outcomes:
+        count += n
+        if stats is not None:
+            stats.merge(s)
+
+    return count, paths
@@ -1,8 +1,13 @@
 from types import SimpleNamespace
-from decimal import Decimal
+from collections import deque
 import functools
+import itertools
 import re
 
+from sqlm import datefmt
+from sqlm.pipeline import prefetch
+from sqlm.resultset import Lob
+
 def decimal_tuple(d):
     """
     Return a tupple (sign, integral, fractional)
@@ -30,6 +35,8 @@ def _to_char_number(value, fmt):
     """
     Format a value using a *number* format
     """
+    from decimal import Decimal
+
     result=''
     sign, integral, fractional = decimal_tuple(Decimal(value))
     pos = dotidx = fmt.find('.')
@@ -100,11 +107,20 @@ def _to_char_string(value, fmt):
 
     return value[0:n].rjust(n, ' ')
 
+def _to_char_date(value, fmt):
+    """
+    Format a value using a *date* format
+    """
+    try:
+        return datefmt.formatter(fmt)(value)
+    except ValueError:
+        raise FormatError(fmt[0], 'date format')
+
 def to_char(value, fmt, null='null'):
     """
     Oracle-like TO_CHAR function.
 
-    Support numbers and string formats
+    Support numbers, strings and dates formats
 
     Number
     ======
@@ -114,6 +130,10 @@ def to_char(value, fmt, null='null'):
     Strings
     =======
     'X'* space (left) padded string 
+
+    Dates
+    =====
+    YYYY-MM-DD HH24:MI:SS  see `sqlm.datefmt` for the supported elements
     """
     if value is None:
         return null
@@ -126,7 +146,21 @@ def to_char(value, fmt, null='null'):
     elif fmt[0] in ('9','+','-', '.'):
         return _to_char_number(value, fmt)
     else:
-        raise FormatError(fmt[0])
+        return _to_char_date(value, fmt)
+
+def compile_format(fmt, null='null'):
+    """
+    Return a function equivalent to `to_char(value, fmt, null)`.
+
+    Date formats are compiled once, so formatting a value does not
+    involve parsing the mask again.
+    """
+    if fmt and fmt[0] not in ('X', '9', '+', '-', '.'):
+        fn = datefmt.formatter(fmt)
+
+        return lambda value: null if value is None else fn(value)
+
+    return lambda value: to_char(value, fmt, null)
 
 class Column(SimpleNamespace):
     # http://legacy.python.org/dev/peps/pep-0249/#cursor-attributes
@@ -152,10 +186,18 @@ class Column(SimpleNamespace):
 
         # Computed values
         self.align = '>' if self.isNumber() else '<'
+        self.mask = None
+        if self.isDate():
+            self.mask = datefmt.TIMESTAMP_MASK \
+                            if self.type_code == 'TIMESTAMP' \
+                            else datefmt.DATE_MASK
 
     def isNumber(self):
         return self.type_code in ('NUMBER')
 
+    def isDate(self):
+        return self.type_code in ('DATETIME', 'TIMESTAMP', 'DATE')
+
     def getFormat(self):
         """Return the format used to display that column properly
         """
@@ -196,8 +238,14 @@ class Page:
 
     def append(self, row):
         self.rows.append(row)
+
+    def extend(self, rows):
+        self.rows.extend(rows)
                 
     def formats(self):
+        # Deferred import: decimal is not required to start the program
+        from decimal import Decimal
+
         result = [ ]
 
         for c, values in zip(self.columns, [i for i in zip(*self.rows)]):
@@ -223,6 +271,10 @@ class Page:
                     w = len(self.null)
                 else:
                     w = len(fmt)+1
+            elif c.mask:
+                # Fixed width: no need to look at the values
+                fmt = c.mask
+                w = max(datefmt.width(fmt), len(self.null))
             else:
                 w = 0
                 for value in values:
@@ -259,77 +311,296 @@ class Formatter:
         return [(fill*w)[:w] for f,w in self._fmt]
 
     def rows(self):
+        fns = [(compile_format(f, self._null), w) for f, w in self._fmt]
         for row in self._rows:
-            yield [to_char(v, f,null=self._null).rjust(w,' ') 
-                        for v, (f,w) in zip(row, self._fmt)]
+            yield [fn(v).rjust(w,' ') for v, (fn,w) in zip(row, fns)]
 
 
 def make_columns(cursor_description):
     return [Column(*desc) for desc in cursor_description]
 
+def format_lines(fmt, rows, null='NULL'):
+    """
+    Return the formatted lines of `rows` (header excluded) using the
+    formats `fmt` as returned by `Page.formats`.
+
+    This is the work sent to the worker processes (SET FORMATWORKERS)
+    """
+    return [" " + " | ".join(row) + " "
+                for row in Formatter(None, rows, fmt, null).rows()]
+
+#: Rows formatted by each task sent to the worker processes
+FORMAT_CHUNK_SIZE = 2000
+
+_executor = None # (workers, executor)
+
+def _ignore_sigint():
+    """Initializer of the worker processes: Ctrl-C is handled by the
+    main process, which cancels the pending tasks
+    """
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def get_executor(workers):
+    """Return the process pool used to format the rows.
+
+    The pool is created on first use, and created again if
+    the number of workers changes or after `discard_executor`.
+
+    The workers are not forked from the session process: the fetch
+    threads might hold locks that would stay locked in the children.
+    """
+    global _executor
+    if _executor is None or _executor[0] != workers:
+        # Deferred import: most sessions never use it
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+                        'forkserver' if 'forkserver' in methods else 'spawn')
+
+        discard_executor()
+        _executor = (workers, ProcessPoolExecutor(workers,
+                                                  mp_context=context,
+                                                  initializer=_ignore_sigint))
+
+    return _executor[1]
+
+def discard_executor():
+    """Shut down the process pool (if any). The next call to
+    `get_executor` will create a new one
+    """
+    global _executor
+    if _executor is not None:
+        _executor[1].shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
 class TabularFormatter:
-    def display(self, env, result):
-        # print(result.keys())
-        
+    def pages(self, env, result, pagesize=None, ahead=None):
+        """Generator returning the result page by page. Each page is
+        returned as an iterator over lists of formatted lines, so the
+        lines might be printed as soon as they are produced.
+
+        Each page holds at most `pagesize` rows (`env.pagesize` by
+        default, 0 means "all the rows in one page") and starts with
+        its own header. Column widths are computed page by page.
+
+        When `env.prefetch` is not 0, rows are fetched by a background
+        thread while the previous page is formatted.
+
+        When `env.formatworkers` is not 0, rows are formatted by
+        that many worker processes, and up to `ahead` pages
+        (`env.formatworkers` by default) are formatted in advance.
+        """
         # See http://legacy.python.org/dev/peps/pep-0249/#cursor-attributes
         # for cursor.description fields
-        # print([item for item in result.cursor.description])
-
-#        colnum = len(result.cursor.description)
-#
-#        columns = [SimpleNamespace(name=name, 
-#                                    type_code=col_type.__name__,
-#                                    width=1,
-#                                    align='>' if col_type.__name__ in ('NUMBER') else '<')
-#                     for name, col_type, *tail in result.cursor.description]
-#
-#        keys = result.keys()
-#        wl = [len(str(item)) for item in keys]
-#
-#        data = []
-#        for row in result:
-#            row = [item if item is not None else "(null)" for item in row]
-#            for col, value in zip(columns, row):
-#                w = len(str(value))
-#                col.width = max(col.width, w)
-#            data.append(row)
-#
-#        fmt_list = []
-#        for idx, column in enumerate(columns):
-#            w = column.width
-#
-#            fmt_list.append("{!s:"+column.align + str(w)+"}")
-#
-#        print(columns)
-#
-#        fmt = " " + " | ".join(fmt_list) + " "
-#        sep = "-" + "-+-".join(["-"*item for item in wl])           + "-"
-
-        keys = [name for name, *_ in result.cursor.description]
+        stats = result.stats
         columns = make_columns(result.cursor.description)
+        for c in columns:
+            if c.mask:
+                c.mask = env.timestampformat if c.type_code == 'TIMESTAMP' \
+                                             else env.dateformat
+        if pagesize is None:
+            pagesize = env.pagesize
+        result.arraysize = env.arraysize
+        result.maxrows = env.maxrows
+        result.lobprefix = env.lobprefix
+        result.lobdir = env.lobdir
+
+        pages = self.collect(env, result, columns, pagesize)
+        try:
+            if env.formatworkers > 0:
+                yield from self.formatParallel(pages, env.formatworkers,
+                                               stats, lobs=bool(result.lobs),
+                                               ahead=ahead)
+            else:
+                for page in pages:
+                    yield self.format(page, stats)
+        finally:
+            # Stop fetching now rather than when the generator is
+            # collected (the traceback of an error keeps it alive)
+            pages.close()
+
+    def collect(self, env, result, columns, pagesize):
+        """Generator returning the rows of the result as Page objects
+        """
+        stats = result.stats
         page = Page(columns)
+        batches = prefetch(result.batches(), env.prefetch, result.cancel)
+        while True:
+            if env.prefetch > 0:
+                with stats.timer('wait'):
+                    batch = next(batches, None)
+            else:
+                batch = next(batches, None)
+
+            if batch is None:
+                break
+
+            while batch:
+                if pagesize > 0:
+                    n = pagesize - len(page.rows)
+                    page.extend(batch[:n])
+                    batch = batch[n:]
+                else:
+                    page.extend(batch)
+                    batch = None
 
-        # fmt = " " + " | ".join(map(Column.get_format, columns)) + " "
-        # sep = "-" + "-+-".join(map(Column.blank, columns))      + "-"
+                if len(page.rows) == pagesize:
+                    yield page
+                    page = Page(columns)
 
-        for row in result:
-            page.append(row)
+        if page.rows:
+            yield page
 
-        #print(data)
-        #print(fmt)
-        # print(fmt.format(*keys))
-        # print(sep)
+    def format(self, page, stats):
+        """Generator returning the formatted lines of a page (header
+        included) by chunks of at most FORMAT_CHUNK_SIZE rows
+        """
+        with stats.timer('layout'):
+            pf = page.formated();
+
+        rows = pf.rows()
+        header = self.header(pf)
+        while True:
+            with stats.timer('format'):
+                lines = [" " + " | ".join(row) + " "
+                            for row in itertools.islice(rows,
+                                                        FORMAT_CHUNK_SIZE)]
+            if not lines:
+                return
+
+            yield header + lines
+            header = []
+
+    def header(self, pf):
+        return [" " + " | ".join(pf.header()) + " ",
+                " " + "-+-".join(pf.blank('-')) + " "]
+
+    def formatParallel(self, pages, workers, stats, lobs=False, ahead=None):
+        """Generator returning the formatted lines of each page
+        (see `pages`).
+
+        The layout of each page is computed first (`Page.formats`),
+        then its rows are formatted by chunks in `workers` processes.
+        Up to `ahead` pages (`workers` by default) are formatted
+        in advance. Pages are returned in order.
+
+        LOB values (if `lobs` is True) are converted to text
+        before being sent.
+
+        If a worker process dies, the pool is discarded (so the next
+        statement starts a new one) and BrokenProcessPool is raised.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = get_executor(workers)
+        if ahead is None:
+            ahead = workers
+        pending = deque() # (header, futures) of the pages in progress
+
+        def lines(header, futures):
+            for future in futures:
+                try:
+                    with stats.timer('format'):
+                        chunk = future.result()
+                except BrokenProcessPool:
+                    discard_executor()
+                    raise
+
+                yield header + chunk
+                header = []
+
+        def done():
+            return lines(*pending.popleft())
+
+        try:
+            for page in pages:
+                with stats.timer('layout'):
+                    fmt = page.formats()
+
+                rows = page.rows
+                if lobs:
+                    rows = [[str(v) if isinstance(v, Lob) else v for v in row]
+                                for row in rows]
+
+                futures = [executor.submit(format_lines, fmt,
+                                           rows[i:i+FORMAT_CHUNK_SIZE],
+                                           page.null)
+                                for i in range(0, len(rows),
+                                               FORMAT_CHUNK_SIZE)]
+                header = self.header(Formatter(page.columns, (), fmt,
+                                               page.null))
+                pending.append((header, futures))
+
+                if len(pending) > ahead:
+                    yield done()
+
+            while pending:
+                yield done()
+        except BrokenProcessPool:
+            discard_executor()
+            raise
+        finally:
+            for header, futures in pending:
+                for future in futures:
+                    future.cancel()
 
-        cw = [len(key) for key in keys]
+    def display(self, env, result):
+        separator = False
+        for page in self.pages(env, result):
+            show(page, result.stats, separator)
+            separator = True
+
+def show(page, stats, separator=False):
+    """Print the lines of a page (as returned by `TabularFormatter.pages`)
+    as they are produced, preceded by an empty line if `separator` is True
+    """
+    for lines in page:
+        if separator:
+            lines.insert(0, "")
+            separator = False
 
-        pf = page.formated();
-        header = False
+        with stats.timer('print'):
+            for line in lines:
+                print(line)
 
-        for row in pf.rows():
-            if not header:
-                print(" " + " | ".join(pf.header()) + " ")
-                print(" " + "-+-".join(pf.blank('-')) + " ")
-                header = True
+        stats.count('bytes', sum(len(line)+1 for line in lines))
+
+class Pager:
+    """Pages of a result fetched and displayed on demand.
+
+    One page is fetched in advance, so the end of the result
+    is known as soon as its last page is displayed. No other page
+    is read ahead, even when formatting in worker processes: the
+    user might stop before.
+    """
 
-            print(" " + " | ".join(row) + " ")
-        
+    def __init__(self, formatter, env, result, pagesize, tagline=None):
+        self.result = result
+        self.tagline = tagline
+        self._pages = formatter.pages(env, result, pagesize, ahead=0)
+        self._next = next(self._pages, None)
+        self._separator = False
+
+    def more(self):
+        return self._next is not None
+
+    def show(self):
+        """Display the next page
+        """
+        page, self._next = self._next, next(self._pages, None)
+        if page is None:
+            return
+
+        show(page, self.result.stats, self._separator)
+        self._separator = True
+
+    def close(self):
+        """Discard the pages not displayed yet and release the cursor
+        """
+        if self.more():
+            self._pages.close()
+            self.result.close()
+            self._next = None
@@ -0,0 +1,156 @@
+"""Persistent statement history.
+
+Each statement is stored with its timestamp, duration and row count
+in an append-only file (one JSON object per line). Only the most
+recent entries are loaded at startup. A trigram index allows fast
+substring and prefix searches.
+"""
+
+import os
+import time
+from array import array
+from collections import namedtuple
+
+Entry = namedtuple('Entry', 'timestamp statement duration rows')
+
+#: Size of the blocks read when loading the tail of the history file
+_BLOCK_SIZE = 64*1024
+
+def _trigrams(text):
+    return {text[i:i+3] for i in range(len(text)-2)}
+
+def _tail(path, n):
+    """Return the last `n` lines of a file.
+
+    The file is read backward by blocks, so only the
+    required part of the file is read.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= n:
+            size = min(_BLOCK_SIZE, pos)
+            pos -= size
+            f.seek(pos)
+            data = f.read(size) + data
+
+    lines = data.splitlines()
+    if pos > 0:
+        # The first line is probably incomplete
+        lines = lines[1:]
+
+    return [line.decode('utf-8') for line in lines[-n:]]
+
+class History:
+    """The statement history.
+
+    Behaves like a list of statements (`history[-1]` is the text of the
+    last statement). Entries are written to `path` as soon as they
+    are appended. If `path` is None, the history is kept in memory
+    only.
+    """
+
+    def __init__(self, path=None, limit=10000):
+        self.path = path
+        self._entries = []
+        self._index = {} # trigram -> array of entry numbers
+        self._file = None
+
+        if path:
+            # Deferred import: not required without a history file
+            import json
+
+            try:
+                for line in _tail(path, limit):
+                    try:
+                        self._add(Entry(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        pass # ignore corrupted lines
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, idx):
+        if type(idx) is slice:
+            return [entry.statement for entry in self._entries[idx]]
+
+        return self._entries[idx].statement
+
+    def entry(self, idx):
+        return self._entries[idx]
+
+    def append(self, statement, stats=None):
+        """Add a statement to the history.
+
+        `stats` (if any) are the statistics collected while
+        executing the statement.
+        """
+        duration = rows = None
+        if stats:
+            duration = stats.stop()
+            rows = stats.counters.get('rows')
+
+        entry = Entry(time.time(), str(statement), duration, rows)
+        self._add(entry)
+
+        if self.path:
+            import json
+
+            if self._file is None:
+                self._file = open(self.path, 'at')
+
+            self._file.write(json.dumps(entry._asdict()))
+            self._file.write('\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def search(self, pattern):
+        """Return the numbers of the entries containing `pattern`
+        (case insensitive).
+
+        If `pattern` starts with '^', only the statements starting
+        with the rest of the pattern are returned.
+        """
+        prefix = pattern.startswith('^')
+        if prefix:
+            pattern = pattern[1:]
+        pattern = pattern.lower()
+
+        trigrams = _trigrams(pattern)
+        if trigrams:
+            postings = sorted((self._index.get(t, ()) for t in trigrams),
+                              key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(posting)
+
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(self._entries))
+
+        result = []
+        for n in candidates:
+            text = self._entries[n].statement.lower()
+            if text.lstrip().startswith(pattern) if prefix else pattern in text:
+                result.append(n)
+
+        return result
+
+    def _add(self, entry):
+        n = len(self._entries)
+        self._entries.append(entry)
+
+        for trigram in _trigrams(entry.statement.lower()):
+            posting = self._index.get(trigram)
+            if posting is None:
+                posting = self._index[trigram] = array('I')
+            posting.append(n)
@@ -2,28 +2,108 @@ import os
 import sys
 import re
 import shlex
-import subprocess
+import itertools
+import time
 from getpass import getpass
 from copy import copy
 import traceback
 
-from sqlm.dialects.oracle import OracleDialect
 from sqlm.tabular import Reader
 from sqlm.console import FileInputStream
-from sqlm.formatter import TabularFormatter
+from sqlm.compress import open_input
+from sqlm.formatter import TabularFormatter, Pager
 from sqlm.utils import numSelector
+from sqlm.pipeline import interruptible
+from sqlm.history import History
 
 import sqlm.parser
 import sqlm.utils
 import sqlm.engine
+import sqlm.cache
+import sqlm.datefmt
+from sqlm.resultset import ResultSet
+from sqlm.stats import Stats
 
 class ArgumentError(Exception):
     def __init__(self, message):
         super(ArgumentError, self).__init__(message)
 
+def _boolean(param, value):
+    """Convert an ON/OFF like setting to a boolean
+    """
+    if value.upper() in ("TRUE", "ON", "1"):
+        return True
+    elif value.upper() in ("FALSE", "OFF", "0"):
+        return False
+    else:
+        raise ArgumentError("Not a valid option for " + param + " " + value)
+
+def _integer(param, value, min=0):
+    """Convert a numeric setting to an integer
+    """
+    try:
+        n = int(value)
+    except ValueError:
+        n = None
+
+    if n is None or n < min:
+        raise ArgumentError("Not a valid option for " + param + " " + value)
+
+    return n
+
+def _datemask(param, value):
+    """Check a date mask setting
+    """
+    try:
+        sqlm.datefmt.formatter(value)
+    except ValueError:
+        raise ArgumentError("Not a valid option for " + param + " " + value)
+
+    return value
+
+#: Parameters stored as the attribute of the same name (in lower case)
+_PARAMETERS = (
+    "AUTOCOMMIT",
+    "COMMITEVERY",
+    "TIMING",
+    "STATSFILE",
+    "AUTOTRACE",
+    "ARRAYSIZE",
+    "PAGESIZE",
+    "PREFETCH",
+    "FORMATWORKERS",
+    "MAXROWS",
+    "PAGER",
+    "LOBPREFIX",
+    "LOBDIR",
+    "DATEFORMAT",
+    "TIMESTAMPFORMAT",
+    "STMTCACHE",
+    "RESULTCACHE",
+    "RESULTCACHESIZE",
+    "RESULTCACHETTL",
+)
+
+_C_HISTORY_SEARCH = re.compile(r'\s*HISTORY\s+/(.+)/\s*$',
+                               re.IGNORECASE | re.DOTALL)
+
+#: Statements whose execution plan is reported by AUTOTRACE
+_C_EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|INSERT|UPDATE|DELETE|MERGE)\b',
+                            re.IGNORECASE)
+
+#: Statements ending the current transaction
+_C_TRANSACTION_END = re.compile(r'\s*(COMMIT|ROLLBACK)\b', re.IGNORECASE)
+
+#: Commands followed by a query (COPY, EXPORT)
+_C_USING = re.compile(r'(.*?)\bUSING\s+(.*)', re.IGNORECASE | re.DOTALL)
+
+_C_PROFILE_STMT = re.compile(r'\s*PROFILE(?:\s+TO\s+\S+)?\s+(.*)',
+                             re.IGNORECASE | re.DOTALL)
+
 class Environment:
     def __init__(self):
         self.next = None # for linked list of environments
+        self.input_stream = None # where the commands are read from
 
         self.errorHandlers = {
             "DEBUG":    self.reportErrorDebug,
@@ -38,8 +118,30 @@ class Environment:
         }
         self.termination = self.terminations[";"]
         self.bindvar = {}
+        self.profiler = None
 
         self.autocommit = True
+        self.commitevery = 0   # statements (or rows for LOAD) per commit
+        self.timing = False
+        self.statsfile = None
+        self.autotrace = None  # None (OFF), "ON" or "TRACEONLY"
+
+        self.arraysize = 100   # rows per fetch
+        self.pagesize = 0      # rows per page (0: one page)
+        self.prefetch = 0      # batches fetched in advance (0: no thread)
+        self.formatworkers = 0 # processes formatting the rows (0: none)
+        self.maxrows = 0       # rows fetched per query (0: no limit)
+        self.pager = False     # display query results page by page
+        self.lobprefix = 80    # LOB characters (or bytes) displayed
+        self.lobdir = None     # directory where LOB contents are saved
+        self.dateformat = sqlm.datefmt.DATE_MASK
+        self.timestampformat = sqlm.datefmt.TIMESTAMP_MASK
+
+        self.stmtcache = 20    # prepared statements kept by the engine
+
+        self.resultcache = False
+        self.resultcachesize = 16*1024*1024 # bytes
+        self.resultcachettl = 300           # seconds
 
     def push(self):
         c = copy(self)
@@ -47,6 +149,11 @@ class Environment:
         return c
 
     def pop(self):
+        if self.profiler and (not self.next
+                              or self.profiler is not self.next.profiler):
+            # The profiled script is over
+            self.profiler.report()
+
         return self.next
 
     def __setitem__(self, i, v):
@@ -55,18 +162,60 @@ class Environment:
         elif i == "TERMINATION":
             self.setTermination(v.upper())
         elif i == "AUTOCOMMIT":
-            if v.upper() in ("TRUE", "ON", "1"):
-                self.autocommit = True
-            elif v.upper() in ("FALSE", "OFF", "0"):
-                self.autocommit = False
-            else:
-                raise ArgumentError("Not a valid option for AUTOCOMMIT " + v)
+            self.autocommit = _boolean(i, v)
+        elif i == "COMMITEVERY":
+            self.commitevery = _integer(i, v)
+        elif i == "TIMING":
+            self.timing = _boolean(i, v)
+        elif i == "STATSFILE":
+            self.statsfile = None if v.upper() == "OFF" else v
+        elif i == "AUTOTRACE":
+            if v.upper() not in ("ON", "OFF", "TRACEONLY"):
+                raise ArgumentError("Not a valid option for " + i + " " + v)
+            self.autotrace = None if v.upper() == "OFF" else v.upper()
+        elif i == "ARRAYSIZE":
+            self.arraysize = _integer(i, v, 1)
+        elif i == "PAGESIZE":
+            self.pagesize = _integer(i, v)
+        elif i == "PREFETCH":
+            self.prefetch = _integer(i, v)
+        elif i == "FORMATWORKERS":
+            self.formatworkers = _integer(i, v)
+        elif i == "MAXROWS":
+            self.maxrows = _integer(i, v)
+        elif i == "PAGER":
+            self.pager = _boolean(i, v)
+        elif i == "LOBPREFIX":
+            self.lobprefix = _integer(i, v)
+        elif i == "LOBDIR":
+            self.lobdir = None if v.upper() == "OFF" else v
+        elif i == "DATEFORMAT":
+            self.dateformat = _datemask(i, v)
+        elif i == "TIMESTAMPFORMAT":
+            self.timestampformat = _datemask(i, v)
+        elif i == "STMTCACHE":
+            self.stmtcache = _integer(i, v)
+        elif i == "RESULTCACHE":
+            self.resultcache = _boolean(i, v)
+        elif i == "RESULTCACHESIZE":
+            self.resultcachesize = _integer(i, v)
+        elif i == "RESULTCACHETTL":
+            self.resultcachettl = _integer(i, v)
+        else:
+            raise ArgumentError("Unknown parameter " + i)
+
+    def __getitem__(self, i):
+        if i == "ERRORLEVEL":
+            return self.errorLevel
+        elif i in _PARAMETERS:
+            return getattr(self, i.lower())
         else:
             raise ArgumentError("Unknown parameter " + i)
 
     def setErrorLevel(self, level):
         handler = self.errorHandlers.get(level.upper())
         if handler:
+            self.errorLevel = level.upper()
             self.reportError = handler
         else:
             raise("Invalid error level: " + level)
@@ -81,20 +230,24 @@ class Environment:
     def reportErrorNorm(self, err):
         print(err.__class__.__name__ + ":", err, file=sys.stderr)
 
-    def bind(self, var, typ, value=None):
-        self.bindvar[var.upper()] = (typ, value)
+    def bind(self, var, typ, value=None, direction="INOUT"):
+        self.bindvar[var.upper()] = (typ, value, direction)
 
     def bound(self, var):
         return self.bindvar[var.upper()]
 
     def update(self, var, value):
-        typ, _ = self.bindvar[var.upper()]
-        self.bindvar[var.upper()] = (typ, value)
+        typ, _, direction = self.bindvar[var.upper()]
+        self.bindvar[var.upper()] = (typ, value, direction)
 
         
 
 class Command:
-    def __init__(self, action = None, pattern=(), desc = "", usage = "" , args = (), kw = {}):
+    def __init__(self, action = None, pattern=(), desc = "", usage = "" , args = (), kw = {}, raw = False, line = None):
+        if raw:
+            # The action requires the raw command line
+            kw = dict(kw, line=line)
+
         self.action = action
         self.desc = desc
         self.usage = usage
@@ -122,7 +275,7 @@ class Interpreter:
     is assembled and send to the server when the termination pattern
     is detected.
     """
-    def __init__(self, console):
+    def __init__(self, console, history=None):
         self.engine = None
         self.connection = None
         self.console = console
@@ -144,20 +297,32 @@ class Interpreter:
                 action=self.doRead,
                 desc="Read tabular data to create a table",
             ),
+            "LOAD" : dict(
+                usage="LOAD tbl [ < path ] [ << heredoc ]",
+                action=self.doLoad,
+                desc="Load tabular data into an existing table",
+            ),
             "SET" : dict(
                 usage="SET param value",
                 action=self.doSet,
                 desc="Change internal parameter",
             ),
+            "SHOW" : dict(
+                usage="SHOW [param]",
+                action=self.doShow,
+                desc="Show internal parameters",
+            ),
             "ED" : dict(
                 usage="ED [filename] [ ! events...]",
                 action=self.doEdit,
                 desc="Edit some events in a file",
             ),
             "HISTORY" : dict(
-                usage="HISTORY [num]",
+                usage="HISTORY [num] [pattern...]",
                 action=self.doHistory,
-                desc="Show the last commands stored into the buffer",
+                desc="Show the last commands stored into the buffer "
+                     "or search them (HISTORY /text/ or /^prefix/)",
+                raw=True,
             ),
             "HELP" : dict(
                 usage="HELP [cmd]",
@@ -174,10 +339,45 @@ class Interpreter:
                 action=self.doConnect,
                 desc="establish a connection to the database",
             ),
+            "PROFILE" : dict(
+                usage="PROFILE [TO path] [@ script] [stmt...]",
+                action=self.doProfile,
+                desc="Profile a statement or a script",
+                raw=True,
+            ),
+            "NEXT" : dict(
+                usage="NEXT",
+                action=self.doNext,
+                desc="Show the next page of the current result "
+                     "(SET PAGER ON). An empty line does the same",
+            ),
+            "COPY" : dict(
+                usage="COPY [FROM src] [TO dst] mode tbl USING stmt...",
+                action=self.doCopy,
+                desc="Copy the result of a query into a table",
+                raw=True,
+            ),
+            "EXPORT" : dict(
+                usage="EXPORT path [PARALLEL n] [PARTITION BY key] [MERGE] "
+                      "USING stmt...",
+                action=self.doExport,
+                desc="Export the result of a query into tab-separated files",
+                raw=True,
+            ),
+            "COMMIT" : dict(
+                usage="COMMIT",
+                action=self.doCommit,
+                desc="Commit the current transaction",
+            ),
+            "ROLLBACK" : dict(
+                usage="ROLLBACK",
+                action=self.doRollback,
+                desc="Roll back the current transaction",
+            ),
             "VAR" : dict(
-                usage="VAR var typ",
+                usage="VAR var typ [direction] [= value]",
                 action=self.doVar,
-                desc="Declare a bind variable",
+                desc="Declare a bind variable (direction: IN, OUT, INOUT)",
             ),
         }
 
@@ -185,17 +385,27 @@ class Interpreter:
         for cmd in self.ncommands.values():
             cmd['pattern'] = sqlm.parser.compile(cmd['usage'])
 
-        self.history = []
+        self.history = history if history is not None else History()
         self.curr = "" # The current statement as a list of lines
+        self.stats = None # Stats of the last statement sent to the server
+        self.cache = sqlm.cache.ResultCache()
+        self.pending = 0 # statements sent since the last commit
+        self.pager = None # the result being paged (if any)
 
     def findCommand(self, stmt):
         # New command parsing
-        cmdline = sqlm.parser.tokenize(stmt)
+        try:
+            cmdline = sqlm.parser.tokenize(stmt)
+        except ValueError:
+            # Not a command (probably the first line of
+            # an SQL statement the tokenizer can't handle)
+            return None
+
         for cmd in self.ncommands.values(): # This could be optimized
                                             # using the first token as a key
             m = cmd['pattern'].match(cmdline)
             if m is not None:
-                return Command(kw=m, **cmd)
+                return Command(kw=m, line=stmt, **cmd)
 
         return None
 
@@ -230,6 +440,12 @@ class Interpreter:
         if not self.curr:
             # First line of a new statement
 
+            if not line and self.pager and env.input_stream \
+                                       and env.input_stream.interactive:
+                # Scripts might have empty lines between statements
+                self.doNext(env)
+                return 0
+
             # Ignore empty lines or comment-only lines
             if not line or line.lstrip().startswith('--'):
                 return 0
@@ -241,10 +457,11 @@ class Interpreter:
                 return 0
 
         execute = False
+        stmt = None # the new statement to execute (if any)
         # Special case
         if line == '/':
             if self.curr:
-                self.history.append(self.curr)
+                stmt = self.curr
                 self.curr = ""
 
             execute = True
@@ -261,15 +478,20 @@ class Interpreter:
                 stmt = match.group(1)
 
                 # push non empty statement onto the stack
-                if stmt.strip():
-                    self.history.append(stmt)
+                if not stmt.strip():
+                    stmt = None
 
                 self.curr = ""
                 execute = True
 
 
         if execute:
-            self.send(env, self.history[-1])
+            self.stats = None
+            try:
+                self.send(env, stmt if stmt else self.history[-1])
+            finally:
+                if stmt:
+                    self.history.append(stmt, self.stats)
 
             return 0
         else:
@@ -308,23 +530,218 @@ class Interpreter:
         input_stream = FileInputStream(path)
         self.console.pushInputStream(input_stream)
 
-    def doRead(self, env, tbl=None, path=None, heredoc='.'):
+    def doProfile(self, env, path=None, script=None, stmt=None, line=""):
+        """Run a statement or a script under the profiler.
+
+        Usage:
+            PROFILE [TO path] @ script
+            PROFILE [TO path] stmt
+            PROFILE [TO path]
+
+        Without any statement, profile the last command in the buffer.
+        The statement must fit on the command line. The optional
+        trailing ';' is ignored.
+
+        With a path, the raw profile data are saved in that file
+        (to be examined later using the `pstats` module)
+        """
+        # Deferred import: pstats is expensive to load
+        from sqlm.profiler import Profiler
+
+        if env.profiler:
+            raise ArgumentError("Already profiling")
+
+        profiler = Profiler(path)
+        if script:
+            # The profiler is stopped and the report displayed
+            # when the script's environment is popped
+            self.doRunScript(env, script)
+            self.console.environment.profiler = profiler.start()
+            return
+
+        if stmt:
+            m = _C_PROFILE_STMT.match(line)
+            stmt = m.group(1).rstrip().rstrip(';')
+        else:
+            stmt = self.history[-1]
+
+        env.profiler = profiler
+        try:
+            with profiler:
+                self.send(env, stmt)
+        finally:
+            env.profiler = None
+            profiler.report()
+
+    def readTabular(self, env, reader, path=None, heredoc='.'):
+        """Read tabular data from a file or from the input stream.
+
+        Returns the column descriptions and the rows. Compressed files
+        are decompressed by a background thread while being parsed.
+        """
         try:
             src = None
             if path:
-                src = open(path, "rt")
+                src = open_input(path)
 
-            r = Reader()
-            columns, rows = r.parse(src if src
-                                    else env.input_stream.reader('> ', heredoc))
+            return reader.parse(src if src
+                                else env.input_stream.reader('> ', heredoc))
         finally:
             if src:
                 src.close()
 
+    def doRead(self, env, tbl=None, path=None, heredoc='.'):
+        reader = Reader()
+        columns, rows = self.readTabular(env, reader, path, heredoc)
+        rows = list(reader.convert(columns, rows))
+
         self.history.append(self.dialect.makeCreateTable(tbl, columns, rows))
         self.history.append(self.dialect.makeInserts(tbl, columns, rows))
 
-        self.doHistory(env, 2)
+        self.doHistory(env, num=2)
+
+    def doLoad(self, env, tbl=None, path=None, heredoc='.'):
+        """Load tabular data into an existing table using the bulk
+        insert path of the dialect
+        """
+        reader = Reader()
+        columns, rows = self.readTabular(env, reader, path, heredoc)
+        rows = reader.convert(columns, rows)
+        names = [name for name, *_ in columns]
+
+        start = time.perf_counter()
+        try:
+            count = self.bulkInsert(env, self.engine, tbl, names, rows)
+        finally:
+            self.cache.invalidate(self.engine.database)
+        self.throughput("loaded", count, time.perf_counter() - start)
+
+    def bulkInsert(self, env, engine, tbl, names, rows):
+        """Insert rows using the bulk insert path of the dialect.
+
+        With AUTOCOMMIT ON, the rows are committed once at the end or
+        every COMMITEVERY rows. Otherwise, they are left uncommitted,
+        unless `engine` is not the current session.
+
+        Returns the number of rows inserted.
+        """
+        commit = env.autocommit or engine is not self.engine
+        every = env.commitevery if commit else 0
+
+        count = 0
+        while True:
+            chunk = itertools.islice(rows, every) if every else rows
+            n = engine.dialect.bulkInsert(engine.conn, tbl, names, chunk,
+                                          commit=commit)
+            count += n
+            if not every or n < every:
+                break
+
+        if not commit:
+            self.pending += 1
+
+        return count
+
+    def throughput(self, action, count, elapsed):
+        print("\n{:d} {} {} in {:.3f}s ({:.0f} rows/s).\n".format(
+                    count, "rows" if count > 1 else "row", action, elapsed,
+                    count / elapsed if elapsed else 0))
+
+    def doCopy(self, env, mode=None, tbl=None, src=None, dst=None,
+                                                    stmt=None, line=""):
+        """Copy the result of a query into a table, possibly
+        from one database to another.
+
+        Usage:
+            COPY [FROM src] [TO dst] mode tbl USING query
+
+        `src` and `dst` are connection URLs. The current session is
+        used for the missing one. `mode` is one of APPEND, CREATE,
+        INSERT or REPLACE. The table is created from the description
+        of the result.
+
+        Rows are fetched from the source while the previous ones are
+        inserted into the target (up to PREFETCH batches, at least 1,
+        of ARRAYSIZE rows in advance).
+        """
+        # Deferred import: only required by COPY
+        import sqlm.transfer
+
+        if mode.upper() not in sqlm.transfer.MODES:
+            raise ArgumentError("Invalid mode " + mode)
+
+        m = _C_USING.match(line)
+        query = m.group(2).rstrip().rstrip(';')
+
+        engines = []
+        try:
+            source = self.engine
+            if src:
+                source = self.connect(src)
+                engines.append(source)
+            target = self.engine
+            if dst:
+                target = self.connect(dst)
+                engines.append(target)
+
+            stats = self.stats = Stats("COPY " + query)
+            start = time.perf_counter()
+            names, rows = sqlm.transfer.copy(source, target, tbl, query,
+                                             mode, env.arraysize,
+                                             max(1, env.prefetch), stats)
+            # Whatever the connection, the data of the database change
+            self.cache.invalidate(target.database)
+            try:
+                with stats.timer('insert'):
+                    count = self.bulkInsert(env, target, tbl, names, rows)
+            finally:
+                rows.close()
+            self.throughput("copied", count, time.perf_counter() - start)
+        finally:
+            for engine in engines:
+                engine.close()
+
+        stats.stop()
+        self.report(env, stats)
+
+    def doExport(self, env, path=None, n=None, key=None, stmt=None, line=""):
+        """Export the result of a query into tab-separated files.
+
+        Usage:
+            EXPORT path [PARALLEL n] [PARTITION BY key] [MERGE] USING query
+
+        With PARALLEL, the query is split into (at most) n slices
+        by ranges of `key` (a numeric or date column, or ROWID). Each
+        slice is run on its own connection and written into its own
+        file (path.1, path.2, ...) unless MERGE is given. Merged slices
+        are sorted by key.
+        """
+        # Deferred import: only required by EXPORT
+        import sqlm.export
+
+        m = _C_USING.match(line)
+        options, query = m.group(1), m.group(2).rstrip().rstrip(';')
+        merge = re.search(r'\bMERGE\b', options, re.IGNORECASE) is not None
+
+        parallel = _integer("PARALLEL", n, 1) if n else 1
+        if parallel > 1 and not key:
+            raise ArgumentError("PARALLEL requires PARTITION BY")
+
+        stats = self.stats = Stats("EXPORT " + query)
+        start = time.perf_counter()
+        if not sqlm.cache.cacheable(query):
+            # The slices run on other connections to the same database
+            self.cache.invalidate(self.engine.database)
+        count, paths = sqlm.export.export(self.engine, path, query,
+                                          parallel, key, merge,
+                                          env.arraysize, stats)
+        self.throughput("exported", count, time.perf_counter() - start)
+        for path in paths:
+            print(path)
+        print()
+
+        stats.stop()
+        self.report(env, stats)
 
     def doEdit(self, env, filename=None, events=()):
         """
@@ -362,27 +779,106 @@ class Interpreter:
         if not editor:
             editor = 'vi'
 
+        # Deferred import: only required when spawning an editor
+        import subprocess
+
         print("Editing:", filename, "with", editor)
         subprocess.call([editor, filename])
 
-    def doHistory(self, env, num=0):
+    def doHistory(self, env, num=0, pattern=None, line=None):
+        m = _C_HISTORY_SEARCH.match(line) if line else None
+        if m:
+            self.showHistory(self.history.search(m.group(1)), details=True)
+            return
+
+        if pattern:
+            raise ArgumentError("Expected a number or /pattern/")
+
         if num:
-            num = int(num)
+            try:
+                num = int(num)
+            except ValueError:
+                num = -1
             if num < 0:
                 raise ArgumentError("Expected a non nul positive integer")
         else:
             num = len(self.history)
 
         base_idx = max(len(self.history)-num,0)
-        for idx, val in enumerate(self.history[base_idx:]):
-            header = "{:4d}".format(idx+base_idx)
-            for line in str(val).splitlines():
+        self.showHistory(range(base_idx, len(self.history)))
+
+    def showHistory(self, indices, details=False):
+        for idx in indices:
+            header = "{:4d}".format(idx)
+            for line in str(self.history[idx]).splitlines():
                 print("{}  {}".format(header,line))
                 header = "    "
 
+            entry = self.history.entry(idx)
+            if details and entry.duration is not None:
+                print("{}  -- {}  {:.3f} ms  {} rows".format(
+                        header,
+                        time.strftime("%Y-%m-%d %H:%M:%S",
+                                      time.localtime(entry.timestamp)),
+                        entry.duration*1000,
+                        entry.rows if entry.rows is not None else "-"))
+
+    def doNext(self, env):
+        pager = self.pager
+        if pager is None:
+            print("No more rows.")
+            return
+
+        try:
+            pager.show()
+        except KeyboardInterrupt:
+            self.closePager()
+            print("Statement cancelled", file=sys.stderr)
+            raise
+        if pager.more():
+            print("-- NEXT (or an empty line) for more --")
+        else:
+            self.pager = None
+            self.summary(env, pager.result, pager.tagline)
+
+    def closePager(self):
+        if self.pager:
+            self.pager.close()
+            self.pager = None
+
+    def doCommit(self, env):
+        self.engine.commit()
+        self.pending = 0
+
+    def doRollback(self, env):
+        self.engine.rollback()
+        self.pending = 0
+        # Cached results might have seen the rolled back changes
+        self.cache.invalidate(self.engine.database)
+
     def doQuit(self, env):
         raise EOFError
 
+    def close(self, env):
+        """End the session.
+
+        Statements not committed yet (see COMMITEVERY) are committed
+        if AUTOCOMMIT is ON. Otherwise, they are rolled back.
+        """
+        if self.engine is None or not self.pending:
+            return
+
+        if env.autocommit:
+            self.engine.commit()
+        else:
+            print("Warning: rolling back {:d} uncommitted {}".format(
+                        self.pending,
+                        "statements" if self.pending > 1 else "statement"),
+                  file=sys.stderr)
+            self.engine.rollback()
+
+        self.pending = 0
+
     def doHelp(self, env, cmd=None):
         def showNCommandHelp(cmd):
             usage = self.ncommands[cmd].get('usage','')
@@ -402,56 +898,229 @@ class Interpreter:
     def doSet(self, env, param=None, value=None):
         env[param.upper()] = value
 
-    def doVar(self, env, var=None, typ=None):
-        env.bind(var,typ)
+    def doShow(self, env, param=None):
+        params = [param.upper()] if param else ("ERRORLEVEL",) + _PARAMETERS
+        for param in params:
+            value = env[param]
+            if value is True or value is False:
+                value = "ON" if value else "OFF"
+            elif value is None:
+                value = "OFF"
 
-    def doConnect(self, env, url=None):
-        """Establish a connection to the database
+            print("{:20s} {}".format(param, value))
 
-        ``url`` is assumed to be of the form
-        ``dialect://user:password/connection_string``
+            if param == "RESULTCACHE":
+                print("{:20s} {}".format("", self.cache.summary()))
+
+    def doVar(self, env, var=None, typ=None, direction="INOUT", value=None):
+        direction = direction.upper()
+        if direction not in ("IN", "OUT", "INOUT"):
+            raise ArgumentError("Invalid direction " + direction)
+
+        env.bind(var,typ,value,direction)
+
+    def connect(self, url):
+        """Return a new Engine connected to the database at `url`.
 
         If the password part is missing, request it from the console
-        Note: this is different from the empty password!
         """
         params = sqlm.engine.parse_url(url)
         if params['password'] == None:
             # No password
             params['password'] = getpass()
-        
-        the_engine = sqlm.engine.Engine(params)
 
-        self.engine = the_engine
+        return sqlm.engine.Engine(params)
+
+    def doConnect(self, env, url=None):
+        """Establish a connection to the database
+
+        ``url`` is assumed to be of the form
+        ``dialect://user:password/connection_string``
+
+        If the password part is missing, request it from the console
+        Note: this is different from the empty password!
+        """
+        self.engine = self.connect(url)
         self.dialect = self.engine.dialect
+        self.cache.invalidate()
+        self.pending = 0
 
         return self.engine
 
     def display(self, env, result, tagline = None):
+        if result.returns_rows and env.autotrace == "TRACEONLY":
+            # Rows are fetched but neither formatted nor displayed
+            result.arraysize = env.arraysize
+            result.maxrows = env.maxrows
+            for batch in result.batches():
+                pass
+
+            self.summary(env, result, tagline)
+            return
+
+        if result.returns_rows and env.pager and not env.autotrace:
+            # Deferred import: shutil loads the compression modules
+            import shutil
+
+            # Rows are fetched when their page is displayed
+            pagesize = env.pagesize or \
+                        max(1, shutil.get_terminal_size().lines - 5)
+            self.pager = Pager(self.formatter, env, result, pagesize, tagline)
+            self.doNext(env)
+            return
+
         if result.returns_rows:
             self.formatter.display(env, result)
+        else:
+            rowcount = result.rowcount
+            if rowcount >= 0:
+                result.stats.count('rows', rowcount)
+
+        self.summary(env, result, tagline)
+
+    def summary(self, env, result, tagline = None):
+        """Display the number of rows of a result once displayed
+        """
+        rowcount = result.stats.counters.get('rows',
+                                            0 if result.returns_rows else -1)
 
-        rowcount = result.rowcount
         if tagline and rowcount >= 0:
             print(tagline.format(n=rowcount,
                                  rows="rows" if rowcount > 1 else "row"))
 
+        if result.truncated:
+            print("Output truncated (MAXROWS {:d}).\n".format(env.maxrows))
+
+    def trace(self, env, statement, stats, before):
+        """Display the execution plan and the statistics of a statement
+        (SET AUTOTRACE ON|TRACEONLY).
+
+        `before` is the snapshot of the session statistics taken
+        before the statement was executed.
+        """
+        conn = self.engine.conn
+        for name, value in self.dialect.sessionStats(conn).items():
+            stats.count(name, value - before.get(name, 0))
+
+        plan = None
+        if _C_EXPLAINABLE.match(statement.stmt):
+            try:
+                plan = self.dialect.explain(conn, statement)
+            except Exception as err:
+                plan = ["Not available ({})".format(err)]
+
+        print("Execution Plan")
+        print("-"*60)
+        print("\n".join(plan) if plan else "Not available")
+        print()
+        print("Statistics")
+        print("-"*60)
+        print(stats.summary())
+        print()
+
+    def report(self, env, stats):
+        """Report the statistics of a statement according to
+        the TIMING and STATSFILE settings.
+        """
+        if env.timing and not env.autotrace:
+            print(stats.summary())
+
+        if env.statsfile:
+            with open(env.statsfile, 'at') as f:
+                f.write(stats.json())
+                f.write('\n')
+
+    def endStatement(self, env, text, stats):
+        """Account for a statement that might have modified the data
+        and commit according to the AUTOCOMMIT and COMMITEVERY settings.
+        """
+        if _C_TRANSACTION_END.match(text):
+            self.pending = 0
+            return
+
+        self.pending += 1
+        if env.autocommit and self.pending >= max(env.commitevery, 1):
+            with stats.timer('commit'):
+                self.engine.commit()
+            self.pending = 0
+
     def send(self, env, statement, tagline = "\n{n:d} {rows}.\n"):
-        statement = str(statement)
-        statement = self.engine.prepare(statement)
+        self.closePager()
+
+        text = statement = str(statement)
+        stats = self.stats = Stats(statement)
+
+        with stats.timer('prepare'):
+            self.engine.stmtcachesize = env.stmtcache
+            statement = self.engine.prepare(statement)
+
+        with stats.timer('bind'):
+            bindvalues = []
+            outparams = []
+            for paramname in statement.bindnames:
+                # bind parameters
+                datatype, value, direction = env.bound(paramname)
+                statement.bind(paramname, datatype, value, direction)
+                bindvalues.append((paramname, value))
+                if direction != "IN":
+                    outparams.append(paramname)
+
+        cachekey = None
+        database = self.engine.database
+        if not sqlm.cache.cacheable(text):
+            # The statement might modify the data
+            self.cache.invalidate(database)
+        elif env.resultcache and not env.autotrace:
+            self.cache.configure(env.resultcachesize, env.resultcachettl)
+            cachekey = self.cache.key(database, text, bindvalues)
+            cursor = self.cache.get(cachekey)
+            if cursor:
+                stats.count('cache hits')
+                self.display(env, ResultSet(cursor, stats), tagline)
+                stats.stop()
+                self.report(env, stats)
+                return
 
-        for paramname in statement.bindnames:
-            # bind parameters
-            datatype, value = env.bound(paramname)
-            statement.bind(paramname, datatype, value)
+        if env.autotrace:
+            before = self.dialect.sessionStats(self.engine.conn)
 
-        result = statement.execute()
-        if result:
-            self.display(env, result, tagline)
+        result = None
+        try:
+            with stats.timer('execute'):
+                result = interruptible(statement.execute,
+                                       cancel=self.engine.cancel)
+
+            if result:
+                result.stats = stats
+                # LOB locators can't be reused once the cursor is closed
+                if cachekey and result.returns_rows and not result.lobs:
+                    result.cursor = self.cache.record(cachekey,
+                                                      result.cursor)
+
+                self.display(env, result, tagline)
+        except BaseException as err:
+            # A cursor left half-fetched would keep the session
+            # interrupted (SQLite): release it
+            self.closePager()
+            if result is not None:
+                result.close()
+            else:
+                statement.release()
+            if isinstance(err, KeyboardInterrupt):
+                print("Statement cancelled", file=sys.stderr)
+            raise
 
         
-        for paramname in statement.bindnames:
-            # Get back parameter values and store them
+        for paramname in outparams:
+            # Get back OUT parameter values and store them
             # in the environment
             env.update(paramname, statement[paramname])
             print(paramname, '=', statement[paramname])
-        
+
+        if not sqlm.cache.cacheable(text):
+            self.endStatement(env, text, stats)
+
+        stats.stop()
+        if env.autotrace:
+            self.trace(env, statement, stats, before)
+        self.report(env, stats)
@@ -0,0 +1,119 @@
+"""Helpers to overlap I/O-bound and CPU-bound work using threads.
+
+`threading` and `queue` are imported on first use: they are not
+required to start the program.
+"""
+
+#: Interval (in seconds) used by producers to check if the
+#: consumer is still there while the queue is full
+_POLL_INTERVAL = 0.1
+
+_ITEM, _END, _ERROR = range(3)
+
+def prefetch(iterable, depth, cancel=None):
+    """Generator returning the items of `iterable`, produced
+    in advance by a background thread.
+
+    At most `depth` items are buffered: the producer is blocked
+    when the queue is full (backpressure). If `depth` is 0 (or negative),
+    `iterable` is consumed directly from the calling thread.
+
+    Exceptions raised by the producer are re-raised in the consumer.
+    Closing the generator stops the producer as soon as its current
+    item is produced. If the consumer gives up before the end
+    (generator closed or KeyboardInterrupt) the optional `cancel`
+    callable is used to interrupt the item in production.
+    """
+    if depth <= 0:
+        try:
+            yield from iterable
+        except (KeyboardInterrupt, GeneratorExit):
+            if cancel:
+                cancel()
+            raise
+        return
+
+    import threading
+    from queue import Queue, Full
+
+    queue = Queue(depth)
+    stop = threading.Event()
+
+    def put(kind, value):
+        while not stop.is_set():
+            try:
+                queue.put((kind, value), timeout=_POLL_INTERVAL)
+                return True
+            except Full:
+                pass
+
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put(_ITEM, item):
+                    return
+
+            put(_END, None)
+        except BaseException as err:
+            put(_ERROR, err)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = queue.get()
+            if kind == _ITEM:
+                yield value
+            elif kind == _END:
+                break
+            else:
+                raise value
+    except (KeyboardInterrupt, GeneratorExit):
+        stop.set()
+        if cancel:
+            cancel()
+        raise
+    finally:
+        stop.set()
+        thread.join()
+
+def interruptible(fn, *args, cancel=None, **kwargs):
+    """Call `fn` from a worker thread while the calling thread
+    remains responsive to KeyboardInterrupt.
+
+    On KeyboardInterrupt, the `cancel` callable is used to interrupt
+    `fn`. Once the worker thread has finished, the KeyboardInterrupt
+    is re-raised.
+
+    Returns the value returned by `fn` or re-raises its exceptions.
+    """
+    import threading
+
+    outcome = {}
+    # Thread.join is not used: once interrupted, it might consider
+    # the thread over while it is still running (Python 3.11)
+    done = threading.Event()
+
+    def worker():
+        try:
+            outcome['value'] = fn(*args, **kwargs)
+        except BaseException as err:
+            outcome['error'] = err
+        finally:
+            done.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+    try:
+        done.wait()
+    except KeyboardInterrupt:
+        if cancel:
+            cancel()
+        done.wait()
+        raise
+
+    if 'error' in outcome:
+        raise outcome['error']
+
+    return outcome['value']
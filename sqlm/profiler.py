@@ -0,0 +1,103 @@
+"""Client-side profiling.
+
+Run some work under `cProfile` and `tracemalloc` to find out
+how much time and memory are spent in sql-moins itself
+(formatting, parsing, ...) vs waiting for the database.
+
+Before Python 3.12, `cProfile` only sees the thread that enabled it:
+the threads started while profiling (statement execution, prefetch)
+get their own profile, merged into the report.
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import tracemalloc
+
+#: cProfile sees all the threads (sys.monitoring)
+_ALL_THREADS = sys.version_info >= (3, 12)
+
+class Profiler:
+    """Wrapper arround `cProfile.Profile` and `tracemalloc`.
+
+    Usage:
+        profiler = Profiler().start()
+        ...
+        profiler.stop()
+        profiler.report()
+    """
+
+    #: Number of functions displayed in the report
+    top = 20
+
+    #: Sort key used to rank the functions
+    sort = 'tottime'
+
+    def __init__(self, dump=None):
+        self.dump = dump
+        self.peak = None
+        self._profile = cProfile.Profile()
+        self._threads = [] # profiles of the other threads
+        self._tracing = False
+        self._running = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+        tracemalloc.reset_peak()
+        self._profile.enable()
+        if not _ALL_THREADS:
+            threading.setprofile(self._profileThread)
+        self._running = True
+
+        return self
+
+    def stop(self):
+        if not self._running:
+            return
+
+        self._profile.disable()
+        if not _ALL_THREADS:
+            threading.setprofile(None)
+        self._running = False
+
+        _, self.peak = tracemalloc.get_traced_memory()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+        if self.dump:
+            self.stats().dump_stats(self.dump)
+
+    def _profileThread(self, frame, event, arg):
+        """Profile hook of the new threads: replaced by a profile
+        of the thread at its first event
+        """
+        profile = cProfile.Profile()
+        self._threads.append(profile)
+        profile.enable()
+
+    def stats(self, stream=None):
+        """Return the `pstats.Stats` of all the profiled threads
+        """
+        return pstats.Stats(self._profile, *self._threads, stream=stream)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def report(self, stream=None):
+        """Print the ranked hot-function report and the peak memory
+        """
+        self.stop()
+        stats = self.stats(stream)
+        stats.strip_dirs().sort_stats(self.sort).print_stats(self.top)
+
+        print("Peak memory: {:d} KiB".format(self.peak // 1024), file=stream)
+        if self.dump:
+            print("Profile saved to", self.dump, file=stream)
@@ -1,12 +1,200 @@
+import os
+
+from sqlm.stats import Stats
+
+#: Size of the chunks used to stream large objects
+LOB_CHUNK_SIZE = 1 << 16
+
+class Lob:
+    """Large object (CLOB, BLOB, ...) read lazily.
+
+    `lob` is the driver's LOB object (`size()` and `read(offset,
+    amount)` methods). Only its first `prefix` characters (or bytes)
+    are read to be displayed. The whole content might be streamed to
+    a file chunk by chunk.
+    """
+
+    def __init__(self, lob, prefix=80):
+        self.lob = lob
+        self.length = lob.size()
+        self.path = None
+
+        self.prefix = lob.read(1, max(prefix, 1))[:prefix] \
+                                            if self.length else ''
+        self.binary = type(self.prefix) is bytes
+
+    def chunks(self, size=LOB_CHUNK_SIZE):
+        """Generator returning the content by chunks of (about)
+        `size` characters or bytes
+        """
+        getchunksize = getattr(self.lob, 'getchunksize', None)
+        if getchunksize:
+            # Use a multiple of the storage chunk size
+            chunksize = getchunksize()
+            size = max(chunksize, size // chunksize * chunksize)
+
+        offset = 1
+        while offset <= self.length:
+            data = self.lob.read(offset, size)
+            if not data:
+                break
+
+            yield data
+            offset += len(data)
+
+    def save(self, path):
+        """Stream the content to a file
+        """
+        with open(path, 'wb') as f:
+            for data in self.chunks():
+                f.write(data if self.binary else data.encode('utf-8'))
+
+        self.path = path
+
+    def __str__(self):
+        text = self.prefix.hex() if self.binary else self.prefix
+        if self.length > len(self.prefix):
+            text += "... [{:d} {}]".format(self.length,
+                                           "bytes" if self.binary
+                                                   else "chars")
+        if self.path:
+            text += " -> " + self.path
+
+        return text
+
+def readLobs(batches, lobs):
+    """Generator returning each batch with the LOB locators of the
+    columns `lobs` replaced by their whole content
+    """
+    for batch in batches:
+        rows = []
+        for row in batch:
+            row = list(row)
+            for i in lobs:
+                if row[i] is not None:
+                    row[i] = row[i].read()
+            rows.append(row)
+
+        yield rows
+
 class ResultSet:
-    def __init__(self, cursor):
+    #: Number of rows requested on each round-trip to the server
+    arraysize = 100
+
+    #: Maximum number of rows fetched (0 means no limit)
+    maxrows = 0
+
+    #: Characters (or bytes) of each LOB read for display
+    lobprefix = 80
+
+    #: Directory where LOB contents are saved (None: not saved)
+    lobdir = None
+
+    def __init__(self, cursor, stats=None, cancel=None, close=None, lobs=()):
         self.cursor = cursor
+        self._cancel = cancel
+        self._close = close
+        self.lobs = lobs # indexes of the LOB columns
         self.rowcount = cursor.rowcount
         self.returns_rows = cursor.description is not None
+        self.stats = stats if stats is not None else Stats()
+        self.truncated = False # True if rows were left unfetched
+        self.done = not self.returns_rows # no more rows to fetch
+        self._rownum = 0
+
+    def cancel(self):
+        """Ask the server to stop the work in progress for this result
+        """
+        if self._cancel:
+            self._cancel()
+
+    def close(self):
+        """Release the cursor, discarding the rows not fetched yet
+        """
+        self.done = True
+        if self._close:
+            self._close()
+        else:
+            self.cursor.close()
 
     def fetchall(self):
-        return self.cursor.fetchall()
+        rows = self.cursor.fetchall()
+        self.done = True
 
-    def __iter__(self):
-        return iter(self.cursor)
+        return rows
+
+    def batches(self):
+        """Generator returning the rows by batches of at most
+        `arraysize` rows.
+
+        Each round-trip to the server is timed as a `fetch`
+
+        If `maxrows` is not 0, fetching stops after that many rows.
+        If there were more rows, `truncated` is set and the cursor
+        is released.
+        """
+        try:
+            # Some drivers size their round-trips on the cursor
+            # arraysize whatever the size given to fetchmany
+            self.cursor.arraysize = min(self.arraysize, self.maxrows + 1) \
+                                        if self.maxrows else self.arraysize
+        except AttributeError:
+            pass
+
+        stats = self.stats
+        remaining = self.maxrows or -1
+        while remaining:
+            size = self.arraysize if remaining < 0 \
+                                  else min(self.arraysize, remaining)
+            with stats.timer('fetch'):
+                batch = self.cursor.fetchmany(size)
+
+            if not batch:
+                self.done = True
+                return
 
+            if self.lobs:
+                with stats.timer('lob'):
+                    batch = self.wrapLobs(batch)
+
+            stats.count('rows', len(batch))
+            remaining -= len(batch)
+            yield batch
+
+        # The limit has been reached. Check if rows are left.
+        with stats.timer('fetch'):
+            self.truncated = bool(self.cursor.fetchmany(1))
+
+        if self.truncated:
+            self.close()
+        else:
+            self.done = True
+
+    def wrapLobs(self, batch):
+        """Replace the LOB values of a batch by Lob objects.
+
+        If `lobdir` is set, their content is saved in files named
+        after the column and the row number.
+        """
+        names = [desc[0] for desc in self.cursor.description]
+        rows = []
+        for row in batch:
+            self._rownum += 1
+            row = list(row)
+            for i in self.lobs:
+                if row[i] is not None:
+                    lob = row[i] = Lob(row[i], self.lobprefix)
+                    if self.lobdir:
+                        lob.save(os.path.join(self.lobdir,
+                                    "{}_{:d}.{}".format(
+                                            names[i], self._rownum,
+                                            "bin" if lob.binary else "txt")))
+                        self.stats.count('lob bytes', lob.length)
+
+            rows.append(tuple(row))
+
+        return rows
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
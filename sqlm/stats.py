@@ -0,0 +1,105 @@
+"""Per-statement instrumentation.
+
+A `Stats` object collects high-resolution timers and counters
+while a statement goes through the prepare -> bind -> execute ->
+fetch -> layout (`Page.formats`) -> format (`Formatter.rows`) -> print
+(-> commit) pipeline.
+"""
+
+import time
+from contextlib import contextmanager
+
+#: Order used when reporting the well-known timers.
+#: Unknown timers are reported afterward in insertion order.
+PHASES = ('prepare', 'bind', 'execute', 'fetch', 'lob', 'wait',
+          'layout', 'format', 'print', 'commit')
+
+class Stats:
+    """Timers and counters for one statement.
+
+    Timers are accumulated: the same timer might be started
+    several times (one per fetch batch for example). Both the total
+    elapsed time and the number of samples are recorded.
+    """
+
+    def __init__(self, statement=None):
+        self.statement = statement
+        self.timestamp = time.time()
+        self.timers = {}    # name -> [elapsed, count]
+        self.counters = {}  # name -> value
+        self._start = time.perf_counter()
+        self.elapsed = None
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, elapsed):
+        entry = self.timers.setdefault(name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        """Add the timers and counters of another Stats object
+        (i.e.: collected by a worker thread)
+        """
+        for name, (elapsed, count) in other.timers.items():
+            entry = self.timers.setdefault(name, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += count
+
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    def stop(self):
+        """Stop the wall-clock timer of the statement.
+        """
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self._start
+
+        return self.elapsed
+
+    def phases(self):
+        """Return the list of (name, elapsed, count) triples
+        in reporting order.
+        """
+        names = [name for name in PHASES if name in self.timers]
+        names += [name for name in self.timers if name not in PHASES]
+
+        return [(name, *self.timers[name]) for name in names]
+
+    def asdict(self):
+        return dict(
+            timestamp=self.timestamp,
+            statement=self.statement,
+            elapsed=self.stop(),
+            timers={name: dict(elapsed=elapsed, count=count)
+                            for name, elapsed, count in self.phases()},
+            counters=dict(self.counters),
+        )
+
+    def json(self):
+        # Deferred import: only required by SET STATS JSON
+        import json
+
+        return json.dumps(self.asdict())
+
+    def summary(self):
+        """Return a human readable summary of the statement
+        """
+        elapsed = self.stop()
+        lines = ["Elapsed: {:.3f} ms".format(elapsed*1000)]
+        for name, t, count in self.phases():
+            lines.append("    {:10s} {:10.3f} ms  ({:d})".format(
+                                                    name, t*1000, count))
+        for name, value in self.counters.items():
+            lines.append("    {:10s} {:10d}".format(name, value))
+
+        return "\n".join(lines)
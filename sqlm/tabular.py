@@ -1,5 +1,7 @@
 import re
 
+from sqlm import datefmt
+
 _RD_IGNORE = re.compile(r'^(#.*)|(\s+)|(\s*[-+=#]+\s*)$')
 
 
@@ -19,7 +21,37 @@ _SEP = (
 
 _RD_NUMBER_PATTERN =          re.compile(r'^([-+]?)(\d*)[.]?(\d*)$')
 
+#: Masks tried (in that order) to identify date/timestamp columns
+_RD_DATE_MASKS = (
+    'YYYY-MM-DD',
+    'YYYY-MM-DD HH24:MI:SS',
+    'YYYY-MM-DD"T"HH24:MI:SS',
+    'YYYY-MM-DD HH24:MI:SS.FF',
+    'YYYY-MM-DD"T"HH24:MI:SS.FF',
+    'YYYY-MM-DD HH24:MI',
+    'YYYY/MM/DD',
+    'YYYY/MM/DD HH24:MI:SS',
+    'DD/MM/YYYY',
+    'DD/MM/YYYY HH24:MI:SS',
+    'DD-MON-YYYY',
+    'DD-MON-YY',
+)
+
+#: Number of values used to choose the mask of a column
+_RD_DATE_SAMPLE = 20
+
+def _integer(val):
+    try:
+        return int(val)
+    except ValueError:
+        from decimal import Decimal
+
+        return int(Decimal(val)) # i.e.: '12.'
+
 class Reader:
+    def __init__(self):
+        self.masks = [] # date mask of each column (None if not a date)
+
     def parse(self, ifile):
         data = (line.strip() for line in ifile
                              if not _RD_IGNORE.match(line))
@@ -51,11 +83,54 @@ class Reader:
 
         return self.guessType(columns, result), result
        
+    def guessDate(self, i, data):
+        """Return the mask of the i-th column if it holds dates
+        (or None).
+
+        The mask is chosen using the first values of the column.
+        Only that mask is used to check the other values.
+        """
+        values = (row[i] for row in data if row[i].upper() != 'NULL')
+        sample = [val for _, val in zip(range(_RD_DATE_SAMPLE), values)]
+        if not sample:
+            return None
+
+        for mask in _RD_DATE_MASKS:
+            parse = datefmt.parser(mask)
+            try:
+                for val in sample:
+                    parse(val)
+                break
+            except ValueError:
+                pass
+        else:
+            return None
+
+        try:
+            for val in values:
+                parse(val)
+        except ValueError:
+            return None
+
+        return mask
+
     def guessType(self, columns, data):
         width = len(columns)
         types = [ ]
+        self.masks = []
 
         for i in range(0, width):
+            mask = self.guessDate(i, data)
+            self.masks.append(mask)
+            if mask:
+                if any(name == 'FF' for name, _ in datefmt.elements(mask)):
+                    types.append((columns[i], 'TIMESTAMP', 6, 0))
+                elif datefmt.hastime(mask):
+                    types.append((columns[i], 'TIMESTAMP', 0, 0))
+                else:
+                    types.append((columns[i], 'DATE', 0, 0))
+                continue
+
             numLeft = 1;
             numRight = 0;
             strPrecision = 1;
@@ -84,6 +159,26 @@ class Reader:
                else (columns[i], 'VARCHAR', strPrecision, 0))
                     
         return types
-        
 
-          
+    def convert(self, columns, data):
+        """Generator returning the rows of `data` as native values
+        according to the column types returned by `guessType`.
+
+        NULL values are returned as None. Dates are returned as `date`
+        or `datetime` objects.
+        """
+        # Deferred import: decimal is not required to start the program
+        from decimal import Decimal
+
+        converters = []
+        for i, (name, typ, prec, scale) in enumerate(columns):
+            if typ == 'NUMBER':
+                converters.append(_integer if scale == 0 else Decimal)
+            elif typ in ('DATE', 'TIMESTAMP'):
+                converters.append(datefmt.parser(self.masks[i]))
+            else:
+                converters.append(str)
+
+        for row in data:
+            yield tuple(None if val.upper() == 'NULL' else conv(val)
+                            for conv, val in zip(converters, row))
@@ -0,0 +1,200 @@
+"""Copy of query results from one session to another.
+
+Rows are fetched from the source session by a background thread
+while the calling thread inserts the previous batches into the
+target session. Both sides run concurrently, on a bounded queue
+of batches (see `sqlm.pipeline.prefetch`).
+"""
+
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlm.dialects.generic import quote
+from sqlm.pipeline import prefetch
+from sqlm.resultset import readLobs
+
+#: Copy modes (as in SQL*Plus)
+MODES = ('APPEND', 'CREATE', 'INSERT', 'REPLACE')
+
+#: Column types (as returned by `Reader.guessType`) of the PEP-249
+#: type objects, in matching order
+_TYPE_OBJECTS = (
+    ('TIMESTAMP',   'TIMESTAMP'),
+    ('DATETIME',    'DATE'),
+    ('NUMBER',      'NUMBER'),
+    ('FIXED_CHAR',  'CHAR'),
+    ('STRING',      'VARCHAR'),
+)
+
+def _typeName(module, type_code):
+    for name, typ in _TYPE_OBJECTS:
+        obj = getattr(module, name, None)
+        if obj is not None and type_code == obj:
+            return typ
+
+    return None
+
+def _valueType(values):
+    """Guess the type of a column from its first non-null value
+    """
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            return 'TIMESTAMP'
+        if isinstance(value, date):
+            return 'DATE'
+        if isinstance(value, (int, float, Decimal)):
+            return 'NUMBER'
+
+        return 'VARCHAR'
+
+    return 'VARCHAR'
+
+def describe(module, description, rows):
+    """Return the definitions of the columns of a result as
+    (name, type, precision, scale) tuples (see `Reader.guessType`).
+
+    Types are taken from the cursor description. If the driver does
+    not report them (i.e.: SQLite), they are guessed from the values
+    of `rows` (a sample of the result).
+    """
+    columns = []
+    for i, desc in enumerate(description):
+        name, type_code, display_size, internal_size, precision, scale = \
+            desc[:6]
+        values = [row[i] for row in rows]
+        typ = _typeName(module, type_code) or _valueType(values)
+
+        scale = scale if scale and scale > 0 else 0
+        prec = 0
+        if typ == 'NUMBER':
+            prec = precision or 0
+            if not prec:
+                scale = 0
+        elif typ in ('VARCHAR', 'CHAR'):
+            prec = internal_size or display_size or \
+                    max([len(str(v)) for v in values if v is not None] + [1])
+            scale = 0
+        else:
+            # The fractional precision of timestamps is their scale
+            prec = scale if typ == 'TIMESTAMP' else 0
+            scale = 0
+
+        columns.append((name, typ, prec, scale))
+
+    return columns
+
+def columnNames(engine, tbl):
+    """Return the names of the columns of the table `tbl` or None
+    if it is not visible from `engine`
+    """
+    cursor = engine.conn.cursor()
+    try:
+        cursor.execute("SELECT * FROM {} WHERE 1 = 0".format(quote(tbl)))
+        return [desc[0] for desc in cursor.description]
+    except engine.dialect.module.Error:
+        return None
+    finally:
+        cursor.close()
+
+def exists(engine, tbl):
+    """Return True if the table `tbl` is visible from `engine`
+    """
+    return columnNames(engine, tbl) is not None
+
+def _reads(query, tbl):
+    """Return True if `query` might read the table `tbl`
+    """
+    return re.search(r'(?<![\w$#]){}(?![\w$#])'.format(re.escape(tbl)),
+                     query, re.IGNORECASE) is not None
+
+def _execute(engine, stmt):
+    cursor = engine.conn.cursor()
+    try:
+        cursor.execute(stmt)
+    finally:
+        cursor.close()
+
+def copy(source, target, tbl, query, mode='INSERT',
+                                     arraysize=100, depth=4, stats=None):
+    """Execute `query` on the `source` engine and prepare the
+    table `tbl` on the `target` engine according to `mode`:
+
+    APPEND   create the table if it does not exist
+    CREATE   create the table (an error if it already exists)
+    INSERT   the table must already exist
+    REPLACE  drop the table (if it exists) and create it again
+
+    Returns the names of the target columns and an iterator over the
+    rows to insert. Rows are inserted by position: the n-th column of
+    the query goes into the n-th column of the table. Up to `depth`
+    batches of `arraysize` rows are fetched in advance by a background
+    thread. Closing the iterator releases the source cursor.
+
+    If the query reads the table on the same connection, all the rows
+    are fetched before the table is modified.
+    """
+    mode = mode.upper()
+    if mode not in MODES:
+        raise ValueError("Invalid copy mode " + mode)
+    source.checkQuery(query)
+
+    statement = source.dialect.prepare(source.conn, query)
+    result = statement.execute()
+
+    result.stats = stats or result.stats
+    result.arraysize = arraysize
+    batches = result.batches()
+    if result.lobs:
+        # LOBs are copied in full, not wrapped for display
+        batches = readLobs(batches, result.lobs)
+        result.lobs = ()
+
+    # The connection can't be shared by two threads
+    if source is target:
+        depth = 0
+    batches = prefetch(batches, depth, result.cancel)
+    pending = batches
+    try:
+        if source is target and _reads(query, tbl):
+            # Writing into the table while the cursor reads it would
+            # have undefined results
+            pending = iter(list(batches))
+
+        first = next(pending, [])
+        columns = describe(source.dialect.module,
+                           result.cursor.description, first)
+
+        if mode == 'REPLACE' and exists(target, tbl):
+            _execute(target, "DROP TABLE {}".format(quote(tbl)))
+
+        names = columnNames(target, tbl) if mode in ('APPEND', 'INSERT') \
+                                         else None
+        if names is None:
+            if mode == 'INSERT':
+                raise ValueError("No such table " + tbl)
+
+            _execute(target, target.dialect.makeCreateTable(tbl, columns,
+                                                            first))
+            names = [name for name, *_ in columns]
+        elif len(names) != len(columns):
+            raise ValueError("Table {} has {:d} columns, the query "
+                             "returns {:d}".format(tbl, len(names),
+                                                   len(columns)))
+    except BaseException:
+        batches.close()
+        result.close()
+        raise
+
+    def rows():
+        try:
+            yield from first
+            for batch in pending:
+                yield from batch
+        finally:
+            batches.close()
+            result.close()
+
+    return names, rows()
@@ -1,10 +1,60 @@
 #!/usr/bin/python3
+"""SQL command line interpreter.
+
+Without option, start an interactive session. In batch mode
+(-b or -f), commands are read from stdin or from a script and
+the exit status reports if an error occured.
+"""
+
+import argparse
+import os
+import sys
 
-from sqlm.console import Console
 from sqlm.interpreter import Environment
 from sqlm.interpreter import Interpreter
+from sqlm.history import History
+
+#: Path of the persistent statement history
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".sqlmoins_statements")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url', nargs='?',
+                        help="connect to the database at URL on startup")
+    parser.add_argument('-b', dest='batch', action='store_true',
+                        help="batch mode: read the commands from stdin")
+    parser.add_argument('-f', dest='script', default=None,
+                        help="batch mode: read the commands from SCRIPT")
+    args = parser.parse_args(argv)
+
+    environment = Environment()
+    history = None
+    if args.script:
+        from sqlm.console import BatchConsole, FileInputStream
+        console = BatchConsole(environment, FileInputStream(args.script))
+    elif args.batch:
+        from sqlm.console import BatchConsole
+        console = BatchConsole.fromStdin(environment)
+    else:
+        from sqlm.console import Console
+        console = Console(environment)
+        history = History(HISTORY_PATH)
+
+    interpreter = Interpreter(console, history)
+    if args.url:
+        try:
+            interpreter.doConnect(environment, args.url)
+        except KeyboardInterrupt:
+            if args.script or args.batch:
+                return console.interrupted()
+            raise
+        except Exception as err:
+            if args.script or args.batch:
+                return console.fail(err)
+
+            environment.reportError(err)
+
+    return console.run(interpreter)
 
-environment = Environment()
-console = Console(environment)
-interpreter = Interpreter(console)
-console.run(interpreter)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,3 +2,19 @@ from tests.parser import *
 from tests.formatter import *
 from tests.utils import *
 
+from tests.stats import *
+from tests.pipeline import *
+from tests.asyncengine import *
+from tests.cache import *
+from tests.history import *
+from tests.compress import *
+from tests.datefmt import *
+from tests.tabular import *
+from tests.generic import *
+from tests.interpreter import *
+from tests.console import *
+from tests.resultset import *
+from tests.sqlite import *
+from tests.oracle import *
+from tests.transfer import *
+from tests.export import *
@@ -0,0 +1,97 @@
+import asyncio
+import unittest
+
+from sqlm.asyncengine import AsyncEngine
+
+_SLOW_QUERY = """
+    WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM c)
+    SELECT count(*) FROM c
+"""
+
+async def _engine():
+    engine = await AsyncEngine.connect(dict(dialect='sqlite', db=':memory:'))
+    await engine.execute("CREATE TABLE t (a, b)")
+    for i in range(250):
+        await engine.execute("INSERT INTO t VALUES (:A, :B)", a=i, b=str(i))
+
+    return engine
+
+class AsyncEngineTestCase(unittest.TestCase):
+    def test_async_iteration(self):
+        async def test():
+            engine = await _engine()
+            result = await engine.execute("SELECT a, b FROM t ORDER BY a")
+            result.arraysize = 100
+
+            batches = [len(batch) async for batch in result.batches()]
+            self.assertEqual(batches, [100, 100, 50])
+
+            result = await engine.execute("SELECT a FROM t ORDER BY a")
+            rows = [row async for row in result]
+            self.assertEqual(rows, [(i,) for i in range(250)])
+
+        asyncio.run(test())
+
+    def test_same_statement(self):
+        async def test():
+            engine = await _engine()
+            sql = "SELECT a FROM t ORDER BY a"
+            first = await engine.execute(sql)
+            first.arraysize = 1
+            batches = first.batches()
+            rows = await batches.__anext__()
+
+            second = await engine.execute(sql)
+            self.assertEqual(len(await second.fetchall()), 250)
+
+            rows += [row async for batch in batches for row in batch]
+            self.assertEqual(rows, [(i,) for i in range(250)])
+
+        asyncio.run(test())
+
+    def test_break(self):
+        async def test():
+            engine = await _engine()
+            statement = await engine.prepare("SELECT a FROM t ORDER BY a")
+            result = await statement.execute()
+            result.arraysize = 10
+            async for row in result:
+                break
+
+            # The abandoned iteration is closed once collected
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+            self.assertFalse(statement.statement.busy())
+            self.assertIsNone(statement.statement.cursor)
+
+            result = await statement.execute()
+            batches = result.batches()
+            await batches.__anext__()
+            await result.aclose()
+            self.assertFalse(statement.statement.busy())
+            self.assertEqual(await result.fetchall(), [])
+
+        asyncio.run(test())
+
+    def test_concurrent_sessions(self):
+        async def test():
+            engines = await asyncio.gather(*[_engine() for _ in range(12)])
+            results = await asyncio.gather(*[
+                    e.execute("SELECT count(*) FROM t") for e in engines])
+            counts = await asyncio.gather(*[r.fetchall() for r in results])
+
+            self.assertEqual(counts, [[(250,)]]*12)
+
+        asyncio.run(test())
+
+    def test_cancellation(self):
+        async def test():
+            engine = await _engine()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(engine.execute(_SLOW_QUERY), 0.2)
+
+            # The session is still usable
+            result = await engine.execute("SELECT count(*) FROM t")
+            self.assertEqual(await result.fetchall(), [(250,)])
+
+        asyncio.run(test())
@@ -0,0 +1,91 @@
+import unittest
+
+from sqlm.cache import *
+
+DESC = (('A', None, None, None, None, None, None),)
+
+class NormalizeTestCase(unittest.TestCase):
+    def test_normalize(self):
+        tc = ( # statement                          # normalized
+            ("SELECT  *\n  FROM t",                 "SELECT * FROM t"),
+            ("  SELECT 'a  b'  FROM t ",            "SELECT 'a  b' FROM t"),
+            ('SELECT "A  B",  \'it\'\'s  \'',       'SELECT "A  B", \'it\'\'s  \''),
+        )
+        for stmt, expected in tc:
+            self.assertEqual(normalize(stmt), expected, stmt)
+
+    def test_cacheable(self):
+        self.assertTrue(cacheable("SELECT * FROM t"))
+        self.assertTrue(cacheable("  with x as (select 1) select * from x"))
+        self.assertFalse(cacheable("SELECT * FROM t FOR UPDATE"))
+        self.assertFalse(cacheable("INSERT INTO t SELECT * FROM u"))
+        self.assertFalse(cacheable("SELECTION"))
+
+    def test_cacheable_with(self):
+        self.assertTrue(cacheable("WITH x AS (SELECT 1), y AS (SELECT 2) "
+                                  "SELECT * FROM x, y"))
+        self.assertTrue(cacheable("WITH x(\"delete\") AS (SELECT ')') "
+                                  "SELECT * FROM x"))
+        self.assertFalse(cacheable("WITH x AS (SELECT 1) DELETE FROM t"))
+        self.assertFalse(cacheable("with x as (select (1)) "
+                                   "insert into t select * from x"))
+
+class ResultCacheTestCase(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = ResultCache()
+        key = cache.key(1, "SELECT  a FROM t", [('X', 1)])
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, DESC, ((1,), (2,)))
+
+        cursor = cache.get(cache.key(1, "SELECT a FROM t", [('X', 1)]))
+        self.assertEqual(cursor.description, DESC)
+        self.assertEqual(cursor.fetchmany(1), [(1,)])
+        self.assertEqual(cursor.fetchmany(5), [(2,)])
+        self.assertEqual(cursor.fetchmany(5), [])
+
+        self.assertIsNone(cache.get(cache.key(1, "SELECT a FROM t",
+                                                 [('X', 2)])))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_lru_eviction(self):
+        cache = ResultCache()
+        rows = tuple((i,) for i in range(10))
+        cache.maxbytes = sizeof(rows)*2
+
+        cache.put('a', DESC, rows)
+        cache.put('b', DESC, rows)
+        cache.get('a')
+        cache.put('c', DESC, rows)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertLessEqual(cache.size, cache.maxbytes)
+
+    def test_ttl(self):
+        cache = ResultCache(ttl=-1)
+        cache.put('a', DESC, ())
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_session(self):
+        cache = ResultCache()
+        cache.put(cache.key(1, "SELECT 1"), DESC, ())
+        cache.put(cache.key(2, "SELECT 1"), DESC, ())
+
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(cache.key(1, "SELECT 1")))
+        self.assertIsNotNone(cache.get(cache.key(2, "SELECT 1")))
+
+    def test_record(self):
+        cache = ResultCache()
+        source = CachedCursor(DESC, ((1,), (2,), (3,)))
+        cursor = cache.record('k', source)
+
+        self.assertEqual(cursor.fetchmany(2), [(1,), (2,)])
+        self.assertIsNone(cache.get('k')) # not entirely fetched yet
+        cursor.fetchmany(2)
+        cursor.fetchmany(2)
+
+        self.assertEqual(cache.get('k').fetchall(), [(1,), (2,), (3,)])
@@ -0,0 +1,65 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+
+from sqlm.compress import compression, open_input, PipedStream
+from sqlm.console import FileInputStream
+
+_LINES = ["line {:d}\n".format(i) for i in range(50000)]
+
+class CompressTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, name, module=None):
+        path = os.path.join(self.dir.name, name)
+        data = "".join(_LINES).encode()
+        with open(path, 'wb') as f:
+            f.write(module.compress(data) if module else data)
+
+        return path
+
+    def test_compression(self):
+        tc = ( # name           # module    # expected
+            ('a.txt',           None,       None),
+            ('a.gz',            gzip,       'gzip'),
+            ('a.TXT.BZ2',       bz2,        'bz2'),
+            ('a.xz',            lzma,       'lzma'),
+            ('gzip.dat',        gzip,       'gzip'),
+            ('bzip2.dat',       bz2,        'bz2'),
+            ('xz.dat',          lzma,       'lzma'),
+        )
+        for name, module, expected in tc:
+            path = self.write(name, module)
+            self.assertEqual(compression(path), expected, name)
+
+    def test_open_input(self):
+        for name, module in (('a.txt', None), ('a.gz', gzip),
+                             ('a.bz2', bz2), ('a.dat', lzma)):
+            path = self.write(name, module)
+            for depth in (0, 2):
+                with open_input(path, depth) as f:
+                    self.assertEqual(f.readlines(), _LINES, name)
+
+    def test_close(self):
+        path = self.write('a.gz', gzip)
+        f = open_input(path, 1)
+        self.assertEqual(f.readline(), _LINES[0])
+        f.close()
+        self.assertTrue(f.closed)
+
+    def test_piped_stream(self):
+        path = self.write('a.txt')
+        with PipedStream(open(path, 'rb'), 2, 7) as f:
+            self.assertEqual(f.read(), "".join(_LINES).encode())
+
+    def test_file_input_stream(self):
+        path = self.write('script.sql.xz', lzma)
+        stream = FileInputStream(path)
+        self.assertEqual(list(stream.reader()), _LINES)
@@ -0,0 +1,119 @@
+import contextlib
+import gc
+import io
+import os
+import signal
+import sqlite3
+import tempfile
+import threading
+import unittest
+import warnings
+
+import sqlmoins
+
+class BatchTestCase(unittest.TestCase):
+    def script(self, *lines):
+        fd, path = tempfile.mkstemp(suffix='.sql')
+        with os.fdopen(fd, 'wt') as f:
+            f.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def run_script(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = sqlmoins.main(list(args))
+
+        return status, out.getvalue(), err.getvalue()
+
+    def test_status(self):
+        status, out, err = self.run_script('-f', self.script("SELECT 1;"),
+                                           'sqlite://:/:memory:')
+        self.assertEqual(status, 0)
+        self.assertIn("1 row.", out)
+
+        status, out, err = self.run_script('-f', self.script("SELECT x;"),
+                                           'sqlite://:/:memory:')
+        self.assertEqual(status, 1)
+        self.assertIn("OperationalError", err)
+
+    def database(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT count(*) FROM t").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_commit_at_end(self):
+        path = self.database()
+        inserts = ["INSERT INTO t VALUES ({:d});".format(n)
+                        for n in range(150)]
+        status, out, err = self.run_script(
+                                '-f', self.script("CREATE TABLE t (n);",
+                                                  "SET COMMITEVERY 100",
+                                                  *inserts),
+                                'sqlite://:/' + path)
+        self.assertEqual(status, 0)
+        self.assertEqual(self.count(path), 150)
+
+        status, out, err = self.run_script(
+                                '-f', self.script("SET AUTOCOMMIT OFF",
+                                                  *inserts[:10],
+                                                  "QUIT"),
+                                'sqlite://:/' + path)
+        self.assertEqual(status, 0)
+        self.assertIn("rolling back 10 uncommitted statements", err)
+        self.assertEqual(self.count(path), 150)
+
+    def test_quit_closes_script(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            status, out, err = self.run_script('-f',
+                                               self.script("SELECT 1;",
+                                                           "QUIT",
+                                                           "SELECT 2;"),
+                                               'sqlite://:/:memory:')
+            gc.collect()
+        self.assertEqual(status, 0)
+        self.assertNotIn("2 row", out)
+        self.assertEqual([w for w in caught
+                            if issubclass(w.category, ResourceWarning)], [])
+
+    def test_interrupted(self):
+        path = self.database()
+        script = self.script(
+            "CREATE TABLE t (n);",
+            "SET AUTOCOMMIT OFF",
+            "INSERT INTO t VALUES (1);",
+            "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM c)"
+                " SELECT count(*) FROM c;",
+            "SELECT 'not run';")
+
+        # Ctrl-C while the endless query is running
+        timer = threading.Timer(0.3, signal.pthread_kill,
+                                (threading.main_thread().ident,
+                                 signal.SIGINT))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        status, out, err = self.run_script('-f', script,
+                                           'sqlite://:/' + path)
+        self.assertEqual(status, 130)
+        self.assertIn("Statement cancelled", err)
+        self.assertNotIn("not run", out)
+        # The session was ended
+        self.assertIn("rolling back 1 uncommitted statement", err)
+
+    def test_connection_failure(self):
+        status, out, err = self.run_script('-f', self.script("SELECT 1;"),
+                                           'sqlite://:/no/such/dir/x.db')
+        self.assertEqual(status, 1)
+        self.assertIn("OperationalError", err)
+        self.assertNotIn("1 row.", out)
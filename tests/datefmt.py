@@ -0,0 +1,70 @@
+import unittest
+from datetime import date, datetime
+
+from sqlm import datefmt
+
+class ParserTestCase(unittest.TestCase):
+    def test_parser(self):
+        tc = ( # mask                       # value             # expected
+            ('YYYY-MM-DD',                  '2014-10-12',       date(2014, 10, 12)),
+            ('YYYY-MM-DD',                  '2014-1-2',         date(2014, 1, 2)),
+            ('DD/MM/YYYY',                  '12/10/2014',       date(2014, 10, 12)),
+            ('DD-MON-YY',                   '12-oct-14',        date(2014, 10, 12)),
+            ('DD-MON-YY',                   '12-OCT-98',        date(1998, 10, 12)),
+            ('YYYY-MM-DD HH24:MI:SS',       '2014-10-12 23:05:01',
+                                            datetime(2014, 10, 12, 23, 5, 1)),
+            ('YYYY-MM-DD"T"HH24:MI:SS.FF',  '2014-10-12T23:05:01.5',
+                                            datetime(2014, 10, 12, 23, 5, 1, 500000)),
+            ('MM/DD/YYYY HH:MI AM',         '10/12/2014 12:05 AM',
+                                            datetime(2014, 10, 12, 0, 5)),
+            ('MM/DD/YYYY HH:MI PM',         '10/12/2014 01:05 pm',
+                                            datetime(2014, 10, 12, 13, 5)),
+        )
+        for mask, value, expected in tc:
+            self.assertEqual(datefmt.parser(mask)(value), expected, mask)
+
+    def test_invalid(self):
+        parse = datefmt.parser('YYYY-MM-DD')
+        for value in ('2014-13-01', '2014-10-12 10:00', '12/10/2014', 'NULL'):
+            with self.assertRaises(ValueError, msg=value):
+                parse(value)
+
+    def test_hastime(self):
+        self.assertFalse(datefmt.hastime('YYYY-MM-DD'))
+        self.assertTrue(datefmt.hastime('YYYY-MM-DD HH24:MI'))
+        self.assertFalse(datefmt.hastime('DD "HH" MM YYYY'))
+
+class FormatterTestCase(unittest.TestCase):
+    def test_formatter(self):
+        value = datetime(2014, 10, 2, 13, 5, 1, 123456)
+        tc = ( # mask                       # expected
+            ('YYYY-MM-DD HH24:MI:SS',       '2014-10-02 13:05:01'),
+            ('DD-MON-YY',                   '02-OCT-14'),
+            ('DD/MM/YYYY HH:MI AM',         '02/10/2014 01:05 PM'),
+            ('YYYY-MM-DD"T"HH24:MI:SS.FF3', '2014-10-02T13:05:01.123'),
+            ('HH24:MI:SS.FF',               '13:05:01.123456'),
+            ('SS.FF9',                      '01.123456000'),
+            ('"{YYYY}" YYYY',               '{YYYY} 2014'),
+        )
+        for mask, expected in tc:
+            self.assertEqual(datefmt.formatter(mask)(value), expected, mask)
+
+    def test_date(self):
+        fmt = datefmt.formatter('YYYY-MM-DD HH24:MI')
+        self.assertEqual(fmt(date(2014, 10, 2)), '2014-10-02 00:00')
+        self.assertEqual(fmt('n/a'), 'n/a')
+
+    def test_roundtrip(self):
+        mask = 'DD-MON-YYYY HH:MI:SS.FF6 PM'
+        value = datetime(1998, 1, 31, 0, 59, 3, 10)
+        text = datefmt.formatter(mask)(value)
+        self.assertEqual(datefmt.parser(mask)(text), value)
+
+    def test_width(self):
+        self.assertEqual(datefmt.width('YYYY-MM-DD HH24:MI:SS'), 19)
+        self.assertEqual(datefmt.width('DD-MON-YY'), 9)
+        self.assertEqual(datefmt.width(datefmt.TIMESTAMP_MASK), 26)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            datefmt.formatter('nothing here')
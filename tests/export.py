@@ -0,0 +1,226 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlm.cache import CachedCursor
+from sqlm.engine import Engine
+from sqlm.resultset import LOB_CHUNK_SIZE, ResultSet
+from sqlm import export
+
+class FakeLob:
+    """Driver LOB object"""
+    def __init__(self, text):
+        self.text = text
+        self.amounts = [] # size of each read
+
+    def size(self):
+        return len(self.text)
+
+    def read(self, offset=1, amount=None):
+        self.amounts.append(amount)
+        return self.text[offset-1:offset-1+amount if amount else None]
+
+class BoundsTestCase(unittest.TestCase):
+    def test_bounds(self):
+        self.assertEqual(export.bounds(0, 100, 4), [25, 50, 75])
+        self.assertEqual(export.bounds(1, 2, 4), [2])
+        self.assertEqual(export.bounds(5, 5, 4), [])
+        self.assertEqual(export.bounds(0.0, 1.0, 2), [0.5])
+        self.assertEqual(export.bounds(date(2014, 1, 1), date(2014, 1, 5), 2),
+                         [date(2014, 1, 3)])
+        with self.assertRaises(ValueError):
+            export.bounds('a', 'z', 2)
+
+    def test_text(self):
+        self.assertEqual(export.text(None), 'NULL')
+        self.assertEqual(export.text(date(2014, 10, 12)), '2014-10-12')
+        self.assertEqual(export.text(1.5), '1.5')
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+        self.engine = Engine('sqlite://:/' + self.path('test.db'))
+        self.addCleanup(self.engine.close)
+        self.engine.conn.execute("CREATE TABLE t (n INTEGER, s TEXT)")
+        self.engine.conn.executemany("INSERT INTO t VALUES (?, ?)",
+                                     [(i, "v{:d}".format(i))
+                                        for i in range(1000)] + [(None, 'x')])
+        self.engine.conn.commit()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def lines(self, paths):
+        result = []
+        for path in paths:
+            with open(path) as f:
+                self.assertEqual(f.readline(), "n\ts\n")
+                result.extend(f.read().splitlines())
+
+        return result
+
+    def test_plan(self):
+        slices = export.plan(self.engine, "SELECT * FROM t", "n", 4)
+        self.assertEqual(len(slices), 4)
+        self.assertEqual([params for sql, params in slices],
+                         [dict(hi=250), dict(lo=250, hi=500),
+                          dict(lo=500, hi=750), dict(lo=750)])
+
+        self.assertEqual(export.plan(self.engine, "SELECT * FROM t", None, 4),
+                         [("SELECT * FROM t", {})])
+
+        with self.assertRaises(ValueError):
+            export.plan(self.engine, "SELECT * FROM t ORDER BY n", "ROWID", 2)
+
+    def test_export(self):
+        count, paths = export.export(self.engine, self.path('t.tsv'),
+                                     "SELECT * FROM t", 3, "n")
+        self.assertEqual(count, 1001)
+        self.assertEqual(len(paths), 3)
+        self.assertEqual(sorted(self.lines(paths)),
+                         sorted(["{0:d}\tv{0:d}".format(i)
+                                    for i in range(1000)] + ["NULL\tx"]))
+
+    def test_merge(self):
+        path = self.path('t.tsv')
+        for key in ('n', 'ROWID'):
+            count, paths = export.export(self.engine, path,
+                                         "SELECT n, s FROM t WHERE n >= 10",
+                                         4, key, merge=True)
+            self.assertEqual(paths, [path])
+            self.assertEqual(self.lines(paths),
+                             ["{0:d}\tv{0:d}".format(i)
+                                for i in range(10, 1000)])
+        self.assertEqual(sorted(os.listdir(self.dir.name)), ['t.tsv', 'test.db'])
+
+    def test_merge_nulls(self):
+        path = self.path('t.tsv')
+        slices = export.plan(self.engine, "SELECT * FROM t", "n", 4,
+                             order=True)
+        self.assertIn("IS NULL", slices[-1][0])
+
+        count, paths = export.export(self.engine, path, "SELECT * FROM t",
+                                     4, "n", merge=True)
+        self.assertEqual(count, 1001)
+        # SQLite sorts NULL first: they are explicitly put last
+        self.assertEqual(self.lines(paths),
+                         ["{0:d}\tv{0:d}".format(i) for i in range(1000)]
+                            + ["NULL\tx"])
+
+    def test_merge_once(self):
+        # The rows are written once, straight into the target
+        opened = []
+        real_open = open
+        def tracking_open(path, mode='r', *args, **kwargs):
+            if 'w' in mode:
+                opened.append(os.path.basename(path))
+            return real_open(path, mode, *args, **kwargs)
+
+        with mock.patch('builtins.open', tracking_open):
+            export.export(self.engine, self.path('t.tsv'), "SELECT * FROM t",
+                          4, "n", merge=True)
+        self.assertEqual(opened, ['t.tsv'])
+
+    def test_cancel(self):
+        engines = []
+        class TracingEngine(Engine):
+            def __init__(self, params):
+                super().__init__(params)
+                self.cancelled = threading.Event()
+                engines.append(self)
+
+            def cancel(self):
+                self.cancelled.set()
+                super().cancel()
+
+        def slow(engine, *args):
+            # A long statement, stopped by cancel
+            engine.cancelled.wait(5)
+            return execute(engine, *args)
+        execute = export._execute
+
+        def interrupted(future, timeout=None):
+            # Ctrl-C once all the slices are connected
+            deadline = time.monotonic() + 5
+            while len(engines) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            raise KeyboardInterrupt
+
+        path = self.path('t.tsv')
+        with mock.patch.object(export, 'Engine', TracingEngine), \
+             mock.patch.object(export, '_execute', slow), \
+             mock.patch.object(Future, 'result', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                export.export(self.engine, path, "SELECT * FROM t", 3, "n",
+                              merge=True)
+
+        self.assertEqual([e.cancelled.is_set() for e in engines], [True]*3)
+        self.assertFalse(os.path.exists(path))
+
+    def test_not_a_query(self):
+        path = self.path('t.tsv')
+        with self.assertRaises(ValueError):
+            export.export(self.engine, path, "DELETE FROM t")
+
+        # Rejected before being executed
+        self.assertEqual(self.engine.conn.execute(
+                            "SELECT count(*) FROM t").fetchone(), (1001,))
+        self.assertFalse(os.path.exists(path))
+
+    def test_memory(self):
+        # The slices can't be run on other connections
+        engine = Engine('sqlite://:/:memory:')
+        self.addCleanup(engine.close)
+        engine.conn.execute("CREATE TABLE t (n INTEGER, s TEXT)")
+        engine.conn.executemany("INSERT INTO t VALUES (?, ?)",
+                                [(i, "v{:d}".format(i)) for i in range(100)])
+
+        count, paths = export.export(engine, self.path('t.tsv'),
+                                     "SELECT * FROM t", 3, "n")
+        self.assertEqual(count, 100)
+        self.assertEqual(len(paths), 3)
+        self.assertEqual(sorted(self.lines(paths)),
+                         sorted("{0:d}\tv{0:d}".format(i) for i in range(100)))
+
+    def test_lobs(self):
+        text = "x" * 1000
+        cursor = CachedCursor((('n', None, None, None, None, None, None),
+                               ('s', None, None, None, None, None, None)),
+                              [(1, FakeLob(text)), (2, None)])
+        statement = SimpleNamespace(
+                        execute=lambda: ResultSet(cursor, lobs=[1]))
+        engine = SimpleNamespace(dialect=SimpleNamespace(
+                                    prepare=lambda conn, sql: statement),
+                                 conn=None)
+
+        path = self.path('t.tsv')
+        count, stats = export._export(engine, "SELECT * FROM t", {}, path, 10)
+        self.assertEqual(count, 2)
+        self.assertEqual(self.lines([path]), ["1\t" + text, "2\tNULL"])
+
+    def test_lobs_streamed(self):
+        text = "".join(chr(ord('a') + i % 26) for i in range(3*LOB_CHUNK_SIZE))
+        lob = FakeLob(text)
+        cursor = CachedCursor((('s', None, None, None, None, None, None),),
+                              [(lob,)])
+        statement = SimpleNamespace(
+                        execute=lambda: ResultSet(cursor, lobs=[0]))
+        engine = SimpleNamespace(dialect=SimpleNamespace(
+                                    prepare=lambda conn, sql: statement),
+                                 conn=None)
+
+        path = self.path('t.tsv')
+        export._export(engine, "SELECT * FROM t", {}, path, 10)
+        with open(path) as f:
+            self.assertEqual(f.read(), "s\n" + text + "\n")
+        # Read by chunks, never as a whole
+        self.assertLessEqual(max(lob.amounts), LOB_CHUNK_SIZE)
+        self.assertGreater(len(lob.amounts), 3)
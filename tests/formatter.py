@@ -1,6 +1,16 @@
+import contextlib
+import io
+import os
+import signal
 import unittest
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from decimal import Decimal
 
 from sqlm.formatter import *
+from sqlm.cache import CachedCursor
+from sqlm.interpreter import Environment
+from sqlm.resultset import ResultSet
 
 class PEP249:
     # Dummy PEP-249 type objects
@@ -69,6 +79,13 @@ class ColumnTestCase(unittest.TestCase):
         self.assertEqual(cl[0].name, cd[0][0])
         self.assertEqual(cl[1].name, cd[1][0])
 
+    def test_DATE_column(self):
+        col = Column(*PEP249_DATE)
+        self.assertTrue(col.isDate())
+        self.assertFalse(col.isNumber())
+        self.assertEqual(col.mask, 'YYYY-MM-DD HH24:MI:SS')
+        self.assertIsNone(Column(*PEP249_VARCHAR_20).mask)
+
 class PageTestCase(unittest.TestCase):
     def test_page(self):
         colA = Column(*PEP249_NUMBER_10)
@@ -120,6 +137,19 @@ class PageTestCase(unittest.TestCase):
         self.assertEqual(exp, result)
 
 
+    def test_page_dates(self):
+        colA = Column(*PEP249_DATE)
+        colB = Column(*PEP249_VARCHAR_20)
+        colA.mask = 'DD-MON-YY'
+
+        page = Page([colA, colB])
+        page.append([datetime(2014, 10, 2), 'a'])
+        page.append([None, 'b'])
+
+        self.assertEqual(page.formats(), [('DD-MON-YY', 9), ('X', 1)])
+        self.assertEqual(list(page.formated().rows()),
+                         [['02-OCT-14', 'a'], ['     NULL', 'b']])
+
 
 class ToCharTestCase(unittest.TestCase):
     def test_to_char_null_format(self):
@@ -168,3 +198,67 @@ class DecimalTestCase(unittest.TestCase):
             self.assertEqual(expected_integral, integral, 'while testing '+data)
             self.assertEqual(expected_fractional, fractional, 'while testing '+data)
 
+
+class FormatWorkersTestCase(unittest.TestCase):
+    def pages(self, workers, pagesize):
+        env = Environment()
+        env.formatworkers = workers
+        rows = [(str(i), 'v' * (i % 7), str(i / 8), datetime(2014, 10, 12))
+                    for i in range(5000)]
+        cursor = CachedCursor((PEP249_NUMBER_14_2, PEP249_VARCHAR_20,
+                               PEP249_NUMBER_14_2, PEP249_DATE), rows)
+
+        return [[line for lines in page for line in lines]
+                    for page in TabularFormatter().pages(env,
+                                                         ResultSet(cursor),
+                                                         pagesize)]
+
+    def test_same_output(self):
+        for pagesize in (0, 1500):
+            self.assertEqual(self.pages(2, pagesize), self.pages(0, pagesize))
+
+    def test_ignore_sigint(self):
+        executor = get_executor(2)
+        self.assertEqual(executor.submit(signal.getsignal,
+                                         signal.SIGINT).result(),
+                         signal.SIG_IGN)
+
+    def test_broken_pool(self):
+        expected = self.pages(0, 0)
+        get_executor(2).submit(os._exit, 1)
+        with self.assertRaises(BrokenProcessPool):
+            self.pages(2, 0)
+
+        # A new pool is started
+        self.assertEqual(self.pages(2, 0), expected)
+
+    def test_pager_ahead(self):
+        env = Environment()
+        env.formatworkers = 2
+        env.arraysize = 100
+        cursor = CachedCursor((PEP249_NUMBER_10,),
+                              [(str(i),) for i in range(1000)])
+
+        pager = Pager(TabularFormatter(), env, ResultSet(cursor), 100)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            pager.show()
+        self.assertIn(" 99 ", out.getvalue())
+        # The page displayed and the next one
+        self.assertEqual(cursor._pos, 200)
+        pager.close()
+
+    def test_format_lines(self):
+        self.assertEqual(format_lines([('9.9', 4), ('XX', 2)],
+                                      [('1.5', 'a'), (None, 'bc')]),
+                         ['  1.5 |  a ', ' NULL | bc '])
+
+class DisplayTestCase(unittest.TestCase):
+    def test_chunks(self):
+        env = Environment()
+        rows = [(str(i), 'v' * (i % 7)) for i in range(5000)]
+        cursor = CachedCursor((PEP249_NUMBER_10, PEP249_VARCHAR_20), rows)
+
+        page, = TabularFormatter().pages(env, ResultSet(cursor))
+        chunks = [len(lines) for lines in page]
+        self.assertEqual(chunks, [FORMAT_CHUNK_SIZE+2, FORMAT_CHUNK_SIZE,
+                                  5000 - 2*FORMAT_CHUNK_SIZE])
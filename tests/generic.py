@@ -0,0 +1,78 @@
+import unittest
+
+from sqlm.engine import Engine, get_dialect
+from sqlm.dialects.generic import GenericDialect, bindnames, translate
+
+class BindNamesTestCase(unittest.TestCase):
+    def test_bindnames(self):
+        tc = ( # statement                              # bind names
+            ("SELECT * FROM t WHERE a = :a",            ['A']),
+            ("SELECT :x, :Y, :x FROM t",                ['X', 'Y']),
+            ("SELECT ':a', \":b\", [:c] FROM t",        []),
+            ("SELECT 1 -- :a\n, :b /* :c */ FROM t",    ['B']),
+            ("SELECT 'it''s :a', :b FROM t",            ['B']),
+            ("SELECT x::text FROM t",                   []),
+        )
+        for stmt, expected in tc:
+            self.assertEqual(bindnames(stmt)[0], expected, stmt)
+
+    def test_spellings(self):
+        names, spellings = bindnames("SELECT :id, :ID FROM t")
+        self.assertEqual(names, ['ID'])
+        self.assertEqual(spellings, {'ID': ['id', 'ID']})
+
+    def test_translate(self):
+        stmt = "SELECT ':a', :a, :b, :a FROM t WHERE s LIKE '5%'"
+        tc = ( # paramstyle     # statement, positions
+            ('named',       (stmt, None)),
+            ('qmark',       ("SELECT ':a', ?, ?, ? FROM t WHERE s LIKE '5%'",
+                             ['a', 'b', 'a'])),
+            ('numeric',     ("SELECT ':a', :1, :2, :1 FROM t WHERE s LIKE '5%'",
+                             ['a', 'b'])),
+            ('format',      ("SELECT ':a', %s, %s, %s FROM t WHERE s LIKE '5%%'",
+                             ['a', 'b', 'a'])),
+            ('pyformat',    ("SELECT ':a', %(a)s, %(b)s, %(a)s FROM t "
+                             "WHERE s LIKE '5%%'", None)),
+        )
+        for paramstyle, expected in tc:
+            self.assertEqual(translate(stmt, paramstyle), expected, paramstyle)
+
+class GenericDialectTestCase(unittest.TestCase):
+    def setUp(self):
+        # sqlite3 used through the generic dialect
+        self.engine = Engine(dict(dialect='sqlite3', db=':memory:'))
+        self.engine.prepare("CREATE TABLE t (n INTEGER, s TEXT)").execute()
+
+    def test_fallback(self):
+        dialect = get_dialect('sqlite3')
+        self.assertTrue(issubclass(dialect, GenericDialect))
+        self.assertEqual(dialect.driver, 'sqlite3')
+
+    def test_detect(self):
+        self.assertEqual(self.engine.dialect.capabilities(),
+                         dict(paramstyle='qmark',
+                              fast_executemany=True,
+                              arraysize=1,
+                              multirow_values=True))
+
+    def test_bind(self):
+        stmt = self.engine.prepare("INSERT INTO t VALUES (:n, :s)")
+        stmt.executemany([(i, str(i)) for i in range(5)])
+
+        stmt = self.engine.prepare("SELECT s FROM t WHERE n = :n OR n = :N+1")
+        stmt.bind('n', 'NUMBER', '2')
+        self.assertEqual(list(stmt.execute()), [('2',), ('3',)])
+
+    def test_bulk_insert(self):
+        for fast in (True, False):
+            dialect = self.engine.dialect
+            dialect.fast_executemany = fast
+            dialect.multirow_size = 7
+
+            self.engine.prepare("DELETE FROM t").execute()
+            count = dialect.bulkInsert(self.engine.conn, 't', ('n', 's'),
+                                       ((i, None) for i in range(100)))
+            self.assertEqual(count, 100)
+
+            result = self.engine.prepare("SELECT count(n), count(s) FROM t")
+            self.assertEqual(list(result.execute()), [(100, 0)])
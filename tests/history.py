@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from sqlm.history import History
+from sqlm.stats import Stats
+
+class HistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_list_like(self):
+        history = History()
+        history.append("SELECT 1")
+        history.append("SELECT 2")
+
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history[-1], "SELECT 2")
+        self.assertEqual(history[0:], ["SELECT 1", "SELECT 2"])
+
+    def test_persistence(self):
+        history = History(self.path)
+        stats = Stats()
+        stats.count('rows', 3)
+        history.append("SELECT 1\nFROM DUAL", stats)
+        history.append("DELETE FROM t")
+        history.close()
+
+        history = History(self.path)
+        self.assertEqual(history[0:], ["SELECT 1\nFROM DUAL", "DELETE FROM t"])
+        self.assertEqual(history.entry(0).rows, 3)
+        self.assertIsNotNone(history.entry(0).duration)
+        self.assertIsNone(history.entry(1).duration)
+
+    def test_only_recent_entries_are_loaded(self):
+        history = History(self.path)
+        for i in range(5000):
+            history.append("SELECT {:d} FROM t".format(i))
+        history.close()
+
+        history = History(self.path, limit=10)
+        self.assertEqual(len(history), 10)
+        self.assertEqual(history[0], "SELECT 4990 FROM t")
+        self.assertEqual(history[-1], "SELECT 4999 FROM t")
+
+    def test_search(self):
+        history = History()
+        for stmt in ("SELECT * FROM emp",
+                     "select ename from EMP where deptno = 10",
+                     "DELETE FROM emp",
+                     "SELECT * FROM dept"):
+            history.append(stmt)
+
+        self.assertEqual(history.search("from emp"), [0, 1, 2])
+        self.assertEqual(history.search("^select"), [0, 1, 3])
+        self.assertEqual(history.search("^del"), [2])
+        self.assertEqual(history.search("no such text"), [])
+        self.assertEqual(history.search("*"), [0, 3])
@@ -0,0 +1,366 @@
+import contextlib
+import gc
+import io
+import os
+import pstats
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlm.formatter import TabularFormatter, get_executor
+from sqlm.interpreter import Environment, Interpreter
+from sqlm.resultset import ResultSet
+
+class StartupTestCase(unittest.TestCase):
+    def test_lazy_imports(self):
+        modules = ('shutil', 'sqlm.export', 'sqlm.transfer',
+                   'concurrent.futures', 'sqlm.dialects.generic',
+                   'json', 'decimal', 'datetime', 'threading', 'queue')
+        code = "import sys, sqlm.interpreter; " \
+               "print([m for m in {!r} if m in sys.modules])".format(modules)
+        out = subprocess.run([sys.executable, '-c', code],
+                             cwd=os.path.dirname(os.path.dirname(
+                                                os.path.abspath(__file__))),
+                             stdout=subprocess.PIPE, check=True,
+                             universal_newlines=True).stdout
+        self.assertEqual(out.strip(), "[]")
+
+class InterpreterTestCase(unittest.TestCase):
+    """Interpreter connected to a SQLite database initialized
+    by the `setup` statements
+    """
+    setup = ()
+
+    def setUp(self):
+        self.env = Environment()
+        self.interpreter = Interpreter(None)
+        self.interpreter.doConnect(self.env, 'sqlite://:/' + self.database())
+        self.addCleanup(lambda: self.interpreter.engine.close())
+        self.push(*self.setup)
+
+    def database(self):
+        return ':memory:'
+
+    def tempfile(self, suffix):
+        """Return the path of a temporary file removed after the test"""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def push(self, *lines):
+        """Push lines to the interpreter. Returns the output"""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            for line in lines:
+                self.interpreter.push(self.env, line)
+
+        return out.getvalue()
+
+class TransactionTestCase(InterpreterTestCase):
+    setup = ("CREATE TABLE t (n INTEGER);",)
+
+    def database(self):
+        self.path = self.tempfile('.db')
+
+        return self.path
+
+    def committed(self, tbl="t"):
+        """Number of rows visible from another connection"""
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT count(*) FROM " + tbl).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_autocommit(self):
+        self.push("INSERT INTO t VALUES (1);")
+        self.assertEqual(self.committed(), 1)
+
+    def test_autocommit_off(self):
+        self.push("SET AUTOCOMMIT OFF",
+                  "INSERT INTO t VALUES (1);",
+                  "INSERT INTO t VALUES (2);")
+        self.assertEqual(self.committed(), 0)
+        self.assertEqual(self.interpreter.pending, 2)
+
+        self.push("COMMIT")
+        self.assertEqual(self.committed(), 2)
+        self.assertEqual(self.interpreter.pending, 0)
+
+        self.push("INSERT INTO t VALUES (3);", "ROLLBACK")
+        self.assertEqual(self.committed(), 2)
+
+    def test_commit_every(self):
+        self.push("SET COMMITEVERY 3")
+        for n in range(5):
+            self.push("INSERT INTO t VALUES ({:d});".format(n))
+        self.assertEqual(self.committed(), 3)
+        self.assertEqual(self.interpreter.pending, 2)
+
+        self.push("COMMIT;")
+        self.assertEqual(self.committed(), 5)
+        self.assertEqual(self.interpreter.pending, 0)
+
+    def test_load(self):
+        data = self.tempfile(".txt")
+        with open(data, "wt") as f:
+            f.write("n  s\n")
+            for n in range(10):
+                f.write("{:d}  {}\n".format(n, "NULL" if n % 3 else "x"))
+
+        self.push('CREATE TABLE u ("n" INTEGER, "s" TEXT);',
+                  "SET AUTOCOMMIT OFF",
+                  "LOAD u < " + data)
+        self.assertEqual(self.committed("u"), 0)
+        self.push("COMMIT")
+        self.assertEqual(self.committed("u"), 10)
+
+        self.push("SET AUTOCOMMIT ON", "SET COMMITEVERY 4",
+                  "LOAD u < " + data)
+        self.assertEqual(self.committed("u"), 20)
+
+    def test_load_invalidates_cache(self):
+        self.push('CREATE TABLE u ("n" INTEGER, "s" TEXT);',
+                  "SET RESULTCACHE ON")
+        self.assertIn(" 0 ", self.push("SELECT count(*) FROM u;"))
+        data = self.tempfile(".txt")
+        with open(data, "wt") as f:
+            f.write("n  s\n1  a\n2  b\n3  c\n")
+
+        self.push("LOAD u < " + data)
+        self.assertIn(" 3 ", self.push("SELECT count(*) FROM u;"))
+
+    def test_copy_invalidates_cache(self):
+        self.push('CREATE TABLE u ("n" INTEGER);',
+                  "INSERT INTO t VALUES (1), (2);",
+                  "SET RESULTCACHE ON")
+        self.assertIn(" 0 ", self.push("SELECT count(*) FROM u;"))
+
+        # Inserted by another connection to the same database
+        self.push("COPY TO sqlite://:/{} APPEND u "
+                  "USING SELECT n FROM t;".format(self.path))
+        self.assertIn(" 2 ", self.push("SELECT count(*) FROM u;"))
+
+class PagerTestCase(InterpreterTestCase):
+    setup = ("CREATE TABLE t (n INTEGER);",
+             "INSERT INTO t VALUES (1), (2), (3), (4), (5);",
+             "SET PAGER ON", "SET PAGESIZE 2", "SET ARRAYSIZE 2")
+
+    def test_pages(self):
+        self.env.input_stream = SimpleNamespace(interactive=True)
+        out = self.push("SELECT n FROM t ORDER BY n;")
+        self.assertIn(" 2 ", out)
+        self.assertNotIn(" 3 ", out)
+        self.assertNotIn("rows.", out)
+
+        out = self.push("NEXT")
+        self.assertIn(" 4 ", out)
+        self.assertNotIn(" 5 ", out)
+
+        out = self.push("")
+        self.assertIn(" 5 ", out)
+        self.assertIn("5 rows.", out)
+        self.assertIsNone(self.interpreter.pager)
+
+    def test_script(self):
+        # Empty lines don't page through the results in scripts
+        self.env.input_stream = SimpleNamespace(interactive=False)
+        self.push("SELECT n FROM t ORDER BY n;")
+        out = self.push("", "")
+        self.assertEqual(out, "")
+        self.assertIsNotNone(self.interpreter.pager)
+
+        out = self.push("NEXT")
+        self.assertIn(" 4 ", out)
+
+    def test_close(self):
+        self.push("SELECT n FROM t ORDER BY n;")
+        result = self.interpreter.pager.result
+
+        out = self.push("SELECT count(*) FROM t;")
+        self.assertIn(" 5 ", out)
+        self.assertIsNone(self.interpreter.pager)
+        self.assertLess(result.stats.counters['rows'], 5)
+
+class AutotraceTestCase(InterpreterTestCase):
+    setup = ("CREATE TABLE t (n INTEGER, s TEXT);",
+             "INSERT INTO t VALUES (1, 'one'), (2, 'two'), (3, 'three');")
+
+    def test_on(self):
+        out = self.push("SET AUTOTRACE ON", "SELECT s FROM t WHERE n > 1;")
+        self.assertIn("three", out)
+        self.assertIn("2 rows.", out)
+        self.assertIn("Execution Plan", out)
+        self.assertIn("SCAN", out)
+        self.assertIn("fetch", out)
+
+    def test_traceonly(self):
+        out = self.push("SET AUTOTRACE TRACEONLY", "SELECT s FROM t;")
+        self.assertNotIn("three", out)
+        self.assertIn("3 rows.", out)
+        self.assertIn("SCAN", out)
+        self.assertEqual(self.interpreter.stats.counters['rows'], 3)
+        self.assertNotIn('format', self.interpreter.stats.timers)
+
+    def test_session_stats(self):
+        self.push("SET AUTOTRACE TRACEONLY", "UPDATE t SET s = 'x';")
+        self.assertEqual(self.interpreter.stats.counters['changes'], 3)
+
+    def test_off(self):
+        out = self.push("SET AUTOTRACE ON", "SET AUTOTRACE OFF",
+                        "SELECT s FROM t;")
+        self.assertNotIn("Execution Plan", out)
+        self.assertIsNone(self.env.autotrace)
+
+class CopyTestCase(InterpreterTestCase):
+    setup = ("CREATE TABLE t (n INTEGER, s TEXT);",
+             "INSERT INTO t VALUES (1, 'one'), (2, 'two'), (3, NULL);")
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tempfile('.db')
+
+    def test_copy(self):
+        out = self.push("COPY TO sqlite://:/{} CREATE u "
+                        "USING SELECT * FROM t WHERE n > 1;".format(self.path))
+        self.assertIn("2 rows copied", out)
+
+        conn = sqlite3.connect(self.path)
+        try:
+            self.assertEqual(conn.execute("SELECT * FROM u ORDER BY n")
+                                 .fetchall(), [(2, 'two'), (3, None)])
+        finally:
+            conn.close()
+
+        out = self.push("COPY FROM sqlite://:/{} APPEND v "
+                        "USING SELECT s FROM u".format(self.path),
+                        "SELECT count(*) FROM v;")
+        self.assertIn("2 rows copied", out)
+        self.assertIn(" 2 ", out)
+
+class BindTestCase(InterpreterTestCase):
+    def test_in(self):
+        out = self.push("VAR x NUMBER IN = 5", "SELECT :x + 1 AS y;")
+        self.assertIn(" 6 ", out)
+        self.assertNotIn("X =", out)
+
+    def test_out(self):
+        # The value of OUT variables is not sent
+        out = self.push("VAR x NUMBER OUT = 5", "SELECT :x IS NULL AS z;")
+        self.assertIn(" 1 ", out)
+        self.assertIn("X = None", out)
+        self.assertEqual(self.env.bound('x'), ('NUMBER', None, 'OUT'))
+
+    def test_inout(self):
+        out = self.push("VAR x NUMBER = 5", "SELECT :x AS y;")
+        self.assertIn(" 5 ", out)
+        self.assertIn("X = 5", out)
+        self.assertEqual(self.env.bound('x'), ('NUMBER', 5, 'INOUT'))
+
+        self.push("VAR x NUMBER INOUT = 7")
+        self.assertEqual(self.env.bound('x'), ('NUMBER', '7', 'INOUT'))
+
+    def test_direction(self):
+        with self.assertRaises(Exception):
+            self.push("VAR x NUMBER BOTH = 5")
+
+class ProfileTestCase(InterpreterTestCase):
+    setup = ("CREATE TABLE t (n INTEGER);",
+             "INSERT INTO t VALUES (1), (2);")
+
+    def test_profile_to_file(self):
+        path = self.tempfile('.prof')
+        out = self.push("PROFILE TO {} SELECT n FROM t;".format(path))
+        self.assertIn("2 rows.", out)
+        self.assertIn("function calls", out)
+        self.assertIn("Peak memory", out)
+        self.assertIn("Profile saved to " + path, out)
+        self.assertIsNone(self.env.profiler)
+
+        functions = [fn for _, _, fn in pstats.Stats(path).stats]
+        self.assertIn('send', functions)
+
+    def test_profile_threads(self):
+        # The statement is executed and its rows fetched in other threads
+        path = self.tempfile('.prof')
+        self.push("SET PREFETCH 2")
+        self.push("PROFILE TO {} SELECT n FROM t;".format(path))
+
+        functions = [(os.path.basename(file), fn)
+                        for file, _, fn in pstats.Stats(path).stats]
+        self.assertIn(('generic.py', 'execute'), functions)
+        self.assertIn(('resultset.py', 'batches'), functions)
+
+    def test_profile_last_statement(self):
+        out = self.push("SELECT count(*) FROM t;", "PROFILE")
+        self.assertEqual(out.count("count(*)"), 2)
+        self.assertIn("function calls", out)
+
+def _interrupted(self):
+    """ResultSet.batches interrupted by Ctrl-C after the first batch"""
+    batches = _batches(self)
+    yield next(batches)
+    self.cancel()
+    raise KeyboardInterrupt
+
+_batches = ResultSet.batches
+
+class CancelTestCase(InterpreterTestCase):
+    setup = ("CREATE TABLE t (n INTEGER);",
+             "INSERT INTO t WITH RECURSIVE c(x) AS "
+                "(SELECT 1 UNION ALL SELECT x+1 FROM c WHERE x < 100) "
+                "SELECT x FROM c;",
+             "SET ARRAYSIZE 10")
+
+    def interrupt(self, *lines):
+        with mock.patch.object(ResultSet, 'batches', _interrupted), \
+             contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(KeyboardInterrupt):
+                self.push(*lines)
+
+    def test_cancel(self):
+        self.interrupt("SELECT n FROM t;")
+        # The session is still usable
+        self.assertIn(" 100 ", self.push("SELECT count(*) FROM t;"))
+        self.assertIn("100 rows.", self.push("SELECT n FROM t;"))
+
+    def test_display_error(self):
+        def format(formatter, page, stats):
+            raise RuntimeError("formatter failure")
+
+        for prefetch in (0, 2):
+            self.push("SET PREFETCH {:d}".format(prefetch), "SET PAGESIZE 10")
+            with mock.patch.object(TabularFormatter, 'format', format):
+                with self.assertRaises(RuntimeError):
+                    self.push("SELECT n FROM t;")
+            # Abandoned generators are closed
+            gc.collect()
+
+            # The cursor was released: the session is still usable
+            self.assertIn(" 100 ", self.push("SELECT count(*) FROM t;"))
+            self.assertIn("100 rows.", self.push("SELECT n FROM t;"))
+
+    def test_broken_pool(self):
+        self.push("SET FORMATWORKERS 2", "SET PREFETCH 2", "SET PAGESIZE 10")
+        with self.assertRaises(BrokenProcessPool):
+            get_executor(2).submit(os._exit, 1).result()
+
+        with self.assertRaises(BrokenProcessPool):
+            self.push("SELECT n FROM t;")
+        gc.collect()
+
+        # A new pool is started
+        self.assertIn("100 rows.", self.push("SELECT n FROM t;"))
+
+    def test_cancel_page(self):
+        self.push("SET PAGER ON", "SET PAGESIZE 5")
+        self.interrupt("SELECT n FROM t;", "NEXT", "NEXT")
+        self.assertIsNone(self.interpreter.pager)
+        self.assertIn(" 100 ", self.push("SELECT count(*) FROM t;"))
@@ -0,0 +1,151 @@
+import sys
+import types
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+def _driver():
+    """Fake cx_Oracle module: the dialect is tested with fake cursors,
+    only the names of the driver are needed
+    """
+    module = types.ModuleType('cx_Oracle')
+    for name in ('BINARY', 'BFILE', 'BLOB', 'CLOB', 'CURSOR', 'DATETIME',
+                 'FIXED_CHAR', 'INTERVAL', 'LOB', 'LONG_BINARY',
+                 'LONG_STRING', 'NATIVE_FLOAT', 'NCLOB', 'NUMBER', 'OBJECT',
+                 'ROWID', 'STRING', 'TIMESTAMP'):
+        setattr(module, name, type(name, (), {}))
+    module.DatabaseError = type('DatabaseError', (Exception,), {})
+
+    return module
+
+try:
+    import cx_Oracle
+    from sqlm.dialects import oracle
+except ImportError:
+    with mock.patch.dict(sys.modules, cx_Oracle=_driver()):
+        from sqlm.dialects import oracle
+
+class _Var:
+    def __init__(self, datatype):
+        self.datatype = datatype
+        self.value = None
+
+    def setvalue(self, pos, value):
+        self.value = value
+
+    def getvalue(self):
+        return self.value
+
+class _Cursor:
+    description = None
+    rowcount = -1
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.vars = []
+
+    def prepare(self, stmt):
+        self.stmt = stmt
+
+    def bindnames(self):
+        return ['X']
+
+    def var(self, datatype):
+        var = _Var(datatype)
+        self.vars.append(var)
+        return var
+
+    def execute(self, stmt, params):
+        self.connection.log.append(('execute', dict(params)))
+
+    def executemany(self, stmt, rows):
+        if stmt and 'APPEND_VALUES' in stmt:
+            self.connection.log.append(('direct', len(rows)))
+        else:
+            self.connection.log.append(('executemany', len(rows)))
+
+    def close(self):
+        pass
+
+class _Connection:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.log.append(('commit',))
+
+    def rollback(self):
+        self.log.append(('rollback',))
+
+    def cancel(self):
+        pass
+
+class StatementTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = _Connection()
+        self.stmt = oracle.Statement(None, self.connection,
+                                     "BEGIN :x := :x + 1; END;")
+
+    def test_reused_buffer(self):
+        self.stmt.bind('x', 'NUMBER', '5')
+        var = self.stmt.bindparams['X']
+        self.assertIs(var.datatype, oracle.cx_Oracle.NUMBER)
+        self.assertEqual(self.stmt['x'], Decimal('5'))
+        self.stmt.execute()
+
+        self.stmt.bind('x', 'NUMBER', '7')
+        self.assertIs(self.stmt.bindparams['X'], var)
+        self.assertEqual(self.stmt['x'], Decimal('7'))
+
+        # A new buffer for a new type
+        self.stmt.bind('x', 'VARCHAR2', 'abc')
+        self.assertIsNot(self.stmt.bindparams['X'], var)
+        self.assertEqual(len(self.stmt.cursor.vars), 2)
+
+    def test_out(self):
+        self.stmt.bind('x', 'NUMBER', '5')
+        # The value of OUT variables is not sent
+        self.stmt.bind('x', 'NUMBER', '5', 'OUT')
+        self.assertIsNone(self.stmt['x'])
+
+    def test_executemany(self):
+        self.stmt.executemany([(1,), (2,)])
+        self.assertEqual(self.connection.log, [('executemany', 2)])
+
+class BulkInsertTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = _Connection()
+        self.dialect = oracle.OracleDialect.__new__(oracle.OracleDialect)
+        self.dialect.executemany_size = 3
+
+    def insert(self, rows, commit=True):
+        return self.dialect.bulkInsert(self.connection, 't', ('n',),
+                                       rows, commit=commit)
+
+    def test_direct_path(self):
+        self.assertEqual(self.insert([(i,) for i in range(3)]), 3)
+        self.assertEqual(self.connection.log, [('direct', 3), ('commit',)])
+
+    def test_committed_once(self):
+        self.assertEqual(self.insert(((i,) for i in range(7))), 7)
+        self.assertEqual(self.connection.log, [('executemany', 3),
+                                               ('executemany', 3),
+                                               ('executemany', 1),
+                                               ('commit',)])
+
+    def test_not_committed(self):
+        self.assertEqual(self.insert([(1,), (2,)], commit=False), 2)
+        self.assertEqual(self.connection.log, [('executemany', 2)])
+
+    def test_rollback(self):
+        def rows():
+            yield from ((i,) for i in range(5))
+            raise ValueError("bad row")
+
+        with self.assertRaises(ValueError):
+            self.insert(rows())
+        self.assertEqual(self.connection.log, [('executemany', 3),
+                                               ('rollback',)])
@@ -0,0 +1,84 @@
+import signal
+import threading
+import time
+import unittest
+
+from sqlm.pipeline import prefetch, interruptible
+
+class PrefetchTestCase(unittest.TestCase):
+    def test_items_are_returned_in_order(self):
+        for depth in (0, 1, 3):
+            self.assertEqual(list(prefetch(range(100), depth)),
+                             list(range(100)), depth)
+
+    def test_producer_errors_are_reraised(self):
+        def failing():
+            yield 1
+            raise KeyError("boom")
+
+        it = prefetch(failing(), 2)
+        self.assertEqual(next(it), 1)
+        with self.assertRaises(KeyError):
+            next(it)
+
+    def test_close_cancels_the_producer(self):
+        cancelled = []
+        for depth in (0, 2):
+            it = prefetch(iter(range(100)), depth,
+                          cancel=lambda: cancelled.append(depth))
+            next(it)
+            it.close()
+
+        self.assertEqual(cancelled, [0, 2])
+
+    def test_errors_dont_cancel(self):
+        def failing():
+            yield 1
+            raise KeyError("boom")
+
+        cancelled = []
+        for depth in (0, 2):
+            with self.assertRaises(KeyError):
+                list(prefetch(failing(), depth,
+                              cancel=lambda: cancelled.append(depth)))
+
+        # Cancelling would leave the session interrupted (SQLite)
+        self.assertEqual(cancelled, [])
+
+    def test_close_stops_the_producer(self):
+        produced = []
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        it = prefetch(items(), 2)
+        self.assertEqual(next(it), 0)
+        it.close()
+
+        # At most `depth` items queued + one being put + one consumed
+        self.assertLess(len(produced), 10)
+
+class InterruptibleTestCase(unittest.TestCase):
+    def test_return_value(self):
+        self.assertEqual(interruptible(sum, (1, 2, 3)), 6)
+
+    def test_errors_are_reraised(self):
+        with self.assertRaises(ZeroDivisionError):
+            interruptible(lambda: 1/0)
+
+    def test_cancel(self):
+        cancelled = threading.Event()
+        finished = []
+
+        def slow():
+            cancelled.wait(5)
+            time.sleep(0.1) # the statement takes a while to stop
+            finished.append(True)
+
+        threading.Timer(0.1, signal.pthread_kill,
+                        (threading.main_thread().ident, signal.SIGINT)).start()
+        with self.assertRaises(KeyboardInterrupt):
+            interruptible(slow, cancel=cancelled.set)
+        # Not raised before the work is over
+        self.assertEqual(finished, [True])
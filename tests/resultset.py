@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from sqlm.cache import CachedCursor
+from sqlm.resultset import Lob, ResultSet
+
+class _Cursor(CachedCursor):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+class MaxRowsTestCase(unittest.TestCase):
+    def result(self, rows, maxrows, arraysize=4):
+        cursor = _Cursor((('n', int, None, None, None, None, None),),
+                         [(i,) for i in range(rows)])
+        result = ResultSet(cursor)
+        result.arraysize = arraysize
+        result.maxrows = maxrows
+
+        return cursor, result
+
+    def test_no_limit(self):
+        cursor, result = self.result(10, 0)
+        self.assertEqual(len(list(result)), 10)
+        self.assertFalse(result.truncated)
+
+    def test_truncated(self):
+        cursor, result = self.result(10, 6)
+        self.assertEqual([len(batch) for batch in result.batches()], [4, 2])
+        self.assertTrue(result.truncated)
+        self.assertTrue(cursor.closed)
+        self.assertEqual(result.stats.counters['rows'], 6)
+
+    def test_exact(self):
+        cursor, result = self.result(6, 6)
+        self.assertEqual(len(list(result)), 6)
+        self.assertFalse(result.truncated)
+        self.assertFalse(cursor.closed)
+
+class _Lob:
+    """Fake driver LOB recording the amount of data read"""
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+
+    def size(self):
+        return len(self.data)
+
+    def read(self, offset=1, amount=None):
+        self.reads.append(amount)
+        return self.data[offset-1:offset-1+amount]
+
+    def getchunksize(self):
+        return 1000
+
+class LobTestCase(unittest.TestCase):
+    def test_prefix(self):
+        driver = _Lob("x" * 100000)
+        lob = Lob(driver, 10)
+        self.assertEqual(str(lob), "xxxxxxxxxx... [100000 chars]")
+        self.assertEqual(driver.reads, [10])
+
+        self.assertEqual(str(Lob(_Lob("short"), 10)), "short")
+        self.assertEqual(str(Lob(_Lob(b"\x01\x02\x03"), 2)),
+                         "0102... [3 bytes]")
+
+    def test_chunks(self):
+        driver = _Lob("x" * 100000)
+        chunks = list(Lob(driver, 10).chunks(4500))
+        self.assertEqual("".join(chunks), driver.data)
+        self.assertEqual(max(driver.reads), 4000)
+
+    def test_result(self):
+        lobs = [_Lob("a" * 500), None, _Lob(b"b" * 500)]
+        cursor = CachedCursor((('n', int, None, None, None, None, None),
+                               ('c', object, None, None, None, None, None)),
+                              [(i, lob) for i, lob in enumerate(lobs)])
+        result = ResultSet(cursor, lobs=[1])
+        result.lobprefix = 3
+
+        with tempfile.TemporaryDirectory() as lobdir:
+            result.lobdir = lobdir
+            rows = list(result)
+
+            self.assertEqual(str(rows[0][1]),
+                             "aaa... [500 chars] -> " +
+                             os.path.join(lobdir, "c_1.txt"))
+            self.assertIsNone(rows[1][1])
+            with open(os.path.join(lobdir, "c_3.bin"), "rb") as f:
+                self.assertEqual(f.read(), b"b" * 500)
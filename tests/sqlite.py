@@ -0,0 +1,132 @@
+import sqlite3
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlm.engine import Engine
+
+class SQLiteStatementTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = Engine(dict(dialect='sqlite', db=':memory:'))
+        self.engine.prepare("CREATE TABLE t (n INTEGER, s TEXT)").execute()
+        stmt = self.engine.prepare("INSERT INTO t VALUES (:n, :s)")
+        stmt.executemany([(i, str(i)) for i in range(10)])
+
+    def test_bind(self):
+        stmt = self.engine.prepare("SELECT s FROM t WHERE n = :n")
+        self.assertEqual(stmt.bindnames, ['N'])
+
+        stmt.bind('n', 'NUMBER', '3')
+        self.assertEqual(list(stmt.execute()), [('3',)])
+        self.assertEqual(stmt['N'], 3)
+
+        stmt.bind('n', 'NUMBER', 7)
+        self.assertEqual(list(stmt.execute()), [('7',)])
+
+    def test_bind_adapted(self):
+        stmt = self.engine.prepare("SELECT :n, :d, :t")
+        result = stmt.execute(n=Decimal('1.5'), d=date(2014, 10, 12),
+                              t=datetime(2014, 10, 12, 1, 2, 3))
+        self.assertEqual(list(result),
+                         [(1.5, '2014-10-12', '2014-10-12 01:02:03')])
+
+        # No process-wide adapter
+        self.assertNotIn((Decimal, sqlite3.PrepareProtocol), sqlite3.adapters)
+
+    def test_statement_reuse(self):
+        stmt = self.engine.prepare("SELECT count(*) FROM t WHERE n < :n")
+        self.assertIs(self.engine.prepare("SELECT count(*) FROM t WHERE n < :n"),
+                      stmt)
+        self.assertEqual(list(stmt.execute(n=5)), [(5,)])
+
+    def test_statement_cache(self):
+        sql = "SELECT n FROM t ORDER BY n"
+        stmt = self.engine.prepare(sql)
+        result = stmt.execute()
+        result.arraysize = 4
+        batches = result.batches()
+        self.assertEqual(len(next(batches)), 4)
+
+        # The result is still being fetched: another statement is used
+        other = self.engine.prepare(sql)
+        self.assertIsNot(other, stmt)
+        self.assertEqual(len(list(other.execute())), 10)
+        self.assertEqual([len(batch) for batch in batches], [4, 2])
+
+        # Fetched: the cached statement is reused
+        self.assertIs(self.engine.prepare(sql), stmt)
+
+    def test_statement_cache_size(self):
+        self.engine.stmtcachesize = 2
+        stmts = [self.engine.prepare("SELECT {:d}".format(i))
+                    for i in range(3)]
+        self.assertIsNot(self.engine.prepare("SELECT 0"), stmts[0])
+        self.assertIs(self.engine.prepare("SELECT 2"), stmts[2])
+
+        self.engine.stmtcachesize = 0
+        self.assertIsNot(self.engine.prepare("SELECT 3"),
+                         self.engine.prepare("SELECT 3"))
+
+    def test_release(self):
+        stmt = self.engine.prepare("SELECT n FROM t")
+        result = stmt.execute()
+        result.maxrows = 3
+        self.assertEqual(list(result), [(0,), (1,), (2,)])
+        self.assertTrue(result.truncated)
+
+        # The statement is still usable
+        self.assertEqual(len(list(stmt.execute())), 10)
+
+class SQLiteBulkInsertTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = Engine(dict(dialect='sqlite', db=':memory:'))
+        self.engine.prepare("CREATE TABLE t (n INTEGER, s TEXT)").execute()
+
+    def count(self):
+        result = self.engine.prepare("SELECT count(n), count(s) FROM t")
+        return list(result.execute())[0]
+
+    def test_bulk_insert(self):
+        dialect = self.engine.dialect
+        dialect.multirow_size = 7
+
+        count = dialect.bulkInsert(self.engine.conn, 't', ('n', 's'),
+                                   ((i, None if i % 2 else str(i))
+                                        for i in range(100)))
+        self.assertEqual(count, 100)
+        self.assertEqual(self.count(), (100, 50))
+        self.assertFalse(self.engine.conn.in_transaction)
+
+    def test_bulk_insert_adapted(self):
+        count = self.engine.dialect.bulkInsert(self.engine.conn, 't',
+                                               ('n', 's'),
+                                               [(Decimal('12'), date(2014, 10, 12)),
+                                                (Decimal('1.5'), None)])
+        self.assertEqual(count, 2)
+        result = self.engine.prepare("SELECT n, s FROM t").execute()
+        self.assertEqual(list(result), [(12, '2014-10-12'), (1.5, None)])
+
+    def test_rollback(self):
+        dialect = self.engine.dialect
+        dialect.multirow_size = 7
+
+        def rows():
+            yield from ((i, str(i)) for i in range(10))
+            raise ValueError("bad row")
+
+        with self.assertRaises(ValueError):
+            dialect.bulkInsert(self.engine.conn, 't', ('n', 's'), rows())
+        self.assertEqual(self.count(), (0, 0))
+
+    def test_make_inserts(self):
+        columns = [('n', 'NUMBER', 1, 0), ('s', 'VARCHAR', 4, 0)]
+        stmt = self.engine.dialect.makeInserts('t', columns,
+                                               [(1, "it's"),
+                                                (None, None)])
+        self.assertEqual(stmt, 'INSERT INTO "t" ("n", "s") VALUES\n'
+                               "    (1, 'it''s'),\n"
+                               "    (NULL, NULL)")
+
+        self.engine.prepare(stmt).execute()
+        self.assertEqual(self.count(), (1, 1))
+
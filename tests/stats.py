@@ -0,0 +1,49 @@
+import unittest
+import json
+
+from sqlm.stats import Stats
+
+class StatsTestCase(unittest.TestCase):
+    def test_timers_are_accumulated(self):
+        stats = Stats("SELECT 1")
+        stats.add('fetch', 0.5)
+        stats.add('fetch', 0.25)
+        stats.add('execute', 1.0)
+
+        self.assertEqual(stats.phases(), [('execute', 1.0, 1),
+                                          ('fetch', 0.75, 2)])
+
+    def test_unknown_timers_are_reported_last(self):
+        stats = Stats()
+        with stats.timer('custom'):
+            pass
+        with stats.timer('prepare'):
+            pass
+
+        self.assertEqual([name for name, *_ in stats.phases()],
+                         ['prepare', 'custom'])
+
+    def test_counters(self):
+        stats = Stats()
+        stats.count('rows', 10)
+        stats.count('rows', 5)
+        stats.count('bytes')
+
+        self.assertEqual(stats.counters, {'rows': 15, 'bytes': 1})
+
+    def test_json(self):
+        stats = Stats("SELECT 1")
+        stats.add('execute', 0.5)
+        stats.count('rows', 1)
+
+        data = json.loads(stats.json())
+        self.assertEqual(data['statement'], "SELECT 1")
+        self.assertEqual(data['timers'], {'execute': {'elapsed': 0.5,
+                                                      'count': 1}})
+        self.assertEqual(data['counters'], {'rows': 1})
+        self.assertGreaterEqual(data['elapsed'], 0)
+
+    def test_elapsed_is_frozen_once_stopped(self):
+        stats = Stats()
+        elapsed = stats.stop()
+        self.assertEqual(stats.stop(), elapsed)
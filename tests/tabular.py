@@ -0,0 +1,44 @@
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlm.tabular import Reader
+
+class ReaderTestCase(unittest.TestCase):
+    def test_parse(self):
+        columns, rows = Reader().parse(["n  x    s",
+                                        "1  1.5  a",
+                                        "2.  NULL  b c"])
+        self.assertEqual(columns, [('n', 'NUMBER', 1, 0),
+                                   ('x', 'NUMBER', 2, 1),
+                                   ('s', 'VARCHAR', 3, 0)])
+
+    def test_convert(self):
+        columns = [('n', 'NUMBER', 1, 0),
+                   ('x', 'NUMBER', 2, 1),
+                   ('s', 'VARCHAR', 3, 0)]
+        rows = [['1', '1.5', 'a'], ['2.', 'NULL', 'null']]
+        self.assertEqual(list(Reader().convert(columns, rows)),
+                         [(1, Decimal('1.5'), 'a'), (2, None, None)])
+
+    def test_dates(self):
+        reader = Reader()
+        columns, rows = reader.parse(["d           t                    x",
+                                      "2014-10-12  2014-10-12 10:00:01  2014",
+                                      "NULL        2014-10-13 00:00:00  2014-10",
+                                      "2014-10-14  NULL                 a"])
+        self.assertEqual(columns, [('d', 'DATE', 0, 0),
+                                   ('t', 'TIMESTAMP', 0, 0),
+                                   ('x', 'VARCHAR', 7, 0)])
+        self.assertEqual(list(reader.convert(columns, rows))[:2],
+                         [(date(2014, 10, 12), datetime(2014, 10, 12, 10, 0, 1),
+                           '2014'),
+                          (None, datetime(2014, 10, 13), '2014-10')])
+
+    def test_date_sample(self):
+        # The mask chosen from the first values must match all the values
+        data = [["2014-10-{:02d}".format(n)] for n in range(1, 30)]
+        data.append(["2014-10-99"])
+        reader = Reader()
+        self.assertEqual(reader.guessType(["d"], data),
+                         [('d', 'VARCHAR', 10, 0)])
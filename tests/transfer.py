@@ -0,0 +1,128 @@
+import unittest
+from datetime import date, datetime
+
+from sqlm.engine import Engine
+from sqlm import transfer
+
+class DescribeTestCase(unittest.TestCase):
+    class Module:
+        class NUMBER:
+            pass
+
+        class STRING:
+            pass
+
+        class DATETIME:
+            pass
+
+    def test_typed(self):
+        m = self.Module
+        description = (('N', m.NUMBER, 11, 22, 10, 2, 1),
+                       ('I', m.NUMBER, 40, 22, 0, -127, 1),
+                       ('S', m.STRING, 20, 20, 0, 0, 1),
+                       ('D', m.DATETIME, 23, 7, 0, 0, 1))
+        self.assertEqual(transfer.describe(m, description, []),
+                         [('N', 'NUMBER', 10, 2),
+                          ('I', 'NUMBER', 0, 0),
+                          ('S', 'VARCHAR', 20, 0),
+                          ('D', 'DATE', 0, 0)])
+
+    def test_untyped(self):
+        description = [(name, None, None, None, None, None, None)
+                            for name in ('N', 'S', 'D', 'T', 'X')]
+        rows = [(1, 'abc', date(2014, 10, 12), datetime(2014, 10, 12), None),
+                (None, 'a', None, None, None)]
+        self.assertEqual(transfer.describe(None, description, rows),
+                         [('N', 'NUMBER', 0, 0),
+                          ('S', 'VARCHAR', 3, 0),
+                          ('D', 'DATE', 0, 0),
+                          ('T', 'TIMESTAMP', 0, 0),
+                          ('X', 'VARCHAR', 1, 0)])
+
+class CopyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.source = Engine('sqlite://:/:memory:')
+        self.target = Engine('sqlite://:/:memory:')
+        self.source.conn.execute("CREATE TABLE t (n INTEGER, s TEXT)")
+        self.source.conn.executemany("INSERT INTO t VALUES (?, ?)",
+                                     [(i, str(i)) for i in range(250)])
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+
+    def copy(self, mode, query="SELECT * FROM t", tbl="u"):
+        names, rows = transfer.copy(self.source, self.target, tbl, query,
+                                    mode, arraysize=20, depth=2)
+        n = self.target.dialect.bulkInsert(self.target.conn, tbl, names, rows)
+        rows.close()
+
+        return n
+
+    def count(self, tbl="u"):
+        return self.target.conn.execute(
+                            'SELECT count(*) FROM "{}"'.format(tbl)).fetchone()[0]
+
+    def test_modes(self):
+        self.assertEqual(self.copy('CREATE'), 250)
+        self.assertEqual(self.copy('APPEND'), 250)
+        self.assertEqual(self.copy('INSERT'), 250)
+        self.assertEqual(self.count(), 750)
+
+        self.copy('REPLACE', "SELECT n FROM t WHERE n < 10")
+        self.assertEqual(self.count(), 10)
+
+        with self.assertRaises(Exception):
+            self.copy('CREATE')
+        with self.assertRaises(Exception):
+            self.copy('INSERT', tbl='missing')
+        with self.assertRaises(ValueError):
+            self.copy('MERGE')
+
+    def test_not_a_query(self):
+        with self.assertRaises(ValueError):
+            self.copy('CREATE', "UPDATE t SET s = 'gone'")
+        with self.assertRaises(ValueError):
+            self.copy('CREATE', "WITH x AS (SELECT 1) DELETE FROM t")
+
+        # Rejected before being executed
+        self.assertEqual(self.source.conn.execute(
+                            "SELECT count(*) FROM t WHERE s = n").fetchone(),
+                         (250,))
+        self.assertFalse(transfer.exists(self.target, 'u'))
+
+    def test_by_position(self):
+        self.target.conn.execute("CREATE TABLE u (id INTEGER, label TEXT)")
+        self.assertEqual(self.copy('INSERT', "SELECT n, s FROM t WHERE n < 3"),
+                         3)
+        self.assertEqual(self.copy('APPEND', "SELECT n+1, s FROM t WHERE n < 3"),
+                         3)
+        self.assertEqual(self.target.conn.execute(
+                            "SELECT sum(id), min(label) FROM u").fetchone(),
+                         (9, '0'))
+
+        with self.assertRaises(ValueError):
+            self.copy('INSERT', "SELECT n FROM t")
+
+    def test_same_table(self):
+        self.target.close()
+        self.target = self.source
+        # The rows read are not the ones being inserted
+        self.assertEqual(self.copy('APPEND', tbl='t'), 250)
+        self.assertEqual(self.copy('INSERT', tbl='t'), 500)
+        self.assertEqual(self.count('t'), 1000)
+
+        self.copy('REPLACE', "SELECT n FROM t WHERE n < 10", tbl='t')
+        self.assertEqual(self.count('t'), 40)
+
+    def test_empty(self):
+        self.assertEqual(self.copy('APPEND', "SELECT * FROM t WHERE 1 = 0"), 0)
+        self.assertTrue(transfer.exists(self.target, 'u'))
+
+    def test_close(self):
+        names, rows = transfer.copy(self.source, self.target, "u",
+                                    "SELECT * FROM t", "CREATE", 20, 2)
+        self.assertEqual(names, ['n', 's'])
+        self.assertEqual(next(rows), (0, '0'))
+        rows.close()
+        self.assertEqual(self.count(), 0)